@@ -17,15 +17,15 @@ ep = eb.cl_epdobase()
 ep.load('Test_4_Lake-Waban-Boathouse.csv','csv')
 ep.numerize()
 
-x = ep.ndct['x']/100.0
-y = ep.ndct['y']/100.0
-z = ep.ndct['z']/100.0
+# Coordinates are in cm:
 
-inds = np.nonzero((z < ceiling)*(x < 10)*(x>-10)*(y<10))[0]
+view = ep.filter({'z' : ('<', ceiling*100.0),
+                  'x' : [('<', 1000.0), ('>', -1000.0)],
+                  'y' : ('<', 1000.0)})
 
-xp = x[inds]
-yp = y[inds]
-zp = z[inds]
+xp = view['x']/100.0
+yp = view['y']/100.0
+zp = view['z']/100.0
 
 fig = pl.figure(1)
 ax = fig.add_subplot(111, projection='3d')
@@ -131,22 +131,37 @@ import numpy as np  # >> Numerical python
 # 
 # * add_fields(fields, fields_defs)     = add fields and field definitions
 # * as_string(epdoc_type)               = write epdobase to string as epdoc_type
-# * characterize()                      = copy ndct to dcty records as strings
+# * characterize(fields=None)           = copy ndct to dcty records as strings
+# * drop_strings(fields=None)           = keep only the numbers of fields
+# * create_index(field, kind='hash')    = index records of "field" by value
+#   (or by trigrams, with kind='trigram', for search_records())
 # * get_epdices()                       = parse individual records as epdex/data
+#   (lazily; see {20261018-1300})
+# * group_by(fields)                    = group records by the values of fields,
+#   to aggregate them with agg() (see {20261018-1400})
 # * init_fields(fields)                 = initialize all fields in "fields"
 # * len()                               = count the number of records
 # * load(filepath, format='auto')       = load file "filepath" w/format "format"
+#   (CSV may be parsed by several processes with kwarg "workers", and field
+#   types may be declared with kwarg "schema"; see {20100821-2045}; Epdobin
+#   records may be limited to a range of values with kwarg "box")
 # * make_empty_records(N)               = add/append N empty records [130710]
 # * matching_records(valdict)           = find indices of all matching records
 # * nullify()                           = replace all empty strings with "null"
-# * numerize()                          = create ndct = dcty, but w/number types
+# * numerize(schema=None)               = create ndct = dcty, but w/number types
 # * pickle()                            = pickle the epdobase
 # * unnullify()                         = replace all "nulls" with empty strings
 # * save(format, filepath)              = save epdobase as epdex/epdata/epdobin
 # * save_part(format, fields, filename) = save a part of the epdobase 
 # * search_records(valdict)             = search records (partial matching)
+# * select(inds)                        = view of a subset of all records
+#   (see {20261018-1330})
 # * shrink(inds)                        = keep subset of all records 
+# * filter(preds)                       = view of the records satisfying preds
+#   (range/comparison predicates on numerized fields; see {20261018-1330})
+# * where(preds)                        = indices of records satisfying preds
 # * sort_records(field, whether_reverse)= sort records by field "field"
+#   (or by a list of fields, each with its own order)
 # </methods>
 # 
 # <variables>
@@ -156,8 +171,14 @@ import numpy as np  # >> Numerical python
 # * flds = the field names: the list of keys to dcty
 # * meta = dictionary containing meta-data with arbitrary keys and values
 # * ndct = a numerized version of dcty: non-alpha records converted to int/float
+# * strs = the string columns (lists) held, by field name (see dcty)
+# * nums = the numeric columns (arrays) held, by field name (see ndct)
 # * umat = unassigned matter; must at least be an empty list. 
 # * pres = precision: dict formated like defs, but w/# desired digits after zero
+#   (applied when numbers are written, and converted to strings in dcty)
+# * indx = hash indices of fields, by field name (see create_index())
+# * sndx = trigram (search) indices of fields, by field name (likewise)
+# * schm = the schema last given to numerize() or load(): declared field types
 # </variables>
 # 
 # <products>
@@ -178,11 +199,65 @@ import numpy as np  # >> Numerical python
 # - Meta-data variable (.meta) added [101025] 
 # - Added explicit file-format specification in load(). [110530] 
 # - Added CSV load support. [110530] 
-# - Added the shrink method. [151128] </updates> 
+# - Added the shrink method. [151128] 
+# - Epdobin files are memory-mapped on loading. [261018] 
+# - Added the where and filter methods. [261018] 
+# - Added the group_by method. [261018] 
+# - dcty and ndct are views of columns held once, as strings or as numbers;
+#   see <notes>. [261018] 
+# - shrink() selects the records of a column when it is next read, and the
+#   select method was added. [261018] 
+# - shrink() also selects the unassigned matter, if it has exactly one entry
+#   per record; other unassigned matter is kept whole, as before. [261018] 
+# - numerize() only converts a field when it is next read from ndct, and only
+#   if its strings were changed. [261018] </updates> 
+#
+# <notes>
+#
+# Each column used to be held twice, as a list of strings in dcty and as an
+# array in ndct, and the strings alone take gigabytes for ten million points.
+# A field's records are now held as strings (in strs), as numbers (in nums),
+# or both, and dcty and ndct are views of them (see {20261018-1430}): a
+# field that is only held as numbers is converted to strings when it is first
+# read from dcty (as by characterize()), and one only held as strings is
+# converted to numbers when first read from ndct (as by numerize()), and the
+# result is kept.  Assigning a column to a field, in either, replaces the
+# field's records, so the other view shows the new ones; changing the records
+# of a column in place (appending to a list of dcty, or multiplying an array
+# of ndct) does not change the other view until numerize() or characterize()
+# is called, as before.  
+#
+# Strings are only dropped where the numbers give them back exactly: after
+# loading, integer columns whose text is written as str() would write it (no
+# leading zeros or plus signs) are held as numbers alone, as are float 
+# columns whose text has one number of decimal places (e.g., "-0.500"), 
+# which is noted in "pres", and Epdobin is held as numbers alone.  
+# drop_strings() drops the strings of other numerized fields, whose text is
+# then written from the numbers (e.g., "2.50" as "2.5"); characterize() drops
+# them too, and dcty then converts them from ndct on access.  The writers of
+# save() and as_string() read the columns without keeping what they convert,
+# so saving doesn't bring back the strings. 
+#
+# shrink() doesn't copy any records: each column is replaced by a selection
+# of it (see {20261018-1445}) that shares its list or array, and is copied
+# out of it when the column is next read, from dcty or ndct.  Shrinking again
+# only selects among the indices, so a crop of a crop of a large cloud costs
+# no more than the records kept, and columns that are never read again are
+# never copied; compact() copies them all at once. 
+#
+# numerize() converts nothing itself: it drops the numbers of the fields
+# whose strings were changed since they were converted (or whose declared
+# type was), and ndct converts each of these again when it is next read, so
+# a script that reads three columns of a wide table converts only those.  The
+# string columns the epdobase reads or converts are tracked lists (see
+# {20261018-1500}), which flag any change made to them; lists assigned to
+# dcty are taken to have changed whenever numerize() is called.
+# make_empty_records() appends nulls to both the strings and the numbers of
+# each field, so appending records converts nothing. </notes>
 #
 # ==============================================================================
 
-class cl_epdobase : 
+class cl_epdobase(object) : 
 
     #---------------------------------------------------------------------------
     # -- Initializing variables ------------------------------------------------
@@ -190,88 +265,167 @@ class cl_epdobase :
 
     def __init__(self): 
 
-        self.dcty = {}    # >> Dictionary
+        self.strs = {}    # >> String columns (viewed as dcty)
+        self.nums = {}    # >> Numeric columns (viewed as ndct)
         self.defs = {}    # >> Field definitions 
         self.flds = []    # >> Field names
-        self.ndct = {}    # >> Numeric dictionary (numerized version of dcty)
         self.umat = []    # >> Unassigned matter (content not assoc. w/fields)
         self.meta = {}    # >> Meta data for entire dictionary (1-level deep)
         self.pres = {}    # >> Precision: num digits after zero (for printing)
+        self.indx = {}    # >> Hash indices of some fields (see create_index())
+        self.sndx = {}    # >> Trigram indices of some fields (likewise)
+        self.schm = {}    # >> Declared types of some fields (see numerize())
 
     #---------------------------------------------------------------------------
-    # -- Loading Epdobase from Epdex, Epdata/Epdadex, or Epdobin ---------------
+    # -- Viewing columns as strings (dcty) or as numbers (ndct) ----------------
     #---------------------------------------------------------------------------
 
-    # >> Loads Epdomonously-formatted data into the Epdobase object:            
-        
-    def load(self, filepath, format='auto'):
+    # >> Dictionary (string columns) and numeric dictionary (numeric columns),
+    # >> converted from each other when needed (see {20261018-1430}).
+    # >> Assigning a dictionary to either replaces the records of its fields.
+    # >> [261018]
+
+    def get_dcty(self) : return cl_epdocolumns(self, 'strs')
+
+    def set_dcty(self, dcty) : 
+
+        if isinstance(dcty, cl_epdocolumns) : dcty = dcty.copy()
 
-        fili = open(filepath,'r')
+        self.strs = dcty
+        for field in list(dcty.keys()) : self.nums.pop(field, None)
 
-        strn = fili.read() # >> Reads entire file into a string
+    def get_ndct(self) : return cl_epdocolumns(self, 'nums')
 
-        if format == 'auto':
+    def set_ndct(self, ndct) : 
 
-            # >> Determine whether format is Epdex, Epdata, or Epdobin, and
-            # >> launch the parser accordingly.  Note that the file type may be
-            # >> ambiguous, in which case we parse as Epdex if '++' occurs
-            # >> first, and as Epdata if '[' occurs first.  e.g., the unassigned
-            # >> matter may be formatted as Epdata in an Epdex file, or as Epdex
-            # >> in an Epdata file.  The ability to discriminate between these
-            # >> latter possibilities (although not in a very sophisticated
-            # >> manner) was added on 2010.10.03.
+        if isinstance(ndct, cl_epdocolumns) : ndct = ndct.copy()
 
-            contains_pp    = '++' in strn      # >> true if file has '++' in it
-            contains_sqbrk = '[' in strn       # >> true if file has '[' in it
+        self.nums = ndct
+        for field in list(ndct.keys()) : self.strs.pop(field, None)
 
-            contains_dob   = '[file_type] Epdobin' in strn # >> true for Epdobin
+    dcty = property(get_dcty, set_dcty)
+    ndct = property(get_ndct, set_ndct)
 
-            if contains_dob : file_format = 'dob'      # >> Epdobin file
+    # >> The columns of kind "kind" ('strs' or 'nums'), viewed without keeping
+    # >> the columns converted when they are read, as the writers read them.
+    # >> [261018]
 
-            elif contains_pp and not contains_sqbrk :  # >> has '++' and not '['
-                file_format = 'dex'
+    def columns(self, kind) : return cl_epdocolumns(self, kind, keep = False)
 
-            elif not contains_pp and contains_sqbrk :  # >> has '[' and not '++'
-                file_format = 'dat'
+    # >> Epdobases pickled before the columns were held once have dcty and 
+    # >> ndct in their attributes: 
 
-            elif contains_pp and contains_sqbrk :      # >> has both (Epdadex?)
+    def __setstate__(self, state) : 
 
-                warning_msg = 'Epdobase: Warning: file format is not obvious...'
+        if 'dcty' in state : state['strs'] = state.pop('dcty')
+        if 'ndct' in state : state['nums'] = state.pop('ndct')
 
-                spbrk_index = strn.find('[')           # >> first index of '['
-                pp_index    = strn.find('++')          # >> first index of '++' 
+        for attr in ['strs', 'nums', 'indx', 'sndx', 'schm'] : 
+            if attr not in state : state[attr] = {}
 
-                if spbrk_index < pp_index:             # >> '[' occurs first
+        self.__dict__.update(state)
 
-                    warning_msg += ' reading as Epdata (i.e., Epdadex).'
-                    file_format = 'dat'
+    #---------------------------------------------------------------------------
+    # -- Loading Epdobase from Epdex, Epdata/Epdadex, or Epdobin ---------------
+    #---------------------------------------------------------------------------
+
+    # >> Loads Epdomonously-formatted data into the Epdobase object.  Kwarg
+    # >> "workers" is the number of processes used to parse CSV (see
+    # >> {20261018-1015}); other formats are always read by one process.  Kwarg
+    # >> "schema" declares the types of some or all fields (see
+    # >> {20100821-2045}), to which ndct converts them.  Kwarg
+    # >> "box" limits the records of an Epdobin file to a range of values of
+    # >> some fields (see {20261018-1130}). 
+        
+    def load(self, filepath, format='auto', workers=1, schema=None, box=None):
 
-                else :                                 # >> '++' occurs first 
+        self.drop_indices()
 
-                    warning_msg += ' reading as Epdex.'
-                    file_format = 'dex'
+        # >> Determine whether format is Epdex, Epdata, Epdobin or CSV from the
+        # >> beginning of the file (see {20261018-1230}), and launch the parser
+        # >> accordingly. [261018]
 
-                print(warning_msg)
+        if format == 'auto' : file_format = sniff_format(filepath)
 
         # ! I've added the option of explicitly specifying the format in the
         # ! epdobase call: [110530]
 
         else: file_format = format     # >> format was defined in epdobase call
 
+        if box is not None and file_format != 'dob' : 
+            raise ValueError('Epdobase: kwarg "box" is for Epdobin files only.')
+
+        # >> CSV read by several processes, and Epdobin, are memory-mapped
+        # >> instead of being read into a string: [261018]
+
+        if file_format == 'csv' and workers > 1 : strn = ''
+        elif file_format == 'dob' : strn = ''
+        else : 
+            fili = open(filepath,'r')
+            strn = fili.read() # >> Reads entire file into a string
+            fili.close()        # >> Close the input file
 
         # >> Finally, parse the files according to type:
 
         if   file_format == 'dat' : prsd = parse_epdata(strn,'first_tag')
-        elif file_format == 'dex' : prsd = parse_epdex(strn)
-        elif file_format == 'dob' : prsd = parse_epdobin(strn) 
+        elif file_format == 'dex' : prsd = parse_epdex(strn, schema = schema)
+        elif file_format == 'dob' : prsd = map_epdobin(filepath, box = box) 
         elif file_format == 'ddx' : prsd = parse_epdata(strn) 
-        elif file_format == 'csv' : prsd = parse_csv(strn) 
+        elif file_format == 'csv' and workers > 1 : 
+            prsd = parse_csv_parallel(filepath, workers, schema = schema,
+                                      pres = self.pres)
+        elif file_format == 'csv' : prsd = parse_csv(strn, schema = schema) 
 
         # >> Assign parsed elements accoringly:
 
+        self.strs = {}
+        self.nums = {}
+        self.schm = {}
+
+        # >> The string columns are tracked, so that numerize() can tell if
+        # >> they were changed (see {20261018-1500}): [261018]
+
         if file_format == 'dob' : 
-            self.ndct = prsd[0]        # >> epdobin loads to numeric dict
-        else: self.dcty = prsd[0]      # >> all others load to main dict
+            self.nums = prsd[0]        # >> epdobin loads to numeric dict
+        else: self.strs = tracked_columns(prsd[0]) # >> others to main dict
+
+        # >> The CSV parser also numerizes the columns as it reads them, as
+        # >> does the Epdex parser, if given a schema; integer columns are then
+        # >> held as numbers alone, if they give back the same strings, and so
+        # >> are float columns written with one number of decimal places,
+        # >> which is noted in "pres" (see drop_strings()): [261018]
+
+        if file_format == 'csv' or (file_format == 'dex' and len(prsd) > 4) :
+
+            self.nums = prsd[4]
+            self.schm = dict(schema or {})
+
+            drop = []
+
+            for field in prsd[1] : 
+
+                # >> (Fields left out by parse_csv_parallel() are already held
+                # >> as numbers alone:)
+
+                if field not in self.nums or field not in self.strs or \
+                        field in (schema or {}) : 
+                    continue
+
+                if canonical_int_strings(self.strs[field], self.nums[field]) : 
+                    drop.append(field)
+                    continue
+
+                # >> (A precision already prescribed for the field must be the
+                # >> one its text was written with:)
+
+                places = fixed_point_places(self.strs[field], self.nums[field])
+
+                if places is not None and \
+                        self.pres.get(field, places) == places : 
+                    self.pres[field] = places
+                    drop.append(field)
+
+            self.drop_strings(drop)
 
         self.flds = prsd[1]  # >> fields
         self.defs = prsd[2]  # >> field definitions
@@ -280,7 +434,16 @@ class cl_epdobase :
 
         if file_format != 'dob': self.umat = prsd[3] 
 
-        fili.close() # >> Close the input file
+        # >> Declared types are applied to the other formats here: [261018]
+
+        if schema is not None and file_format == 'dob' : 
+            for field in self.flds : 
+                if field in schema : 
+                    self.nums[field] = numerize_column_schema(self.nums[field],
+                                                              schema[field])
+
+        elif schema is not None and file_format not in ['csv', 'dex'] : 
+            self.numerize(schema = schema)
 
     #---------------------------------------------------------------------------
     # -- Save as Epdex, Epdata, Epdobin, CSV, or LaTex, or pickle it -----------
@@ -297,15 +460,23 @@ class cl_epdobase :
     # >>
     # >> fields   = list of field names
     # >> filename = file name   
+    # >>
+    # >> Kwarg "compress" ('zlib' or 'lzma') compresses Epdobin in blocks, and
+    # >> kwarg "compact" stores each integer column of Epdobin as the smallest
+    # >> integer type that holds it (see {20101025-1615}).  The writers write
+    # >> to the file as they go, a block of records at a time, rather than
+    # >> assembling the whole file in a string first. [261018]
 
-    def save_part(self, format, fields, filepath) :
-
-        import copy
+    def save_part(self, format, fields, filepath, compress=None, 
+                  compact=False) :
 
-        strn = ''
-        filo = open(filepath,'w')
         field_defs = {}
 
+        # >> Epdobin is binary: [261018]
+
+        if format in ['epdobin', 'epdob', 'dob'] : filo = open(filepath,'wb')
+        else : filo = open(filepath,'w')
+
         # >> If the number of fields is not equal to the number of field
         # >> definitions, then pear it down to the requested subset: 
 
@@ -317,46 +488,46 @@ class cl_epdobase :
                     field_defs[field] = self.defs[field]
         else:
 
-            field_defs = copy.deepcopy(self.defs)
+            field_defs = self.defs
 
-        # >> Save as epdex, epdata, epdobin, csv, as requested...            
+        # >> Save as epdex, epdata, epdobin, csv, as requested.  None of the
+        # >> writers modifies the dictionary, the fields or their definitions
+        # >> (unassigned matter is written as a column of its own), so nothing
+        # >> is copied here.  The writers read the columns through views that
+        # >> don't keep what they convert, so that saving a field held only as
+        # >> numbers doesn't bring back its strings (see {20261018-1430}):
+        # >> [261018]
 
-        # !! I would like to eliminate the calls to "copy.deepcopy", used here
-        # !! because it is easiest to deal with unassigned matter by simply
-        # !! adding a field called "umat" to the dictionary (see
-        # !! {20100526-1511}). The call to "copy.deepcopy" creates a complete
-        # !! copy of the dictionary, which makes this method a memory hog:
+        dcty = self.columns('strs')
+        ndct = self.columns('nums')
 
         if format == 'epdex' or format == 'dex':
-
-            strn = write_epdex(copy.deepcopy(self.dcty), fields, \
-                                   field_defs, self.umat[:])
-
-        # !! Writing epdata does not modify the dictionary:
+            write_epdex(dcty, fields, field_defs, self.umat, filo = filo)
 
         elif format == 'epdata' or format == 'epdat' or format == 'dat':
-            strn = write_epdata(self.dcty, fields, field_defs, self.umat)
+            write_epdata(dcty, fields, field_defs, self.umat, filo = filo)
 
         # !! Note that Epdobin does not handle unassigned matter, and that the
         # !! numerical dictionary (.ndct) is the output:
 
         elif format == 'epdobin' or format == 'epdob' or format == 'dob':
-            strn = write_epdobin(self.ndct, fields, field_defs) 
+            write_epdobin(ndct, fields, field_defs, compact = compact, 
+                          compress = compress, filo = filo) 
 
         elif format == 'csv' : 
-            strn = write_csv(self.dcty, fields, field_defs, self.umat, 
-                             pres=self.pres)
+            write_csv(dcty, fields, field_defs, self.umat, 
+                      pres=self.pres, filo = filo, ndct = ndct)
 
         elif format == 'tex' or format == 'latex': 
-            strn = write_latex(self.dcty, fields, field_defs, self.umat,
-                               pres=self.pres)
+            write_latex(dcty, fields, field_defs, self.umat,
+                        pres=self.pres, filo = filo)
                    
-        filo.write(strn)
         filo.close()
 
-    def save(self, format, filepath) : 
+    def save(self, format, filepath, compress=None, compact=False) : 
 
-            self.save_part(format, self.flds[:], filepath)
+            self.save_part(format, self.flds, filepath, compress = compress,
+                           compact = compact)
 
     # :: Pickle the epdobase :::::::::::::::::::::::::::::::::::::::::::::::::::
 
@@ -395,30 +566,33 @@ class cl_epdobase :
     # >> Sole input is epdoc_type, which can have the values 'dex' (for Epdex)
     # >> and 'dat" (for Epdata) or 'dob' (for Epdobin), 'csv' (for CSV), 'tex'
     # >> (for LaTex) and other variants of these, listed below. [101003]
+    # >> The writers write to an in-memory buffer, whose contents are returned
+    # >> (bytes, for Epdobin). [261018]
     
     def as_string(self, epdoc_type) :
 
-        import copy  # >> [101028]
+        # >> (The columns are read as in save_part(): [261018])
+
+        dcty = self.columns('strs')
+        ndct = self.columns('nums')
 
         if epdoc_type == 'dex' or epdoc_type == 'epdex': 
-            strn = write_epdex(copy.deepcopy(self.dcty), \
-                                   self.flds,self.defs,self.umat)
+            strn = write_epdex(dcty,self.flds,self.defs,self.umat)
 
         elif epdoc_type == 'dat' or epdoc_type == 'epdata' \
                 or epdoc_type == 'epdat': 
-            strn = write_epdata(self.dcty,self.flds,self.defs,self.umat)
+            strn = write_epdata(dcty,self.flds,self.defs,self.umat)
 
         elif epdoc_type == 'dob' or epdoc_type == 'epdob' \
                 or epdoc_type == 'epdobin': 
-            strn = write_epdata(self.dcty,self.flds,self.defs,self.umat,
-                                pres=self.pres)
+            strn = write_epdobin(ndct,self.flds,self.defs)
 
         elif epdoc_type == 'csv': 
-            strn = write_csv(self.dcty,self.flds,self.defs,self.umat,
-                             pres=self.pres)
+            strn = write_csv(dcty,self.flds,self.defs,self.umat,
+                             pres=self.pres,ndct=ndct)
 
         elif epdoc_type == 'tex' or epdoc_type == 'latex': 
-            strn = write_latex(self.dcty,self.flds,self.defs,self.umat,
+            strn = write_latex(dcty,self.flds,self.defs,self.umat,
                                pres=self.pres)
 
         return strn
@@ -437,69 +611,131 @@ class cl_epdobase :
     # >> "unassigned matter".  The second keyword argument "epdoc_type" is set
     # >> to "dex" for Epdex and "dat" for Epdata (default is "dex").  Note that
     # >> this is primarily used for Epdata documents whose unassigned matter is
-    # >> formatted as Epdex (hence the default settings).
+    # >> formatted as Epdex (hence the default settings).  The objects are
+    # >> returned as a sequence that parses each record on first access, and
+    # >> keeps the last "cache_size" parsed. [261018]
     
     # !! This method was added on 2010.10.03, mainly in support of "Epdadex":
     # !! i.e., Epdata whose unassigned matter is formatted as Epdex.  
 
-    def get_epdices(self, field_name='umat', epdoc_type='dex') : 
+    def get_epdices(self, field_name='umat', epdoc_type='dex', 
+                    cache_size=128) : 
 
-        if field_name == 'umat' : col = self.umat
-        else : col = self.dcty[field_name]
+        # >> The records are parsed when they are first accessed, and the last
+        # >> "cache_size" of them are kept (see {20261018-1300}): [261018]
 
-        epdices = []
-        
-        for i in range(0,self.len(),1) : 
+        return cl_epdices(self, field_name, epdoc_type, cache_size)
 
-            ep = cl_epdobase()            # >> create an Epdobase object
+    #---------------------------------------------------------------------------
+    # -- Computing attributes --------------------------------------------------
+    #---------------------------------------------------------------------------
 
-            # >> Parse the record:
+    # >> Computes and returns the number of records in the Epdobase:
 
-            if   epdoc_type == 'dex' : parsed = parse_epdex(self.umat[i])
-            elif epdoc_type == 'dat' : parsed = parse_epdat(self.umat[i])
+    def len (self) : return num_dict_records(self.dcty)
 
-            # >> Populate the corresponding Epdobase:
+    # >> Keeps only the numeric columns of the fields in "fields" (by default,
+    # >> all fields), dropping their strings, so that each record takes only
+    # >> the bytes of its number; dcty converts the numbers back to strings
+    # >> when asked for.  A float field without a precision in "pres" whose
+    # >> strings all have the same number of decimal places, as the numbers
+    # >> written with it give them back (e.g., the x,y,z of LMI.ino), is given
+    # >> that precision, so that its text is kept exactly; other fields lose
+    # >> the formatting of the text they were read from (e.g., "2.50" is then
+    # >> "2.5").  Fields that are not numeric keep their strings. [261018]
 
-            ep.dcty = parsed[0]; ep.flds = parsed[1] 
-            ep.defs = parsed[2]; ep.umat = parsed[3]
+    def drop_strings(self, fields=None) : 
 
-            # >> Add the field values for the currect record as meta-data for
-            # >> this Epdobase object... (N.B. This was added on 2010.10.25 and
-            # >> not immediately tested.  The for-loop was also changed.)
-            
-            ep.meta = {}
-            
-            for field in self.flds : ep.meta[field] = self.dcty[field][i]
+        if fields is None : fields = list(self.strs.keys())
 
-            epdices.append(ep)  # >> Finally, append the epdobase
+        for field in fields : 
 
-        return epdices
+            if field not in self.strs : continue
 
-    #---------------------------------------------------------------------------
-    # -- Computing attributes --------------------------------------------------
-    #---------------------------------------------------------------------------
+            column = self.ndct[field]
 
-    # >> Computes and returns the number of records in the Epdobase:
+            if np.asarray(column).dtype.kind not in 'biuf' : continue
 
-    def len (self) : return num_dict_records(self.dcty)
+            if field not in self.pres : 
+                places = fixed_point_places(self.strs[field], column)
+                if places is not None : self.pres[field] = places
+
+            del self.strs[field]
 
     #---------------------------------------------------------------------------
     # -- Shrink current epdobase to a subset of records ------------------------
     #---------------------------------------------------------------------------
 
     # Inds is a list or array of indices of records that should be kept; all the
-    # rest are discarded. [151128]
+    # rest are discarded. [151128]  The columns are only selected when they
+    # are next read (see {20100527-1045}).  The unassigned matter is selected
+    # too, if it has exactly one entry per record (as that of Epdata does);
+    # otherwise it is taken to be about the whole epdobase, and kept as it
+    # is.  (Before, it was always kept, so unassigned matter of exactly as
+    # many lines as there are records is now selected.) [261018]
 
     def shrink(self, inds) :
 
-        inds_arr = np.array(inds)
-        inds_lst = list(inds)
+        self.drop_indices()
+
+        inds = row_indices(inds)
+
+        if len(self.umat) == self.len() : 
+            self.umat = [self.umat[i] for i in inds.tolist()]
+
+        self.strs = select_lazily(self.strs, inds)
+        self.nums = select_lazily(self.nums, inds)
+
+    # >> Copies the records of all columns that shrink() left to be selected,
+    # >> and returns the epdobase. [261018]
+
+    def compact(self) : 
+
+        for field in list(self.strs.keys()) : self.dcty[field]
+        for field in list(self.nums.keys()) : self.ndct[field]
+
+        return self
+
+    # >> Returns a view of the records at the indices "inds" (a list or array
+    # >> of indices, or of flags), which holds only the indices; nothing is
+    # >> copied, unless the view's compact() is called (see 
+    # >> {20261018-1330}). [261018]
+
+    def select(self, inds) : return cl_epdoview(self, row_indices(inds))
 
-        for fld in self.flds:
+    #---------------------------------------------------------------------------
+    # -- Select records by the values of numeric fields ------------------------
+    #---------------------------------------------------------------------------
+
+    # >> Returns the indices of the records that satisfy all of the predicates
+    # >> in the dictionary "preds", whose keys are numerized fields, and whose
+    # >> values are ranges (lo, hi), comparisons such as ('<', 2.0), or lists
+    # >> of these (see {20261018-1330}).  All the predicates are evaluated into
+    # >> a single mask over ndct, a block of records at a time. [261018]
+
+    def where(self, preds) : 
+
+        return np.nonzero(predicate_mask(self.ndct, preds))[0]
+
+    # >> Returns the records that satisfy all of the predicates in "preds" (as
+    # >> in where()) as a view of this epdobase, which holds only the indices
+    # >> of the records; see {20261018-1330}. [261018]
+
+    def filter(self, preds) : return cl_epdoview(self, self.where(preds))
+
+    #---------------------------------------------------------------------------
+    # -- Group records for aggregation -----------------------------------------
+    #---------------------------------------------------------------------------
+
+    # >> Groups the records by their values of the field "fields" (or list of
+    # >> fields), and returns the groups, whose agg() method computes
+    # >> statistics of other fields over each group, e.g., 
+    # >>
+    # >> ep.group_by('station').agg({'z' : ['count', 'mean', 'max']})
+    # >>
+    # >> See {20261018-1400}. [261018]
 
-            self.ndct[fld] = self.ndct[fld][inds_arr]
-            tmp_dcty       = np.array(self.dcty[fld])
-            self.dcty[fld] = list(tmp_dcty[inds_arr])
+    def group_by(self, fields) : return cl_epdogroups(self, fields)
             
     #---------------------------------------------------------------------------
     # -- Initializing fields & adding new ones ---------------------------------
@@ -514,11 +750,12 @@ class cl_epdobase :
 
     def init_fields(self, fields) :
 
+        self.drop_indices()
+
         self.flds = fields
 
         for field in fields : 
             self.dcty[field] = []
-            self.ndct[field] = []
             self.defs[field] = ''
 
     # :: Adding new fields :::::::::::::::::::::::::::::::::::::::::::::::::::::
@@ -566,10 +803,75 @@ class cl_epdobase :
     def matching_records(self, valdict) :
 
         any_matched, all_matched = \
-            get_matching_records(self.dcty, valdict, 'exact')
+            get_matching_records(self.dcty, valdict, 'exact', 
+                                 indices = self.valid_indices())
         
         return all_matched
 
+    # :: Indexing records ::::::::::::::::::::::::::::::::::::::::::::::::::::::
+
+    # >> Builds a hash index of the field "field": a dictionary whose keys are
+    # >> the values of its records, and whose values are lists of the indices
+    # >> of the records holding them, so that matching_records() looks values
+    # >> up instead of comparing them with every record.  The methods that
+    # >> change records drop the indices, and an index is not used once the
+    # >> field's list has been replaced, or changed in any way (a record
+    # >> assigned, appended, deleted, sorted, etc.), as its tracked list counts
+    # >> (see {20261018-1500}); call create_index() again to rebuild it.
+    # >> [261018]
+    # >>
+    # >> With kind='trigram', the index is instead of the three-character
+    # >> substrings of the records, so that search_records() only checks the
+    # >> records holding all of those of the value searched for (see
+    # >> make_trigram_index()). [261018]
+
+    def create_index(self, field, kind='hash') :
+
+        if kind not in ['hash', 'trigram'] : 
+            raise ValueError('Epdobase: unknown kind of index: ' + kind)
+
+        column = self.dcty[field]
+
+        # >> The index notes the version of the field's tracked list (see 
+        # >> {20261018-1500}); a plain list is held as a tracked copy first, 
+        # >> still taken to have changed since it was numerized:
+
+        if not isinstance(column, cl_epdolist) : 
+            column = cl_epdolist(column)
+            column.dirt = True
+            self.strs[field] = column
+
+        if kind == 'hash' : 
+            self.indx[field] = (column, column.vers, make_hash_index(column))
+        else : 
+            self.sndx[field] = (column, column.vers, 
+                                make_trigram_index(column))
+
+    def drop_indices(self) : 
+        self.indx = {}
+        self.sndx = {}
+
+    # >> Returns the indices of kind "kind" that are still valid, by field name
+    # >> (the others are dropped):
+
+    def valid_indices(self, kind='hash') :
+
+        if kind == 'trigram' : kind_indx = self.sndx
+        else : kind_indx = self.indx
+
+        indices = {}
+
+        for field in list(kind_indx.keys()) : 
+
+            column, vers, index = kind_indx[field]
+
+            if self.strs.get(field) is column and \
+                    getattr(column, 'vers', None) == vers : 
+                indices[field] = index
+            else : del kind_indx[field]
+
+        return indices
+
     # :: Searching records :::::::::::::::::::::::::::::::::::::::::::::::::::::
 
     # >> Returns the indices of any records that contain any of the record
@@ -577,12 +879,14 @@ class cl_epdobase :
     # >> variable, or any records that match all of them.  The sole input
     # >> "valdict" is a dictionary whose keys are the fields to be searched, and
     # >> whose values are lists of all the values to be searched for. For
-    # >> details, see {20100704-2216}.
+    # >> details, see {20100704-2216}.  Fields with a trigram index (see
+    # >> create_index()) are searched through it. [261018]
 
     def search_records(self, valdict) :
 
         any_matched, all_matched = \
-            get_matching_records(self.dcty, valdict, 'partial')
+            get_matching_records(self.dcty, valdict, 'partial', 
+                                 indices = self.valid_indices('trigram'))
 
         return any_matched
 
@@ -590,8 +894,12 @@ class cl_epdobase :
     
     # >> Sort the records in the epdobase by the field "field".  Input
     # >> "whether_reverse" should be True for reverse order, False otherwise.
+    # >> Either may be a list, to sort by several fields, each in its own
+    # >> order (see {20100821-1803}). [261018]
+
+    def sort_records(self, field, whether_reverse=False) :
 
-    def sort_records(self, field, whether_reverse) :
+        self.drop_indices()
 
         sort_epdobase_simple(self, field, whether_reverse)
 
@@ -602,10 +910,13 @@ class cl_epdobase :
     # :: Numerizing records ::::::::::::::::::::::::::::::::::::::::::::::::::::
 
     # >> This just refers to converting the data types of whole columns (fields)
-    # >> to numbers if possible (int or float), and storing the result in ndct.
-    # >> See the header of the function that is wrapped here:
+    # >> to numbers if possible (int or float), and storing the result in ndct,
+    # >> which converts each field when it is read.  Changes made to the
+    # >> strings of dcty only reach ndct when this is called.  Kwarg "schema"
+    # >> declares the types of some or all fields. See the header of the
+    # >> function that is wrapped here:
 
-    def numerize(self) : numerize_epdobase(self)
+    def numerize(self, schema=None) : numerize_epdobase(self, schema = schema)
     
     # :: "Characterizing" records ::::::::::::::::::::::::::::::::::::::::::::::
 
@@ -614,1150 +925,1424 @@ class cl_epdobase :
     # >> way, the user can use numerize() to create numeric lists and then
     # >> arrays, perform some operations on these numbers, and then convert them
     # >> back in to the string-dictionary form that allows access to e.g., file
-    # >> I/O. See the header of the function that is wrapped here for more info:
+    # >> I/O.  Kwarg "fields" limits this to some of the fields. See the header
+    # >> of the function that is wrapped here for more info:
 
-    def characterize(self) : characterize_epdobase(self)
+    def characterize(self, fields=None) : 
+        self.drop_indices()
+        characterize_epdobase(self, fields = fields)
 
     # :: Creating, "Nullifying", "Unnullifying" empty records ::::::::::::::::::
 
     # >> This just refers to converting empty strings to "null"
 
-    def nullify(self) : nullify_epdobase(self)
+    def nullify(self) : 
+        self.drop_indices()
+        nullify_epdobase(self)
 
     # >> This just refers to converting "null"s to empty strings:
 
-    def unnullify(self) : unnullify_epdobase(self)
+    def unnullify(self) : 
+        self.drop_indices()
+        unnullify_epdobase(self)
 
-    # >> Create new/additional empty records [130710]
+    # >> Create new/additional empty records [130710].  Nulls are appended to
+    # >> the strings and to the numbers of each field, as numerize() would
+    # >> convert them, rather than numerizing all fields again; integer fields
+    # >> held only as numbers (or declared in a schema) get masked records, so
+    # >> that their strings stay the same (see {20261018-1500}). [261018]
 
     def make_empty_records(self,N) : 
 
-        for i in range(N) :
-            for fld in self.flds : 
-                self.dcty[fld].append('null')
+        self.drop_indices()
 
-        self.numerize()
+        for fld in self.flds : 
+
+            if fld not in self.nums : 
+                self.dcty[fld].extend(['null'] * N)
+                continue
+
+            keep_ints = fld not in self.strs or fld in self.schm
+            self.nums[fld] = null_records_appended(self.ndct[fld], N, keep_ints)
+
+            if fld not in self.strs : continue
+
+            column = self.dcty[fld]
+            changed = strings_changed(column)
+            column.extend(['null'] * N)
+
+            if not changed : column.dirt = False
                 
 # ==============================================================================
 #
-# 20100526-1508-mpuboo - merge_epdobase.py
+# 20261018-1430-mpuboo - Epdobase Columns Class
 #
 # <summary>
 #
-# Smart merging and consolidation of two Epdomonus dictionary (epdobase) objects
-# </summary>
+# The dcty or ndct of an epdobase: a dictionary-like view of its columns, as
+# strings or as numbers </summary>
 #
 # <syntax>
 # 
-# ep3 = merge_epdobase(ep1, ep2, match_fields) </syntax>
+# columns_name = cl_epdocolumns(ep, kind, keep = True) 
+# columns_name = ep.dcty     (kind = 'strs')
+# columns_name = ep.ndct     (kind = 'nums') </syntax>
 #
-# <inputs>
+# <methods>
 # 
-# Inputs "ep1" and "ep2" are the Epdobase objects to be merged.  Argument
-# "match_fields" is a list of names of fields to be used for matching records in
-# each epdobase.
-#
-# There is now also a kwarg "add_nonmatching_records" which should be set to
-# False if the user prefers to merge into a database that is the intersection
-# rather than union of the two input databases. </inputs>
+# * columns[field]                      = the column of field "field"
+# * columns[field] = column             = replace the records of "field"
+# * del columns[field]                  = drop the field's records
+# * field in columns, len(columns), for field in columns : ... 
+# * keys(), values(), items(), get(), pop(), update(), copy()
+# * lengths()                           = number of records, by field
+# </methods>
+# 
+# <variables>
 #
+# * prnt = the epdobase whose columns are viewed
+# * kind = 'strs' (strings, as in dcty) or 'nums' (numbers, as in ndct)
+# * keep = whether columns converted (or copied out of a selection) when they
+#          are read are kept by the epdobase
+# </variables>
+# 
 # <products>
 # 
-# Result is the merged database, also an Epdobase object.  The script will loop
-# over all the records in ep1, finding all records in ep2 that match each record
-# in ep1 for the fields listed in "match_fields".  If there is no match, a new
-# record is created.  Fields in ep2 but not in ep1 are added to ep3; the empty
-# fields of non-matching records in ep2 will inherit "null" values in ep3.
-# Likewise for fields in ep1 and not in ep2.  Note that matching records having
-# the same non-matching fields with different values for ep1 and ep2 will
-# inherit the values of ep2 (i.e., ep1's values will be "over-written" by ep2's
-# values wherever the values in matching records disagree). </products>
+# A column held only in the other kind is converted when it is read, by
+# characterize_column() (numbers to strings, with the decimal places the
+# epdobase's "pres" prescribes for the field) or numerize_column() (strings to
+# numbers, or numerize_column_schema(), if the field's type was declared), and
+# kept by the epdobase, as is a column copied out of a selection (see
+# {20261018-1445}), unless "keep" is False (as for the writers of save(), so
+# that writing a field held only as numbers doesn't bring back its strings).
+# Assigning a column drops that of the other kind, if any. </products>
 #
 # <type>
 # 
-# Function </type>
+# Class </type>
 #
 # <dependencies>
 # 
-# omnigenus </dependencies>
-#
-# <updates>
-#
-# - In some cases, you may not wish to add nonmatching records; I have added
-#   a kwarg whose default argument is "True" for backward compatibility. </updates>
+# copy, numpy </dependencies>
 #
-# <notes> 
+# <notes>
 #
-# As currently implemented, records with empty fields in ep2 that match records
-# in ep1 that are not empty will *not* overwrite the ep1 values.  Same behavior
-# applies to the unassigned matter.  That is, as currently implemented, the
-# merger preserves information, never overwriting information with empty record
-# values.  See {saftey1} and {safety2} in the code. </notes>
+# See the notes of {20100527-1045}.  The fields are those held in either
+# kind, those of the view's own kind first.  copy() returns a plain
+# dictionary of all the columns, converted, as do copy.copy() and
+# copy.deepcopy() (the latter copying the columns too). </notes>
 #
 # ==============================================================================
 
-def merge_epdobase(ep1, ep2, match_fields, add_nonmatching_records = True) :
-
-    # >> First nullify both epdobases:
+class cl_epdocolumns(object) : 
 
-    ep1.nullify()
-    ep2.nullify()
+    def __init__(self, ep, kind, keep = True) : 
 
-    # >> If their fields are undefined (empty), get them from the dict keys:
+        self.prnt = ep
+        self.kind = kind
+        self.keep = keep
 
-    if len(ep1.flds) == 0 : ep1.flds = ep1.dcty.keys()
-    if len(ep2.flds) == 0 : ep2.flds = ep2.dcty.keys()
+    # :: The columns held in this view's kind, and in the other :::::::::::::::
 
-    # >> Then create the new dict ep3, w/all the fields of both prior structs:
+    def held(self) : 
 
-    ep3 = cl_epdobase()
+        if self.kind == 'strs' : return self.prnt.strs, self.prnt.nums
+        else : return self.prnt.nums, self.prnt.strs
 
-    ep3.flds = ep1.flds[:]
+    # :: Reading, replacing and dropping columns :::::::::::::::::::::::::::::::
 
-    for field in ep2.flds:
-        if field not in ep3.flds :
-            ep3.flds.append(field)
+    def __getitem__(self, field) : 
 
-    # >> Copy the field definitions, overwriting ones from ep2 occurring in ep1:
+        own, other = self.held()
 
-    if len(ep1.defs) > 0 : 
-        for field in ep1.flds: ep3.defs[field] = ep1.defs[field][:]
+        # >> Columns that shrink() left to be selected are copied out now (see
+        # >> {20261018-1445}):
 
-    if len(ep2.defs) > 0 : 
-        for field in ep2.flds: ep3.defs[field] = ep2.defs[field][:]
+        if isinstance(own.get(field), cl_epdoselection) : 
+            if not self.keep : return own[field].take()
+            own[field] = own[field].take()
 
-    # >> The length of ep1 and ep2:
+        if field in own : return own[field]
 
-    len_ep1 = ep1.len()    
-    len_ep2 = ep2.len()
+        if field not in other : raise KeyError(field)
 
-    # >> Create arrays for all the ep2 fields:
+        source = other[field]
 
-    for field in ep2.flds : 
-        ep3.dcty[field] = []
-        for i in range(0,len_ep1,1) :
-            ep3.dcty[field].append('null') 
+        if isinstance(source, cl_epdoselection) : 
+            source = source.take()
+            if self.keep : other[field] = source
 
-    # >> Fill the ep3 dictionary with the dictionary records of ep1:
+        if self.kind == 'strs' : 
+            column = characterize_column(source, self.prnt.pres.get(field))
 
-    for field in ep1.flds : ep3.dcty[field] = ep1.dcty[field][:]
+        # >> Strings are converted to the type declared for the field, if it
+        # >> was, and a tracked list is marked unchanged (see 
+        # >> {20261018-1500}):
 
-    # >> Fill unassigned matter in ep3 with the unassigned matter of ep1:
+        elif field in self.prnt.schm : 
+            column = numerize_column_schema(source, self.prnt.schm[field])
+        else : column = numerize_column(source)
 
-    ep3.umat = ep1.umat[:] # >> Note that ep1.umat might be empty!
+        if not self.keep : return column
 
-    # >> If ep2 has unassigned matter and ep1 does not, fill ep3's unassigned
-    # >> matter with as many nulls as there are records in ep1:
+        own[field] = column
 
-    if len(ep2.umat) > 0 and len(ep3.umat) == 0 :
-        for i in range(0, len_ep1, 1 ) : ep3.umat.append("null")
+        if self.kind == 'nums' and isinstance(source, cl_epdolist) : 
+            source.dirt = False
 
-# -- Find all records in ep2 that match a record -------------------------------
-     
-    # >> For each "record" of ep2, find the record of ep3 with matching values
-    # >> in the match_fields, 
+        return column
 
-    matches = []
+    def __setitem__(self, field, column) : 
 
-    for i in range(0, len_ep2, 1) : # >> For each record in ep2 ...
+        own, other = self.held()
 
-        valdict = {}
+        own[field] = column
+        other.pop(field, None)
 
-        for field in match_fields : valdict[field] = ep2.dcty[field][i]
-        tmp1,tmp2 = get_matching_records(ep3.dcty,valdict,'exact')
-        matches.append(tmp2)
+    def __delitem__(self, field) : 
 
-# -- Overwrite existing records, add the new ones ------------------------------
+        own, other = self.held()
 
-    # >> Now update the matching records with the values in ep2.  If a record
-    # >> had no match, then add the entire record.
+        if field not in own and field not in other : raise KeyError(field)
 
-    for i in range (0, len_ep2, 1) :  # >> For each record in ep2...
+        own.pop(field, None)
+        other.pop(field, None)
 
-        # >> if there were no matches to this reccord, add it to ep3:
+    # :: The fields ::::::::::::::::::::::::::::::::::::::::::::::::::::::::::::
 
-        if len(matches[i]) == 0 and add_nonmatching_records:
+    def keys(self) : 
 
-            # >> Fields in ep1 not in ep2 are assigned "null"s for all records:
+        own, other = self.held()
 
-            for field in ep1.flds :
-                if field not in ep2.flds:
-                    ep3.dcty[field].append('null')
+        return list(own.keys()) + [field for field in other if field not in own]
 
-            for field in ep2.flds :
+    def __iter__(self) : return iter(self.keys())
 
-                # >> add the record provided field is neither empty nor "null".
-                
-                # !! This looks like a mistake as originally written, and
-                # !! creates columns of uneven length. [160623]
+    def __contains__(self, field) : 
 
-                #if len(ep2.dcty[field][i]) != 0 and ep2.dcty[field][i] !='null':
-                ep3.dcty[field].append(ep2.dcty[field][i])
+        own, other = self.held()
 
-            # >> Also add the corresponding unassigned matter:        
+        return field in own or field in other
 
-            if len(ep2.umat) > 0 : ep3.umat.append(ep2.umat[i])
-            elif len(ep3.umat) > 0 : ep3.umat.append("null")
+    def __len__(self) : return len(self.keys())
 
-        # >> If there was one match to this record, overwrite nonempty fields
-        # >> that occur in ep2 and ep3, and add the rest:
+    def lengths(self) : 
 
-        elif len(matches[i]) == 1 :
+        own, other = self.held()
 
-            # >> For the record in ep1 matching the current record in ep2 ...
+        lengths = {}
 
-            for matching_record in matches[i] :   
+        for field in self.keys() : 
+            if field in own : lengths[field] = len(own[field])
+            else : lengths[field] = len(other[field])
 
-                # >> loop over fields and update the values of ep1 into ep3:
+        return lengths
 
-                for field in ep2.flds :
+    # :: The rest of the dictionary methods ::::::::::::::::::::::::::::::::::::
 
-                    # >> As long as the field of the current record in ep2 is
-                    # >> not null or empty, update its value in the matching
-                    # >> record in ep3. [safety1]
+    def values(self) : return [self[field] for field in self.keys()]
 
-                    if len(ep2.dcty[field][i]) != 0 and \
-                            ep2.dcty[field][i] !='null':            
-                        ep3.dcty[field][matching_record] = ep2.dcty[field][i][:]
+    def items(self) : return [(field, self[field]) for field in self.keys()]
 
-                # >> Also update the unassigned matter:
-                    
-                if len(ep2.umat) > 0 : 
+    def get(self, field, default = None) : 
 
-                    # >> As long as the current record's unassigned matter
-                    # >> in ep2 is not null or empty, update its value in
-                    # >> the matching record in ep3. [safety2]
+        if field in self : return self[field]
+        else : return default
 
-                    if len(ep2.umat[i]) != 0 and \
-                            ep2.umat[i] != 'null' : 
-                        ep3.umat[matching_record] = ep2.umat[i]
+    def pop(self, field, *default) : 
 
-                # >> If ep2 has no unassigned matter and there is nothing in the
-                # >> ep3 recored, add a null (after adding calls to nullify() at
-                # >> the start of this method, I think this line is redundant):
+        if field not in self and default : return default[0]
 
-                elif len(ep3.umat) > 0 : 
-                    if len(ep3.umat[matching_record]) == 0:
-                           ep3.umat[matching_record] = 'null'
+        column = self[field]
+        del self[field]
 
-        # >> If there was more than one matching record, the matching fields are
-        # >> non-unique.  Warn the user and exit:
+        return column
 
-        elif len(matches[i]) > 1 :
+    def update(self, columns) : 
 
-            print('merge_epdobase.py: matching fields are nonunique.') 
-            print('These records have nonunique identifiers in ep1:')
-            for j in matches[i] : print matches[i][j]
-            print('Exiting...')
-            exit()
+        for field in columns.keys() : self[field] = columns[field]
 
-    return ep3
+    def copy(self) : return dict(self.items())
 
-# ==============================================================================
-#
-# 20100526-1510-mpuboo - Parse Epdex
-#
-# <summary> 
-#
-# Parse epdex format into an epdobase (N.B. all arrays will be m x 1) </summary>
-#
-# <syntax>
-# 
-# epdobase_elements = parse_epdex(string) </syntax>
-#
-# <inputs>
-# 
-# The input is a string that contains the contents of a text file, where each
-# line is separated by a newline character.  This can be read from a file object
-# using the read() method. </inputs>
-#
-# <products>
-# 
-# The output is a list with four elements: a dictionary containing the database,
-# a list of field-names, a list of field descriptions or definitions, and a list
-# of unassigned matter.  This definitions list is of course empty if there was
-# no field-definitions line in the Epdex file. The unassigned matter is likewise
-# empty if there was no unassigned matter in the document. </products>
-#
-# <type>
-# 
-# Function </type>
-#
-# <dependencies>
-# 
-# None </dependencies>
-#
-# <updates> </updates>
-#
-# <notes> </notes>
-#
-# ==============================================================================
+    # >> Copies are plain dictionaries, which don't carry the epdobase:
 
-def parse_epdex(strn) :
+    def __copy__(self) : return self.copy()
 
-    fili = strn.splitlines() # >> Splits string into list of strings at newlines
+    def __deepcopy__(self, memo) : 
 
-    field_line = 0  # >> Keeps track of whether we are reading the field-line
-    epdex_open = 0  # >> Keeps track of whether we are reading epdex matter
+        import copy
 
-    s = {}          # >> This dictionary will store the database
-    field_defs = {} # >> This will store the field definitions
+        return copy.deepcopy(self.copy(), memo)
 
-    # >> Keeps track of whether the epdex has unassigned matter:
+    def __eq__(self, other) : return self.copy() == dict(other.items())
 
-    has_umatter = False 
+    def __ne__(self, other) : return not self == other
 
-    # >> Unassigned matter (if any) is stored in this list:
+    def __repr__(self) : return repr(self.copy())
 
-    umat = []
+# ..............................................................................
 
-# -- Main loop over lines in file ----------------------------------------------
+# >> Returns True if the list of strings "column" is the numeric column "nums"
+# >> written as characterize_column() would write it: i.e., if "nums" is an
+# >> integer array, and no string has a plus sign, leading zeros, whitespace,
+# >> or anything but digits after an optional minus sign. [261018]
 
-    for tline in fili : 
+def canonical_int_strings(column, nums) : 
 
-        sline = tline.strip() # >> Remove leading and trailing whitespace
+    if np.ma.isMaskedArray(nums) or np.asarray(nums).dtype.kind not in 'iu' : 
+        return False
 
-        if sline[0:2] != ';;' :  # >> Ignore commented lines
+    if len(column) == 0 or len(column) != len(nums) : return False
 
-            # >> Quit if you find "++" on a line by itself (otherwise, the
-            # >> program will stop reading at the EOF).
+    raw = np.frombuffer((','.join(column) + ',').encode('utf-8'), 
+                        dtype = np.uint8)
 
-            if len(sline) >= 2 and sline == '++' : break
+    is_digit = (raw >= ord('0')) & (raw <= ord('9'))
+    is_minus = raw == ord('-')
 
-            # >> On finding this, we're inside epdex matter :
+    if not np.all(is_digit | is_minus | (raw == ord(','))) : return False
 
-            if len(sline) > 2 and sline[0:2] == '++' :
-                field_line = 1
-                epdex_open = 1
-    
-            # >> Populate the epdex database :
+    # >> A minus sign may only lead a string, and the first digit must be
+    # >> nonzero, unless it is the only one:
 
-            if epdex_open == 1 and field_line == 0 and sline[0:2] != '**':
-                strs = tline.split('#') # >> Split the string at the '#'s
+    starts = np.append(0, np.flatnonzero(raw == ord(','))[:-1] + 1)
+    neg = is_minus[starts]
 
-                for field in field_list : 
-                    stmp = strs[field_list.index(field)].strip()
+    if np.count_nonzero(is_minus) != np.count_nonzero(neg) : return False
 
-                    # >> Replace newline characters:
+    firsts = starts + neg
+    digit_1 = raw[firsts]
+    digit_2 = np.append(raw, ord(','))[firsts + 1]
 
-                    s[field].append(stmp.replace('|NL|','\n')) 
+    nonzero = (digit_1 >= ord('1')) & (digit_1 <= ord('9'))
+    zero = (digit_1 == ord('0')) & (digit_2 == ord(',')) & ~neg
 
-            # >> Populate the list of fields : 
+    return bool(np.all(nonzero | zero))
 
-            if field_line == 1 :
+# ..............................................................................
 
-                field_line = 0
-                field_list_tmp = sline[2:].split('#')
+# >> Returns the number of decimal places with which characterize_column()
+# >> writes the float column "nums" as the list of strings "column", or None
+# >> if there is none: i.e., if the strings don't all have the same number of
+# >> decimal places, or have any other formatting (leading zeros, plus signs,
+# >> exponents, "nan", etc.), or more digits than a float gives back (15).
+# >> The strings are checked as canonical_int_strings() checks them, and a
+# >> sample of the column is written again, to check the numbers. [261018]
 
-                field_list = []
+def fixed_point_places(column, nums, sample_rows = 1000) : 
 
-                # >> Eliminate whitespace from field names, initialize the
-                # >> dictionary that will hold the database:
+    if np.ma.isMaskedArray(nums) or np.asarray(nums).dtype.kind != 'f' : 
+        return None
 
-                for strn in field_list_tmp : 
+    if len(column) == 0 or len(column) != len(nums) : return None
 
-                    # >> First determine whether the field refers to unassigned
-                    # >> matter:
+    raw = np.frombuffer((','.join(column) + ',').encode('utf-8'), 
+                        dtype = np.uint8)
 
-                    if strn.strip() == 'umat' or strn.strip() == 'Umat' \
-                                       or strn.strip() == 'UMAT':
+    is_digit = (raw >= ord('0')) & (raw <= ord('9'))
+    is_minus = raw == ord('-')
+    is_point = raw == ord('.')
+    is_comma = raw == ord(',')
 
-                       has_umatter = True
-                       umat_key = strn.strip()
+    if not np.all(is_digit | is_minus | is_point | is_comma) : return None
 
-                    if len(strn.strip()) > 0 : 
+    # >> Each string must have one point, with the same number of digits
+    # >> after it: 
 
-                        field_list.append(strn.strip())
-                        s[strn.strip()] = []
-                        field_defs[strn.strip()] = []
+    ends = np.flatnonzero(is_comma)
+    points = np.flatnonzero(is_point)
 
+    if len(points) != len(ends) or \
+            np.any(np.searchsorted(ends, points) != np.arange(len(ends))) : 
+        return None
 
-            # >> Store the field definitions :
+    places = ends - points - 1
 
-            if epdex_open == 1 and field_line == 0 and sline[0:2] == '**':
+    if places[0] < 1 or np.any(places != places[0]) : return None
 
-                strs = sline[2:].split('#')
+    # >> A minus sign may only lead a string, and the first digit must be
+    # >> nonzero, unless it is the only one before the point: 
 
-                for field in field_list : 
-                    field_defs[field] = strs[field_list.index(field)].strip()
+    starts = np.append(0, ends[:-1] + 1)
+    neg = is_minus[starts]
 
-    # >> Now, separate the unassigned matter, if any, into the "umat" list:
+    if np.count_nonzero(is_minus) != np.count_nonzero(neg) : return None
 
-    if has_umatter :
+    firsts = starts + neg
+    digit_1 = raw[firsts]
+    digit_2 = raw[firsts + 1]
 
-        umat = s[umat_key]
+    nonzero = (digit_1 >= ord('1')) & (digit_1 <= ord('9'))
+    zero = (digit_1 == ord('0')) & (digit_2 == ord('.'))
 
-        del s[umat_key]
-        del field_defs[umat_key]
-        field_list.remove(umat_key)
+    if not np.all(nonzero | zero) or np.any(ends - firsts - 1 > 15) : 
+        return None
 
-    # >> Finally, if there are no field definitions, return these as an empty
-    # >> dictionary:
+    places = int(places[0])
 
-    total_def_len = 0
+    if characterize_column(nums[:sample_rows], places) != \
+            list(column[:sample_rows]) : 
+        return None
 
-    for field in field_list: total_def_len += len(field_defs[field])
-    if total_def_len == 0 : field_defs = {}
+    return places
 
-    return [s, field_list, field_defs, umat]
-    
 # ==============================================================================
 #
-# 20100526-1511-mpuboo - Write Epdex
+# 20261018-1445-mpuboo - Column Selection Class
 #
-# </summary>
+# <summary>
 #
-# Writes an epdobase's elements to epdex format (N.B. all arrays must be m x 1)
-# </summary>
+# The records of a column at some indices, not yet copied out of it </summary>
 #
 # <syntax>
 # 
-# strn = write_epdex(dcty, fields, field_defs, umat) </syntax>
+# selection_name = cl_epdoselection(column, rows) </syntax>
 #
-# <inputs>
+# <methods>
 # 
-# The argument "dcty" is a dictionary having the same format as an epdobase dcty
-# variable (see {20100527-1045}). The argument "fields" is equivalent to an
-# epdobase flds variable (a list of field names), and field_defs corresponds to
-# the "defs" variable of an epdobase object (a list of field definitions).  Note
-# that "fields" can be set to an empty string or an empty list, in which case it
-# will be filled using the keys() method.  If "field_defs" is empty, then the
-# fields will not be defined in the epdata file. </inputs>
-#
-# <products>
+# * len(selection)                      = the number of records
+# * take(rows = None)                   = copy the records (or those at "rows"
+#                                         among them) out of the column
+# </methods>
 # 
-# This method writes the contents of the injested epdobase elements to an
-# epdex-formatted string "strn" which can, in turn, be written to a
-# file. </products>
+# <variables>
 #
+# * base = the column (a list or array), shared with whatever else holds it
+# * rows = array of the indices of the selected records (in base)
+# </variables>
+# 
 # <type>
 # 
-# Function </type>
+# Class </type>
 #
-# <updates> </updates>
+# <dependencies>
+# 
+# numpy </dependencies>
 #
 # <notes>
-# 
-# Note that all new-line characters are replaced with |NL| in the epdex file,
-# where each record is allowed to occupy exactly one line. </notes>
+#
+# shrink() replaces the columns of an epdobase by selections, which dcty and
+# ndct copy out when a column is read (see {20100527-1045}).  A selection of
+# a selection is a selection of the same column. </notes>
 #
 # ==============================================================================
 
-def write_epdex(s, fields, field_defs, umat) :
+class cl_epdoselection(object) : 
 
-    strn = '';
+    def __init__(self, column, rows) : 
 
-    strn += '++ '  # >> The obligatory opening "++" on the line of field names
+        self.base = column
+        self.rows = rows
 
-    # >> Use the given field names, or derive them from the dictionary keys if
-    # >> "fields" is empty:
+    def __len__(self) : return len(self.rows)
 
-    if len(fields) == 0 : list_fields = s.keys()  
-    else : list_fields = fields
+    def take(self, rows = None) : 
 
-    # >> If there is umatter, simply add this to the list of field names.
+        if rows is None : return take_rows(self.base, self.rows)
+        else : return take_rows(self.base, self.rows[rows])
 
-    if len(umat) != 0 : 
-        list_fields.append('umat')
-        s['umat'] = umat       # !! This passes the object, not the reference.
+# ..............................................................................
 
-    # >> Build the field-names line, using pound-signs as separators:
+# >> Returns the records of "column" (a list, an array, or a selection) at the
+# >> indices "rows" (an array), in order, as a new list or array.  The records
+# >> of a tracked list (see {20261018-1500}) are a tracked list, changed if it
+# >> was. [261018]
 
-    for field in list_fields : strn += field + ' # '
+def take_rows(column, rows) : 
 
-    strn = strn[0:-3]  # >> strike the last ' # '
-    strn += '\n'
+    if isinstance(column, cl_epdoselection) : return column.take(rows)
 
-    # >> Now print the field definitions (if field_defs is not empty)
-    # >> (replace any newline characters with "|NL|")
+    if isinstance(column, cl_epdolist) : 
+        taken = cl_epdolist([column[i] for i in rows.tolist()])
+        taken.dirt = column.dirt
+        return taken
 
-    if len(field_defs) > 0 : # >> this conditional was added circa 101000
-        strn += '** '
+    if isinstance(column, list) : return [column[i] for i in rows.tolist()]
 
-        # >> Add a definition for unassigned matter, if any:
+    return column[rows]
 
-        if len(umat) != 0 : field_defs['umat'] = 'Unassigned matter'
+# ..............................................................................
 
-        # >> Now print all the field definitions:
+# >> Returns a copy of the dictionary of columns "columns" in which each is
+# >> replaced by a selection of its records at the indices "rows" (an array);
+# >> the indices of columns that were selections already are selected among
+# >> once for all of the columns sharing them. [261018]
 
-        for field in list_fields : 
-            strn += field_defs[field].replace('\n','|NL|') + ' # ' 
+def select_lazily(columns, rows) : 
 
-        strn = strn[0:-3]  # >> strike the last ' # '
-        strn += '\n'
+    selected = {}
+    rows_of = {}   # >> Selected indices, by id of the indices selected among
 
-    # >> Determine the number of records, and add this many lines to the string,
-    # >> printing the whole contents of the epdobase dcty.  All newline
-    # >> characters are replaced with "|NL|" because all contents of each record
-    # >> must lie on the same line.
-    
-    array_len = num_dict_records(s)  
+    for field in columns : 
 
-    for i in range(0,array_len,1) :
+        column = columns[field]
 
-        for field in list_fields : 
-            strn += str(s[field][i]).replace('\n','|NL|') + ' # '
+        if isinstance(column, cl_epdoselection) : 
 
-        strn = strn[0:-3]  # >> strike the last '#'
-        strn += '\n'   
-            
-    # >> Add the closing "++":
+            if id(column.rows) not in rows_of : 
+                rows_of[id(column.rows)] = column.rows[rows]
+
+            selected[field] = cl_epdoselection(column.base, 
+                                               rows_of[id(column.rows)])
+
+        else : selected[field] = cl_epdoselection(column, rows)
+
+    return selected
+
+# ..............................................................................
 
-    strn += '++\n'  
-    return strn
+# >> Returns the array of indices "inds" (a list or array of indices, or of
+# >> flags, True for the records to be kept) as an array of indices. [261018]
+
+def row_indices(inds) : 
+
+    inds = np.asarray(inds)
+
+    if inds.dtype == bool : return np.flatnonzero(inds)
+
+    return inds.astype(np.intp)
 
 # ==============================================================================
 #
-# 20100316-3521-mpuboo - Epdata parser
+# 20261018-1500-mpuboo - Tracked List Class
 #
 # <summary>
-# 
-# Parses an Epdata file: i.e., an Epdox database, with square-ref-tag entries.
-# </summary>
+#
+# A list of strings (a column of dcty) that flags whether it was changed since
+# its field was last numerized </summary>
 #
 # <syntax>
 # 
-# db_dict = parse_epdata(file_path, start_tag) </syntax>
-#
-# <inputs>
-#
-# Input "file_path" is the path to the epdata file, including the filename.  
-# (For the definition of the Epdata format, see {20100123-1918}).  The argument
-# "start_tag" is the value of the tag (the text enclosed in square brackets) 
-# that begins each entry of the database. If this is given as 'first_tag', then 
-# parse_epdata will simply use the first tag that it finds. </inputs>
+# list_name = cl_epdolist(strings) </syntax>
 #
-# <products>
-#
-# The output is a dictionary, whose keys correspond to the tags in each entry
-# of the database.  The first entry the epdata file *must* contain *all* 
-# possible tags.  If any of these are omitted in later entries, then the parser 
-# will assign "null" to those values.  If there is no unassigned matter, the
-# "gathered" unassigned matter will be an empty list. </products>
+# <methods>
 # 
-# <dependencies>
+# All those of a list; each that changes the list sets "dirt", and counts one
+# more change in "vers". </methods>
 # 
-# re, filum </dependencies>
+# <variables>
 #
-# <updated>
+# * dirt = True if the list was changed since it was created, or since its
+#          field was last numerized (when the epdobase resets it to False)
+# * vers = the number of changes made to the list since it was created (which
+#          is never reset, so that indices of the list can tell if they are
+#          still valid; see create_index())
+# </variables>
+# 
+# <type>
+# 
+# Class </type>
 #
-# - Previous updates: 2010.04.06; 2010.05.26; 2010.08.15; 
-# - Added support for double-ampersand brackets. [110530] </updated>
+# <dependencies>
+# 
+# None </dependencies>
 #
 # <notes>
 #
-# Note that the string next to a square reference tag can continue onto the next 
-# line, as in true Epdata files. </notes>
+# The epdobase holds the string columns it reads as tracked lists, so that
+# numerize() can keep the numbers of the fields whose strings are unchanged
+# and drop those of the rest, to be converted again when they are next read
+# from ndct (see {20100527-1045}).  A plain list, as assigned to dcty by the
+# caller, can't be tracked, and is always taken to have changed.  Slicing or
+# copying a tracked list gives a plain list. </notes>
 #
 # ==============================================================================
-        
-def parse_epdata(strn, start_tag) :
-
-    import re, filum
-
-    fili = strn.splitlines()  # >> Split string into a list of lines
-
-    # >> Initially, previous line can't be unassigned matter:
-
-    prev_line_was_umatter = False 
-
-    # >> The pattern of the starting tag (from the beginning of a line):
-
-    if start_tag == 'first_tag':
 
-        # startag_pat = '^\[(.*?)\](.*)' # >> Match the first tag 
-        # !! This line was modified to accommodate leading whitespace [101027]
-        # !! Other matching expressions were modified similarly. [101027]
+class cl_epdolist(list) : 
 
-        startag_pat = '^\s*\[(.*?)\](.*)' # >> Match the first tag
+    def __init__(self, *args) : 
 
-    else :     
-
-        # >> Escape special characters :
+        list.__init__(self, *args)
+        self.dirt = False
+        self.vers = 0
 
-        start_tag = filum.fix_str_for_match(start_tag) 
+    # :: Changing the list :::::::::::::::::::::::::::::::::::::::::::::::::::::
 
-        startag_pat = '^\s*\[(' + start_tag + ')\](.*)'
+    def __setitem__(self, *args) : 
+        self.dirt = True
+        self.vers += 1
+        list.__setitem__(self, *args)
 
-    # >> The pattern of any other tag (from the beginning of a line):
-    
-    normtag_pat = '^\s*\[(.*?)\](.*)' # >> Note: "?" means nongreedy matching.
+    def __delitem__(self, *args) : 
+        self.dirt = True
+        self.vers += 1
+        list.__delitem__(self, *args)
 
-    # >> The pattern of a tag definition:
+    def __iadd__(self, other) : 
+        self.dirt = True
+        self.vers += 1
+        return list.__iadd__(self, other)
 
-    defntag_pat = '^\* \[(.*?)\](.*)'
+    def __imul__(self, n) : 
+        self.dirt = True
+        self.vers += 1
+        return list.__imul__(self, n)
 
-# -- Counting the number of database entries ----------------------------------- 
-    
-    tot_entries = 0
-    
-    for line in fili :
+    def append(self, *args) : 
+        self.dirt = True
+        self.vers += 1
+        list.append(self, *args)
 
-        line  = line.strip() # >> wipes leading/trailing whitespace [100926]
+    def extend(self, *args) : 
+        self.dirt = True
+        self.vers += 1
+        list.extend(self, *args)
 
-        patmatch = re.search(startag_pat,line) 
+    def insert(self, *args) : 
+        self.dirt = True
+        self.vers += 1
+        list.insert(self, *args)
 
-        if patmatch : 
+    def pop(self, *args) : 
+        self.dirt = True
+        self.vers += 1
+        return list.pop(self, *args)
 
-            tot_entries += 1 
+    def remove(self, *args) : 
+        self.dirt = True
+        self.vers += 1
+        list.remove(self, *args)
 
-            if tot_entries == 1 :
+    def reverse(self) : 
+        self.dirt = True
+        self.vers += 1
+        list.reverse(self)
 
-                start_tag   = patmatch.group(1)
-                startag_pat = '^\s*\[(' + start_tag + ')\](.*)'
+    def sort(self, *args, **kwargs) : 
+        self.dirt = True
+        self.vers += 1
+        list.sort(self, *args, **kwargs)
 
-# -- Parsing the file ----------------------------------------------------------
-        
-    item_num    = -1    # >> This will be used for counting the database entries
-    dubamp_mode = False # >> Keep track of whether in a double-ampersand bracket
-    
-    # These switches are (like dubamp_mode) used to keep track of state:
+    def clear(self) : 
+        self.dirt = True
+        self.vers += 1
+        del self[:]
 
-    prev_line_had_content = False
-    prev_line_was_umatter = False
-    
-    db = {} # >> This will store the database
+# ..............................................................................
 
-    tag_list = [] # >> Will be used to keep order of tags (in order of apprnce)
-    tag_defs = {} # >> Will be used to hold tag definitions (if any are found)
+# >> Returns a copy of the dictionary of columns "columns" in which each list
+# >> is a tracked list (see above), unchanged. [261018]
 
-    # >> Will be used to store the "unassigned matter": data not associated with
-    # >> a specific field:
+def tracked_columns(columns) : 
 
-    umat = [] 
+    tracked = {}
 
-    # >> Main loop
+    for field in columns : 
 
-    for line in fili :
+        if type(columns[field]) is list : 
+            tracked[field] = cl_epdolist(columns[field])
+        else : tracked[field] = columns[field]
 
-        wline = line        # >> keeps leading/trailing whitespace [101028]           
-        line = line.strip() # >> Ignore leading and trailing whitespace [100926]
+    return tracked
 
-        patmatch = re.search(startag_pat,line,re.M)  # >> Try the start tag
-       
-        if patmatch : 
-            item_num += 1 # >> Count up when you match the start_tag 
+# ..............................................................................
 
-        patmatch = re.search(defntag_pat,line,re.M) # >> Try matching a tag def
+# >> Returns True unless "column" (a list of strings, or a selection of one) is
+# >> a tracked list that wasn't changed since its field was numerized. 
+# >> [261018]
 
-        if patmatch : # >> If we've matched the pattern of a tag defintion
+def strings_changed(column) : 
 
-            strn = patmatch.group(2)
-            tag_defs[patmatch.group(1)] = strn.strip()
-           
-        # >> Now try matching *any* tag, and act on the match only if we're not
-        # >> inside of an ampersand bracket.
+    if isinstance(column, cl_epdoselection) : column = column.base
 
-        patmatch = re.search(normtag_pat,line,re.M) # >> Try matching any tag  
-                     
-        if patmatch and not dubamp_mode: 
-            # >> ... tag is matched and we're not in dubamp brackets...
-                    
-            # >> First remove the bounding whitespaces from the tag value:
+    return not isinstance(column, cl_epdolist) or column.dirt
 
-            strn = patmatch.group(1)
-            tag_name = strn.strip()
-            
-            # >> Note it in the running list that maintains the tag order:
+# ..............................................................................
 
-            if tag_name not in tag_list : tag_list.append(tag_name)
+# >> Returns the numeric column "column" with "N" null records appended, as
+# >> numerize_column() would convert it with "null" strings appended: NaN, in
+# >> a float column (integers being converted to float).  Masked arrays, and
+# >> integer columns if "keep_ints", are extended with masked records instead.
+# >> Columns of strings are extended with "null". [261018]
 
-            # >> If this is the very first tag, create a list for the corres-
-            # >> ponding dictionary key with the total number of entries counted
-            # >> earlier.  Fill the entries with numbers.  Later, we will 
-            # >> replace all integer values with the string "null" (i.e., the 
-            # >> entry was not filled).  
+def null_records_appended(column, N, keep_ints = False) : 
 
-            if item_num == 0 : db[tag_name] = range(0,tot_entries,1)
-        
-            # >> Search the string next to the tag for a double-ampersand, and
-            # >> toggle the double-ampersand mode accordingly (i.e., if there is
-            # >> one, then we're in a double-ampersand bracket):
+    if N == 0 : return column
 
-            strn = str(patmatch.group(2))
-            strn,dubamp_mode = dubamp(strn,dubamp_mode)
-    
-            # >> Now store the string next to the tag in the dictionary:
-            
-            db[tag_name][item_num] = strn.strip()
-                
-            prevtag = tag_name
-            
-            # >> This will tell the next iteration that there was
-            # >> field-associated content on this line (assigned matter):
-            
-            prev_line_had_content = True  
-        
-            # >> This will tell the next iteration that the this line was not
-            # >> made up of unassigned matter:
+    kind = np.asarray(column).dtype.kind
 
-            prev_line_was_umatter = False
+    if np.ma.isMaskedArray(column) or (keep_ints and kind in 'iu') : 
+        nulls = np.ma.masked_all(N, dtype = column.dtype)
+        return np.ma.concatenate([np.ma.masked_array(column), nulls])
 
-        elif item_num > -1: 
-            
-            # >> If no match, content is maybe continued from previous line.
-            # >> But we won't even try this until the first match.
-                
-            # >> See if there's anything on the current line: 
-                     
-            length_of_current_line = len(line)
+    if kind in 'fc' : 
+        nulls = np.full(N, np.nan, dtype = column.dtype)
+        return np.concatenate([column, nulls])
 
-            # >> Determine whether current line is a partition / divider:
-                        
-            if length_of_current_line > 10 :
-                if line[0:5] == '-----' or line[0:5] == ':::::' or \
-                   line[0:5] == '.....' or line[0:5] == '=====' :
-                   
-                   is_partition = True
-                     
-                else : is_partition = False
-                
-            else : is_partition = False     
+    if kind in 'iub' : 
+        return np.concatenate([np.float64(column), np.full(N, np.nan)])
 
-            # >> Create a list for the unassigned matter with the total number
-            # >> of entries counted earlier.  Fill the entries with numbers.
-            # >> Later, we will replace all integer values with the string
-            # >> "null" (i.e., the entry was not filled).
-            
-            if len(umat) == 0: umat = range(0,tot_entries,1)
-                                                          
-            # >> If the previous line had content and the current one isn't
-            # >> empty and not a partition, then append it to the same
-            # >> dictionary entry as we did the previous line:
-        
-            if prev_line_had_content and length_of_current_line > 0 and \
-                not is_partition and not prev_line_was_umatter:
+    return np.concatenate([column, np.array(['null'] * N)])
 
-                # >> Clean the line of double-ampersands and toggle the
-                # >> double-ampersand mode (i.e., double-ampersand bracket)
-                # >> accordingly: 
+# ==============================================================================
+#
+# 20261018-1300-mpuboo - Epdices Class
+#
+# <summary>
+#
+# A sequence of the epdobases held by the records of a field of an epdobase,
+# each parsed on first access </summary>
+#
+# <syntax>
+# 
+# epdices_name = cl_epdices(ep, field_name = 'umat', epdoc_type = 'dex', 
+#                           cache_size = 128) </syntax>
+#
+# <methods>
+# 
+# * len(epdices)                        = the number of records
+# * epdices[i]                          = the epdobase of record i
+# * epdices[i:j]                        = the epdices of records i to j-1
+# * for ep in epdices : ...             = the epdobases of all records
+# </methods>
+# 
+# <variables>
+#
+# * prnt = the epdobase whose records are parsed
+# * inds = the indices of the records (in prnt) that this sequence holds
+# </variables>
+# 
+# <inputs>
+# 
+# Input "ep" is the epdobase, "field_name" is the field whose records are
+# formatted as Epdex or Epdata ('umat' for unassigned matter), and
+# "epdoc_type" is 'dex' (Epdex) or 'dat' (Epdata).  Kwarg "cache_size" is the
+# number of parsed records kept. </inputs>
+#
+# <products>
+# 
+# A sequence whose items are the epdobase objects that cl_epdobase's
+# get_epdices() used to return in a list: the epdobase parsed from each record,
+# with the values of all fields of that record as its meta-data. </products>
+#
+# <type>
+# 
+# Class </type>
+#
+# <dependencies>
+# 
+# collections </dependencies>
+#
+# <notes>
+#
+# A record is parsed when it is first accessed, and the parsed records are
+# kept in a cache of at most "cache_size" of them, from which the least
+# recently used is dropped.  Slices share the cache of the sequence they were
+# taken from, and parse nothing until accessed, so a catalog of thousands of
+# scan sessions can be browsed without parsing more than is looked at.  Since
+# the records are read on access, changes to the epdobase's records show in
+# records not yet cached. 
+#
+# get_epdices() used to parse the unassigned matter whatever "field_name" was,
+# and called a parser that didn't exist for Epdata. </notes>
+#
+# ==============================================================================
 
-                line,dubamp_mode = dubamp(line, dubamp_mode) 
+class cl_epdices : 
 
-                # >> Add it to the database
+    def __init__(self, ep, field_name = 'umat', epdoc_type = 'dex', 
+                 cache_size = 128, inds = None, cache = None) : 
 
-                db[prevtag][item_num] += '\n' + line
+        import collections
 
-            # >> If the previous line had no content and the current one isn't
-            # >> empty and not a partition but we are inside of a
-            # >> double-ampersand bracket, then append it to the same dictionary
-            # >> entry as we did the previous line:
+        self.prnt = ep
+        self.fnam = field_name
+        self.etyp = epdoc_type
+        self.csiz = cache_size
 
-            elif not prev_line_had_content and length_of_current_line > 0 \
-                    and not is_partition and not prev_line_was_umatter and \
-                    dubamp_mode :
+        if inds is None : inds = range(0,ep.len(),1)
+        if cache is None : cache = collections.OrderedDict()
 
-                # >> Clean the line of double-ampersands and toggle the
-                # >> double-ampersand mode (i.e., double-ampersand bracket)
-                # >> accordingly: 
+        self.inds = inds
+        self.cche = cache   # >> Parsed records, by index, least recent first
 
-                line,dubamp_mode = dubamp(line, dubamp_mode) 
+    # :: Number of records :::::::::::::::::::::::::::::::::::::::::::::::::::::
 
-                # >> Add it to the database:
+    def __len__(self) : return len(self.inds)
 
-                db[prevtag][item_num] += '\n\n' + line
-                        
-            # >> If the previous line had no content and the current one isn't
-            # >> empty and not a partition and we are not in a double ampersand
-            # >> bracket, then add this to the generic "unassigned matter"
-            # >> (umat) of the current record: matter not associated with any
-            # >> specific field.  Also tell next loop that we had no
-            # >> field-associated content on this iteration:
-        
-            elif not prev_line_had_content and length_of_current_line > 0 \
-                    and not is_partition and not dubamp_mode and not \
-                    prev_line_was_umatter:
+    # :: Records, or slices of them ::::::::::::::::::::::::::::::::::::::::::::
 
-                # >> Recall that by default, unfilled unassigned matter is an
-                # >> integer, and so we have to set it equal to an empty
-                # >> string to get started.
+    def __getitem__(self, key) : 
 
-                if isinstance(umat[item_num], type(1)) : umat[item_num] = ''
+        if isinstance(key, slice) : 
+            return cl_epdices(self.prnt, self.fnam, self.etyp, self.csiz, 
+                              self.inds[key], self.cche)
 
-                umat[item_num] += '\n' + wline # >> w/leading & trailing wspace
-                prev_line_had_content = False
+        return self.parse_record(self.inds[key])
 
-                # >> This will tell the next loop that we're reading unassigned
-                # >> matter:
+    def __iter__(self) : 
 
-                prev_line_was_umatter = True   
+        for i in self.inds : yield self.parse_record(i)
 
-            # >> Previous line was unassigned matter and current line is not a
-            # >> partition, and so we add it to the unassigned matter:    
+    # :: Parse a record (or take it from the cache) ::::::::::::::::::::::::::::
 
-            elif not is_partition and prev_line_was_umatter : 
+    def parse_record(self, i) : 
 
-                umat[item_num] += '\n' + wline # >> w/leading & trailing wspace
+        if i in self.cche : 
 
-            # >> Otherwise, tell next iteration we had no field-associated
-            # >> content this time:
+            # >> Move the record to the most recent end of the cache:
 
-            else: prev_line_had_content = False                                
-                                
-    # >> This loop assigns to "null" all the fields that were not filled in:
-    # >> i.e., all fields that are still integers, or made up entirely of 
-    # >> whitespace characters, or empty strings.  This is used to fill up the
-    # >> database (the dictionary) as well as the unassigned matter (umat).
-    # >> But if umat has *only* nulls, it is set equal to an empty list.
-    
-    for tag in db :         
-            
-        for i in range(0,tot_entries,1) :
-            
-            str_ver = str(db[tag][i])
-            
-            if isinstance(db[tag][i],int) or str_ver.isspace() or \
-                (len(str_ver) == 0) :
-                
-                db[tag][i] = 'null'
+            ep = self.cche.pop(i)
+            self.cche[i] = ep
 
+            return ep
 
-    # >> Repeat for the unassigned matter & strip leading/trailing whitespace:
+        if self.fnam == 'umat' : strn = self.prnt.umat[i]
+        else : strn = self.prnt.dcty[self.fnam][i]
 
-    if len(umat) > 0 : 
+        ep = cl_epdobase()            # >> create an Epdobase object
 
-        for i in range(0,tot_entries,1) : 
+        # >> Parse the record:
 
-            if isinstance(umat[i],int) or umat[i].strip().isspace() or \
-                    len(umat[i]) == 0 : umat[i] = 'null'
+        if   self.etyp == 'dex' : parsed = parse_epdex(strn)
+        elif self.etyp == 'dat' : parsed = parse_epdata(strn, 'first_tag')
 
-            umat[i] = umat[i].strip()  # >> wipe leading/trailing whitespace
+        # >> Populate the corresponding Epdobase:
 
-    # >> If umat has only null values, set it equal to an empty list:
+        ep.dcty = parsed[0]; ep.flds = parsed[1] 
+        ep.defs = parsed[2]; ep.umat = parsed[3]
 
-        if umat.count('null') == len(umat) : umat = []
+        # >> Add the field values for the current record as meta-data for this
+        # >> Epdobase object:
 
-    return [db, tag_list, tag_defs, umat]
+        ep.meta = {}
 
-# ..............................................................................
+        for field in self.prnt.flds : ep.meta[field] = self.prnt.dcty[field][i]
 
-# >> Simple method for striking double-ampersands and indicating to the
-# >> interpreter that we are currently reading a double-ampersand bracket.
+        # >> Cache it, dropping the least recently used record if the cache is
+        # >> full:
 
-def dubamp(line, dubamp_mode) : 
+        self.cche[i] = ep
 
-    if '&&' in line:
+        while len(self.cche) > self.csiz : self.cche.popitem(last = False)
 
-        line = line.replace('&&','').strip()
-        dubamp_mode = True - dubamp_mode
+        return ep
 
-    return line,dubamp_mode
-                        
 # ==============================================================================
 #
-# 20100526-1824-mpuboo - Write Epdata
-# 
+# 20261018-1330-mpuboo - Epdobase View Class
+#
 # <summary>
 #
-# Writes an epdobase to epdata format (N.B. all arrays must be m x 1) </summary>
+# A selection of the records of an epdobase, held as their indices </summary>
 #
 # <syntax>
 # 
-# strn = write_epdata(dcty, fields, field_defs, umat) </syntax>
+# view_name = cl_epdoview(ep, rows) 
+# view_name = ep.filter(preds) 
+# view_name = ep.select(inds) </syntax>
 #
+# <methods>
+# 
+# * len()                               = count the number of records
+# * view[field]                         = numeric column of the selected records
+# * where(preds)                        = positions (in view) satisfying preds
+# * filter(preds)                       = view of the records satisfying preds
+# * select(inds)                        = view of records at "inds" (in view)
+# * compact()                           = copy the records into a new epdobase
+# </methods>
+# 
+# <variables>
+#
+# * prnt = the epdobase whose records are selected
+# * rows = array of the indices of the selected records (in prnt)
+# </variables>
+# 
 # <inputs>
 # 
-# The argument "dcty" is a dictionary having the same format as an epdobase dcty
-# variable (see {20100527-1045}). The argument "fields" is equivalent to an
-# epdobase flds variable (a list of field names), and field_defs corresponds to
-# the "defs" variable of an epdobase object (a list of field definitions).  Note
-# that "fields" can be set to an empty string or an empty list, in which case it
-# will be filled using the keys() method.  If "field_defs" is empty, then the
-# fields will not be defined in the epdata file. </inputs>
+# Input "ep" is the epdobase, and "rows" is a list or array of the indices of
+# its records that are selected.  Input "preds" (of where() and filter(), both
+# here and in cl_epdobase) is a dictionary whose keys are numerized fields,
+# and whose values are predicates on the records of each field, all of which
+# must be satisfied: 
+#
+# * (lo, hi)                = lo <= value <= hi (None for no limit)
+# * (op, val)               = value op val, with op in '<', '<=', '>', '>=', 
+#                             '==' or '!='
+# * [pred1, pred2, ...]     = all of the above predicates
+#
+# For instance, {'z' : ('<', 200.0), 'x' : [('>', -1000), ('<', 1000)]} 
+# </inputs>
 #
 # <products>
 # 
-# This method writes the contents of the injested epdobase elements to an
-# epdata-formatted string "strn" which can, in turn, be written to a
-# file. </products>
+# view[field] returns a new array of the field's numeric records, selected; 
+# compact() returns a new epdobase holding only the selected records, as 
+# shrink() would leave it. </products>
 #
 # <type>
 # 
-# Function </type>
+# Class </type>
 #
-# <updates> 
+# <dependencies>
 # 
-# - Added support for double-ampersand brackets. [110530] 
-# - Added support for continguous-text blocks. [110530] </updates>
+# numpy </dependencies>
 #
-# <notes> </notes>
+# <notes>
+#
+# Selecting records used to mean building a mask by hand from whole-column
+# expressions, e.g., np.nonzero((z < 2)*(x < 10)*(x > -10))[0], each of which
+# makes an array of all records, and then indexing every column.  Predicates
+# are instead evaluated one block of records at a time into a single mask, so
+# no temporary array is larger than a block; the view then holds only the
+# indices, and a column is only selected when it is asked for.  Null records
+# (NaN or masked) never satisfy a predicate.
+#
+# The view reads the epdobase's records on access, so it should not be used 
+# after records of the epdobase are added, removed, or reordered. </notes>
 #
 # ==============================================================================
 
-def write_epdata(s, fields, field_defs, umat) :
+class cl_epdoview : 
 
-    strn = ''
+    def __init__(self, ep, rows) : 
 
-    # >> Grab fields from dictionary keys if necessary:
-    
-    if len(fields) == 0 : list_fields = s.keys()
-    else : list_fields = fields
+        self.prnt = ep
+        self.rows = np.asarray(rows, dtype = np.intp)
 
-    array_len = num_dict_records(s)    
+    # :: Number of records :::::::::::::::::::::::::::::::::::::::::::::::::::::
 
-    # >> If there are field definitions, print them first:
+    def len(self) : return len(self.rows)
 
-    if len(field_defs) == len(fields) :
-        for field in fields:
-            strn += '* [' + field + '] ' + field_defs[field] + '\n'
+    def __len__(self) : return len(self.rows)
 
-        # >> Then add a partition:
+    # :: Numeric records of a field ::::::::::::::::::::::::::::::::::::::::::::
 
-        strn += '\n'
-        for i in range(0,80,1) : strn += '-'
-        strn += '\n'
+    def __getitem__(self, field) : 
 
-    # >> Main loop for printing dictionary contents:
+        # >> A column that the epdobase was shrunk to a selection of is
+        # >> selected from just once:
 
-    for i in range(0, array_len, 1) :
+        column = self.prnt.nums.get(field)
+        if column is None : column = self.prnt.ndct[field]
 
-        strn += '\n'
+        return take_rows(column, self.rows)
 
-        for field in list_fields : 
+    # :: Select records by the values of numeric fields ::::::::::::::::::::::::
 
-            # >> Print field and its value having double-ampersand brackets
-            # >> (indicated by two newline characters in a row): [110530]
+    def where(self, preds) : 
 
-            if '\n\n' in str(s[field][i]) :
-                strn += '\n[' + str(field) + '] && '+str(s[field][i]) +' &&\n\n'
+        return np.nonzero(predicate_mask(self.prnt.ndct, preds, self.rows))[0]
 
-            # >> Print field and its value if has line continuation (i.e., a
-            # >> contiguous text block, indicated any newline characters):
-            # >> [110530]
+    def filter(self, preds) : 
 
-            elif '\n' in str(s[field][i]) :
-                strn += '\n[' + str(field) + '] ' + str(s[field][i]) + '\n\n'
+        return cl_epdoview(self.prnt, self.rows[self.where(preds)])
 
-            # >> Print the normal, single-line field and its value:
-                
-            else :
-                strn += '[' + str(field) + '] ' + str(s[field][i]) + '\n'
+    # :: Select records by their indices :::::::::::::::::::::::::::::::::::::::
 
-        # >> ... an ampersand-bracket field or continuing field already got two
-        # >> newline characters appended to the end:
+    def select(self, inds) : 
 
-        if '\n' not in str(s[field][i]) : strn += '\n' 
+        return cl_epdoview(self.prnt, self.rows[row_indices(inds)])
 
-        # >> Also print unassigned matter:
+    # :: Copy the selected records into a new epdobase :::::::::::::::::::::::::
 
-        if len(umat) > 0 :
-            if umat[i] != 'null' : 
-                strn += umat[i]
+    def compact(self) : 
 
-                if umat[i][-2:] == '\n\n' : pass
-                elif umat[i][-1] == '\n' : strn += '\n'
-                else: strn += '\n\n'
+        ep = cl_epdobase()
 
-        for i in range(0,80,1) : strn += '-'
-        strn += '\n'
+        ep.flds = list(self.prnt.flds)
+        ep.defs = dict(self.prnt.defs)
+        ep.meta = dict(self.prnt.meta)
+        ep.pres = dict(self.prnt.pres)
+        ep.schm = dict(self.prnt.schm)
 
-    return strn
+        # >> Unassigned matter is selected as in shrink(), and otherwise 
+        # >> copied, so that the new epdobase doesn't share it:
+
+        if len(self.prnt.umat) == self.prnt.len() : 
+            ep.umat = [self.prnt.umat[i] for i in self.rows.tolist()]
+        else : ep.umat = list(self.prnt.umat)
+
+        for fld in self.prnt.strs : 
+            ep.strs[fld] = take_rows(self.prnt.strs[fld], self.rows)
+
+        for fld in self.prnt.nums : 
+            ep.nums[fld] = take_rows(self.prnt.nums[fld], self.rows)
+
+        return ep
+
+# ..............................................................................
+
+# >> Returns an array of flags, True for the records of the numeric dictionary
+# >> "ndct" that satisfy all of the predicates "preds" (see {20261018-1330}).
+# >> If "rows" is given, only those records are evaluated, and the flags are
+# >> for them, in order.  The predicates are evaluated "block_rows" records at
+# >> a time, in place, into the block of flags. [261018]
+
+def predicate_mask(ndct, preds, rows = None, block_rows = 65536) : 
+
+    conds = []
+
+    for field in preds : 
+        for op, val in predicate_conditions(preds[field]) : 
+            conds.append((field, op, val))
+
+    if rows is not None : nrecs = len(rows)
+    elif conds : nrecs = len(ndct[conds[0][0]])
+    else : nrecs = num_dict_records(ndct)
+
+    flags = np.ones(nrecs, dtype = bool)
+    temp = np.empty(min(nrecs, block_rows), dtype = bool)
+
+    for start in range(0,nrecs,block_rows) : 
+
+        stop = min(start + block_rows, nrecs)
+        part = flags[start:stop]
+        tmp = temp[:stop-start]
+
+        for field, op, val in conds : 
+
+            if rows is None : column = ndct[field][start:stop]
+            else : column = ndct[field][rows[start:stop]]
+
+            if np.ma.isMaskedArray(column) : 
+                part &= ~np.ma.getmaskarray(column)
+                column = column.data
+
+            PREDICATE_UFUNCS[op](column, val, out = tmp)
+            part &= tmp
+
+            # >> NaN is unequal to everything, but is null:
+
+            if op == '!=' and column.dtype.kind in 'fc' : 
+                np.isnan(column, out = tmp)
+                part &= ~tmp
+
+            if not part.any() : break
+
+    return flags
+
+PREDICATE_UFUNCS = {'<' : np.less, '<=' : np.less_equal, 
+                    '>' : np.greater, '>=' : np.greater_equal,
+                    '==' : np.equal, '!=' : np.not_equal}
+
+# ..............................................................................
+
+# >> Returns the list of comparisons (op, val) that the predicate "pred" on a
+# >> field amounts to (see {20261018-1330}). [261018]
+
+def predicate_conditions(pred) : 
+
+    if isinstance(pred, list) : 
+
+        conds = []
+
+        for sub_pred in pred : conds += predicate_conditions(sub_pred)
+
+        return conds
+
+    if len(pred) != 2 : 
+        raise ValueError('Epdobase: a predicate must be (lo, hi) or (op, val).')
+
+    if isinstance(pred[0], str) : 
+
+        if pred[0] not in PREDICATE_UFUNCS : 
+            raise ValueError('Epdobase: unknown comparison "' + pred[0] + '".')
+
+        return [tuple(pred)]
+
+    lo, hi = pred
+    conds = []
+
+    if lo is not None : conds.append(('>=', lo))
+    if hi is not None : conds.append(('<=', hi))
+
+    return conds
 
-    
 # ==============================================================================
 #
-# 20100526-1826-mpuboo - Get number of records
+# 20261018-1400-mpuboo - Epdobase Groups Class
 #
 # <summary>
 #
-# Returns length of epdobase dictionary or -1 if field lengths differ.</summary>
+# The records of an epdobase, grouped by their values of some fields, for
+# aggregation </summary>
 #
 # <syntax>
 # 
-# array_len = num_dict_records(dictry) </syntax>
+# groups_name = cl_epdogroups(ep, fields) 
+# groups_name = ep.group_by(fields) 
+# ep_out = groups_name.agg(aggs) </syntax>
 #
+# <methods>
+# 
+# * len()                               = count the number of groups
+# * agg(aggs)                           = aggregate fields over each group
+# </methods>
+# 
+# <variables>
+#
+# * prnt = the epdobase whose records are grouped
+# * flds = the fields whose values the records are grouped by
+# * gids = array of the group of each record (numbered in sorted order)
+# * ordr = array of the indices of the records, sorted by group
+# * bnds = array of the positions in ordr where each group starts, and the end
+# </variables>
+# 
 # <inputs>
 # 
-# Sole input, dictry, has the format of an epdobase dictionary (i.e., the "dcty"
-# variable in an epdobase object). </inputs>
+# Input "ep" is the epdobase, and "fields" is the field, or list of fields,
+# whose values the records are grouped by: their numerized values (in ndct)
+# if they are numeric, or else their string values (in dcty).  Input "aggs"
+# of agg() is a dictionary whose keys are numerized fields, and whose values
+# are the aggregates, or lists of them, to be computed for each field over
+# each group: 'count' (of values that are not null), 'sum', 'min', 'max',
+# 'mean', 'std' (standard deviation, of the population) or 'median'.  For
+# instance, {'z' : ['count', 'mean', 'std'], 'intensity' : 'max'}. </inputs>
 #
 # <products>
 # 
-# Output is just an integer equal to the number of records in the dictionary
-# field: i.e., the number of elements in the single list assigned to each
-# dictionary key. </products>
+# agg() returns a new epdobase with one record per group, in sorted order of
+# the grouping fields.  Its fields are the grouping fields, then one field per
+# aggregate, named by the field and the aggregate, e.g., "z_mean".  Only its
+# ndct is filled (see characterize() to write it as Epdex, Epdata or CSV). 
+# </products>
 #
 # <type>
 # 
-# Function </type>
+# Class </type>
 #
-# <updates> </updates>
+# <dependencies>
+# 
+# numpy </dependencies>
 #
-# <notes> </notes>
+# <notes>
+#
+# Statistics per group used to be computed by looping over the groups, with
+# matching_records() for each.  The records are instead sorted by group once,
+# when grouped, and each aggregate is computed for all groups at once, with
+# np.bincount() and the ufuncs' reduceat().  Null records (NaN or masked) are
+# left out of every aggregate; a group with no values of a field has a count
+# of 0, and NaN for its other aggregates. </notes>
 #
 # ==============================================================================
 
-def num_dict_records(s) :
+class cl_epdogroups : 
 
-    unequal_lengths = False
-    list_fields = s.keys()  # >> Get all dictionary keys
+    def __init__(self, ep, fields) : 
 
-    if len(list_fields) == 0 : array_len = 0 
-    else: array_len = len(s[list_fields[0]]) # >> Number of records of 1st field
+        if not isinstance(fields, list) : fields = [fields]
 
-    # >> Confirm that all fields have same length (otherwise return -1)
+        self.prnt = ep
+        self.flds = fields
 
-    for field in list_fields : 
-        if len(s[field]) != array_len :
-             unequal_lengths = True
-             print('! Warning: the epdobase columns have ' + \
-                       'an unequal number of records.\n\n')
-             print(field,len(s[field]))
-             
-    if unequal_lengths: return -1
-    else: return array_len
+        # >> Number the distinct values of each field, sort the records by 
+        # >> these numbers (np.lexsort sorts by its last key first), and start
+        # >> a group wherever any of them changes:
+
+        codes = [np.unique(group_key_column(ep, fld), return_inverse = True)[1]
+                 .reshape(-1) for fld in fields]
+
+        self.ordr = np.lexsort(codes[::-1])
+
+        nrecs = len(self.ordr)
+        starts = np.zeros(nrecs, dtype = bool)
+        starts[:1] = True
+
+        for code in codes : 
+            code = code[self.ordr]
+            starts[1:] |= code[1:] != code[:-1]
+
+        self.bnds = np.append(np.flatnonzero(starts), nrecs)
+
+        self.gids = np.empty(nrecs, dtype = np.intp)
+        self.gids[self.ordr] = np.cumsum(starts) - 1
+
+    # :: Number of groups ::::::::::::::::::::::::::::::::::::::::::::::::::::::
+
+    def len(self) : return len(self.bnds) - 1
+
+    def __len__(self) : return len(self.bnds) - 1
+
+    # :: Aggregate fields over each group ::::::::::::::::::::::::::::::::::::::
+
+    def agg(self, aggs) : 
+
+        ep = cl_epdobase()
+
+        # >> The grouping fields, valued as the first record of each group:
+
+        firsts = self.ordr[self.bnds[:-1]]
+
+        for fld in self.flds : 
+
+            ep.flds.append(fld)
+            ep.ndct[fld] = group_key_column(self.prnt, fld)[firsts]
+            if fld in self.prnt.defs : ep.defs[fld] = self.prnt.defs[fld]
+
+        # >> The aggregates of each field:
+
+        for fld in aggs : 
+
+            fld_aggs = aggs[fld]
+
+            if not isinstance(fld_aggs, list) : fld_aggs = [fld_aggs]
+
+            vals, valid = group_value_column(self.prnt, fld)
+
+            for agg_name in fld_aggs : 
+
+                name = fld + '_' + agg_name
+
+                ep.flds.append(name)
+                ep.ndct[name] = group_aggregate(vals, valid, self, agg_name)
+                ep.defs[name] = agg_name + ' of ' + fld
+
+        return ep
+
+# ..............................................................................
+
+# >> Returns the column of the field "fld" of the epdobase "ep" that its
+# >> records are grouped by: ndct's column, if it is numeric (masked records
+# >> taking the fill value), or else dcty's, as an array. [261018]
+
+def group_key_column(ep, fld) : 
+
+    column = ep.ndct.get(fld)
+
+    if column is None or np.asarray(column).dtype.kind not in 'biuf' : 
+        return np.array(ep.dcty[fld])
+
+    if np.ma.isMaskedArray(column) : return column.filled()
+
+    return np.asarray(column)
+
+# ..............................................................................
+
+# >> Returns the numerized column of the field "fld" of the epdobase "ep" as
+# >> floats, and an array of flags, True for the records that are not null.
+# >> [261018]
+
+def group_value_column(ep, fld) : 
+
+    column = ep.ndct[fld]
+
+    if np.asarray(column).dtype.kind not in 'biuf' : 
+        raise ValueError('Epdobase: field ' + fld + ' is not numeric.')
+
+    vals = np.ma.getdata(column).astype(float)
+    valid = ~np.isnan(vals)
+
+    if np.ma.isMaskedArray(column) : valid &= ~np.ma.getmaskarray(column)
+
+    return vals, valid
+
+# ..............................................................................
+
+# >> Returns the aggregate "agg_name" of the values "vals" (those flagged in
+# >> "valid") over each of the groups "groups" (see {20261018-1400}).
+# >> [261018]
+
+def group_aggregate(vals, valid, groups, agg_name) : 
+
+    ngroups = groups.len()
+
+    counts = np.bincount(groups.gids, weights = valid, minlength = ngroups)
+
+    if agg_name == 'count' : return counts.astype(np.int64)
+
+    if ngroups == 0 : return np.zeros(0)
+
+    vals = np.where(valid, vals, 0.0)
+
+    sums = np.bincount(groups.gids, weights = vals, minlength = ngroups)
+
+    # >> Nothing is divided by the counts of groups without values:
+
+    empty = counts == 0
+    divisors = np.where(empty, 1.0, counts)
+
+    if agg_name == 'sum' : result = sums
+
+    elif agg_name == 'mean' : result = sums / divisors
+
+    elif agg_name == 'std' : 
+        devs = (vals - (sums / divisors)[groups.gids]) ** 2
+        devs[~valid] = 0.0
+        result = np.sqrt(np.bincount(groups.gids, weights = devs, 
+                                     minlength = ngroups) / divisors)
+
+    # >> Null records are never the smallest or largest:
+
+    elif agg_name == 'min' : 
+        vals[~valid] = np.inf
+        result = np.minimum.reduceat(vals[groups.ordr], groups.bnds[:-1])
+
+    elif agg_name == 'max' : 
+        vals[~valid] = -np.inf
+        result = np.maximum.reduceat(vals[groups.ordr], groups.bnds[:-1])
+
+    # >> Within each group, the values are sorted, the null ones last, and the
+    # >> middle one or two of the others are taken:
+
+    elif agg_name == 'median' : 
+        vals[~valid] = np.inf
+        order = np.lexsort((vals, groups.gids))
+        starts = groups.bnds[:-1]
+        counts_int = np.where(empty, 1, counts.astype(np.int64))
+        lo = vals[order[starts + (counts_int - 1) // 2]]
+        hi = vals[order[starts + counts_int // 2]]
+        result = (lo + hi) / 2.0
+
+    else : 
+        raise ValueError('Epdobase: unknown aggregate "' + agg_name + '".')
+
+    if agg_name != 'sum' : result[empty] = np.nan
+
+    return result
 
 # ==============================================================================
 #
-# 20100704-2216-mpuboo - Get matching records
-# 
+# 20261018-1230-mpuboo - Sniff the format of a file
+#
 # <summary>
-# 
-# Returns index of any & all records matching input values for specific fields
-# </summary>
+#
+# Determines the format of a file from its first few kilobytes </summary>
 #
 # <syntax>
 # 
-# any_matched,all_matched = get_matching_records(dcty, valdict) </syntax>
+# file_format = sniff_format(filepath, head_bytes = 65536) </syntax>
 #
 # <inputs>
 # 
-# The input "dcty" is the dictionary on which the matching is performed.  The
-# input "valdict" is a dictionary whose fields are the fields in "dcty" to be
-# matched, whose values are the values of the records in "dcty" to be matched.
-# For example, suppose "dcty" has the fields "height_in_meters" and
-# "weight_in_lbs" and "color" and you wish to find all items weighing "50" lbs
-# or "40" lbs that are "blue" (or that are blue). Then,
-#
-# : valdict = {'weight_in_lbs': [40, 50], 'color' : 'blue'} 
+# Input "filepath" is the path of the file.  Kwarg "head_bytes" is the number
+# of bytes read at a time, and the number that is usually read. </inputs>
 #
-# The argument "match_type" is a string equal to "partial" (for partial
-# matching: i.e., a match occurs if the sought value is contained in a record)
-# or "exact" (for exact matching: i.e., a match occurs if the sought value is
-# exactly matched. </inputs>
-# 
 # <products>
 # 
-# The first product "any_matched" will return the indices of all records that
-# match any of the values in valdict for the keys specified in valdict.  In the
-# above example, this means all items that are 40 lbs or 50 lbs or that are
-# blue.  The second product "all_matched" will return all records that match at
-# least one value in each key.  This will return all objects that are 40 lbs and
-# blue or 50 lbs and blue, but not any objects that are not blue, and that do
-# not weigh 40 lbs or 50 lbs.  </products>
+# The format of the file, as load() names it: 'dob' (Epdobin), 'dex' (Epdex),
+# 'dat' (Epdata), or 'csv'. </products>
 #
 # <type>
 # 
 # Function </type>
 #
-# <updated>
-#
-# - "match_type" added for partial matching ("searching") option. [100821]
-#
 # <dependencies>
 # 
-# omnigenus </dependencies>
+# None </dependencies>
+#
+# <notes>
+#
+# Epdobin begins with "[file_type] Epdobin".  Otherwise, the rules that load()
+# applied to the whole file are applied: the file is Epdex if "++" occurs before
+# "[" (or without it), and Epdata if "[" occurs first; e.g., the unassigned
+# matter may be formatted as Epdata in an Epdex file, or as Epdex in an Epdata
+# file.  A warning is printed if both occur within the first "head_bytes".  Only
+# the first occurrence matters, so usually only the first "head_bytes" are
+# read.  If neither occurs there and the first line is a CSV header (has commas),
+# the file is CSV; otherwise the rest of the file is searched for them, a piece
+# at a time.  
+#
+# load() used to read the whole file and search all of it, which, for Epdobin,
+# meant scanning the binary data.  The format found is the one it found, but
+# for these changes: 
+#
+# * Epdobin is only recognized by its first line (as written by write_epdobin(),
+#   see {20101025-1615}), rather than by "[file_type] Epdobin" anywhere in the
+#   file, e.g., in the text of an Epdex file.
+# * If "++" and "[" both occur, but not within the same "head_bytes", the file
+#   is read as before (by the first to occur), but no warning is printed, as
+#   the rest of the file isn't searched for the other.
+# * A file with neither is CSV (whether or not its first line has commas, as a
+#   CSV file may have a single field), whereas load() failed to read it, with
+#   a NameError, unless format = 'csv' was given.  So any other file without
+#   markers (e.g., plain text) is now read as CSV, without a warning.
+#
+# As before, a CSV file with a "[" in it (e.g., a field "x[m]") is read as
+# Epdata: its format must be given to load(). </notes>
 #
 # ==============================================================================
 
-def get_matching_records(dcty, valdict, match_type) :
-
-    from omnigenus import findall_matches
-    from omnigenus import findall_partial_matches
-
-    # >> Dictionary that will store the matching records for each key: 
+def sniff_format(filepath, head_bytes = 65536) :
 
-    matches_per_key = {}  
-    
-    # >> This will store the fields that are being matched: 
-
-    match_keys = valdict.keys()
+    fili = open(filepath,'rb')
 
-    # >> Fill matches_per_key with empty lists for now:
+    head = fili.read(head_bytes)
 
-    for key in match_keys : matches_per_key[key] = []
+    if head.split(b'\n')[0].strip() == b'[file_type] Epdobin' : 
+        fili.close()
+        return 'dob'
 
-    # >> For each key...
-    
-    for key in match_keys :
+    sqbrk_index = head.find(b'[')          # >> first index of '['
+    pp_index    = head.find(b'++')         # >> first index of '++' 
 
-        vals = valdict[key] # >> Store the matching values...
+    # >> Both occur near the beginning (Epdadex?):
 
-        # >> ... if there's only one, store it as a list...
+    if sqbrk_index > -1 and pp_index > -1 : 
 
-        if not isinstance(vals,type([1,2,3])) : vals = [vals];
+        fili.close()
 
-        # >> ... find all records under the current key in dict that match each
-        # >> of the stipulated values; note also that each val is converted to a
-        # >> string in case that is not already so:
+        warning_msg = 'Epdobase: Warning: file format is not obvious...'
 
-        for val in vals :
-            
-            if match_type == "exact" : 
-              matches_per_key[key] += findall_matches(dcty[key],str(val))
-            elif match_type == "partial" : 
-              matches_per_key[key]+=findall_partial_matches(dcty[key],str(val))
-    
-    # >> Now just make a list of all the records that had at least one match in
-    # >> at least one key:        
+        if sqbrk_index < pp_index : 
+            print(warning_msg + ' reading as Epdata (i.e., Epdadex).')
+            return 'dat'
+        else : 
+            print(warning_msg + ' reading as Epdex.')
+            return 'dex'
 
-    any_matched_unreduced = []        
+    # >> A CSV header: the first line that isn't commented or empty has commas:
 
-    for key in match_keys : any_matched_unreduced += matches_per_key[key]
+    lines = [line for line in head.splitlines() if line[0:1] not in [b'#', b'']]
 
-    # >> Now make sure there is just once mention of each record in this list:
+    if sqbrk_index == -1 and pp_index == -1 and \
+            len(lines) > 0 and b',' in lines[0] : 
+        fili.close()
+        return 'csv'
 
-    any_matched = []
+    # >> Otherwise, the first to occur (keeping the last byte of each piece, in
+    # >> case '++' is split between pieces):
 
-    for item in any_matched_unreduced : 
-        if item not in any_matched : any_matched += [item]
+    while sqbrk_index == -1 and pp_index == -1 : 
 
-    # >> Now we turn to finding records that have at least one match in each
-    # >> key.    
+        piece = fili.read(head_bytes)
 
-    all_matched = []
+        if len(piece) == 0 : break
 
-    for item in any_matched : 
+        head = head[-1:] + piece
 
-        # >> The idea is just to count the number of keys for which each record
-        # >> in any_matched had a match, and check to see if this is equal to
-        # >> the total number of keys.  If it is, then the record's index is
-        # >> added to all_matched.
+        sqbrk_index = head.find(b'[') 
+        pp_index    = head.find(b'++')
 
-        cnt = 0
+    fili.close()
 
-        for key in match_keys : 
-            if item in matches_per_key[key] : cnt += 1
+    if sqbrk_index == -1 and pp_index == -1 : return 'csv'
 
-        if cnt == len(match_keys): all_matched += [item]
-    
-    return any_matched, all_matched
+    if pp_index == -1 or (sqbrk_index > -1 and sqbrk_index < pp_index) : 
+        return 'dat'
 
+    return 'dex'
 
 # ==============================================================================
 #
-# 20100821-1803-mpuboo - Simple sorting of an Epdobase
-# 
+# 20261018-0930-mpuboo - Iterate over chunks of an Epdex, Epdata or CSV file
+#
 # <summary>
-# 
-# Sorts all records in an epdobase (all columns) according to the values in one
-# column, in forward or reverse order.  </summary>
+#
+# Reads a file piecewise, yielding one Epdobase object per chunk of records.
+# </summary>
 #
 # <syntax>
 # 
-# simple_epdobase_simple(ep, field, whether_reverse) </syntax>
+# for ep in iter_chunks(filepath, format, chunk_rows=100000, schema=None) : ...
+# </syntax>
 #
 # <inputs>
 # 
-# Input "ep" is an Epdobase object.  Input "field" is the field name or column
-# that will determine the sort order.  Final input "whether_reverse" should be
-# True if the sort order is to be reverse, and False otherwise.  See Python docs
-# for a discussion of the sort order for characters of different classes (e.g.,
-# numeric versus alphabet characters). </inputs>
+# Input "filepath" is the path of the file to be read, and "format" is one of
+# 'csv', 'dex' (or 'epdex'), or 'dat' (or 'epdata', 'epdat', 'ddx').  Kwarg
+# "chunk_rows" is the largest number of records held by each chunk.  Kwarg
+# "schema" declares the types of some fields, as in load(); if it is given,
+# every chunk is numerized with it. </inputs>
 #
 # <products>
 # 
-# The input ep has been been resorted.  </products>
+# A generator of Epdobase objects, each holding at most chunk_rows consecutive
+# records of the file, with the same fields, field definitions and unassigned
+# matter that load() would have given those records.  (CSV chunks also have
+# their ndct filled, as in load().)  Only one chunk is held in memory at a
+# time, so filtering, DEM binning and export can be run over files of any size
+# by processing the chunks in turn. </products>
 #
 # <type>
 # 
@@ -1765,180 +2350,251 @@ def get_matching_records(dcty, valdict, match_type) :
 #
 # <dependencies>
 # 
-# copy, omnigenus </dependencies>
+# re </dependencies>
+#
+# <notes>
+#
+# Each chunk is parsed by the same parser that load() uses, fed with the lines
+# of that chunk plus the header lines that the parser needs (the CSV field
+# names, the Epdex "++" and "**" lines).  Epdata chunks are split at lines that
+# begin with the start tag, so that no record is divided between chunks.  The
+# tags found in the first Epdata chunk are created in every later chunk, and
+# tag definitions are accumulated as they are found.  Since unassigned matter
+# is kept per chunk, a chunk whose records have none has an empty umat. 
+#
+# Epdobin is not read this way, since its binary records are fixed in size and
+# can be read at random (see {20101026-1536}). </notes>
 #
 # ==============================================================================
 
-def sort_epdobase_simple(ep, field, whether_reverse) :
+def iter_chunks(filepath, format, chunk_rows = 100000, schema = None) :
 
-    from omnigenus import get_list_sort_order
-    import copy
+    fili = open(filepath,'r')
 
-    # >> First sort the column indicated by "field", and determine the sort
-    # >> order so that this can be applied to all the other fields:
+    if   format == 'csv' : 
+        chunks = iter_csv_chunks(fili, chunk_rows, schema = schema)
+    elif format == 'dex' or format == 'epdex' : 
+        chunks = iter_epdex_chunks(fili, chunk_rows, schema = schema)
+    elif format == 'dat' or format == 'epdata' or format == 'epdat' \
+            or format == 'ddx' :
+        chunks = iter_epdata_chunks(fili, chunk_rows)
+    else :
+        fili.close()
+        raise ValueError('Epdobase: cannot read format ' + str(format) + \
+                             ' in chunks.')
 
-    sort_order = get_list_sort_order(\
-                        sorted(ep.dcty[field], reverse = whether_reverse),
-                        ep.dcty[field])
+    try : 
+        for prsd in chunks : 
 
-    # >> Make a reference copy of the dictionary (the one we consult while
-    # >> modifying the original):
+            # >> Populate an Epdobase for each chunk, as in load():
 
-    old_dcty = copy.deepcopy(ep.dcty)
+            ep = cl_epdobase()
 
-    # >> Now sort all columns using the same sort-order:
+            ep.strs = tracked_columns(prsd[0]); ep.flds = prsd[1]
+            ep.defs = prsd[2]; ep.umat = prsd[3]
 
-    for field in ep.flds : 
+            if len(prsd) > 4 : ep.nums = prsd[4]; ep.schm = dict(schema or {})
+            elif schema is not None : ep.numerize(schema = schema)
 
-        for i in range(0,len(sort_order),1) : 
+            yield ep
 
-            ep.dcty[field][i] = old_dcty[field][sort_order[i]]
-        
-# ==============================================================================
-#
-# 20100821-2045-mpuboo - Numerize Epdobase
-# 
-# <summary>
-# 
-# Converts all numeric strings to numeric types, stores them in "ndct"</summary>
-#
-# <syntax>
-# 
-# numerize_epdobase(ep, precision = 'double') </syntax>
-#
-# <inputs>
-# 
-# Input "ep" is an Epdobase object.  Keyword argument "precision" specifies the
-# number of bits of precision, which may be 'single' (32-bit) or 'double'
-# (64-bit), where 'double' precision is the default. </inputs>
-#
-# <products>
-# 
-# Input "ep" is modified so all columns in the dictionary .dcty are converted to
-# numpy arrays.  Lists of pure integers are converted to numpy arrays of single
-# or double precision integers.  Lists of floats and integers are converted to
-# numpy arrays of single or double precision floats.  Lists of floats and
-# integers and strings or floats and strings or integers and strings are
-# converted to numpy arrays of strings.  Note that "null" values are not counted
-# as strings, and are converted to numpy NaNs at the outset.  If the input
-# epdobase ep already has a numerized version of dcty stored in ndct, then it is
-# overwritten. </products>
-#
-# <type>
-# 
-# Function </type>
-#
-# <dependencies>
-# 
-# copy, numpy </dependencies>
-#
-# <updates>
-#
-# - ndict columns are now numpy arrays instead of lists [101027]
-# - vectorized conversion to numpy arrays (was looping over records) [101027]
-# - given empty cells (''), numerize often failed to convert numbers [150809]
-# - precision is now always 64 bit; left bogus kwarg for compatibility [150810]
-#
-# </updates> 
-#
-# <notes>
-#
-# Unassigned matter is ignored. 
-#
-# Also note that since there are no integer nans, any column that has null
-# values and integers will be converted to a floating point array! (with nans in
-# the nulls). [150810] </notes>
-#
-# ==============================================================================
+    finally : fili.close()
+
+# ..............................................................................
 
-def numerize_epdobase(ep, precision = None):
+# >> Yields parse_csv() results for successive chunks of lines of the CSV file
+# >> object "fili", each led by the field-names line:
 
-    import copy             # >> Standard Python library
-    import numpy as np      # >> Numerical Python 
+def iter_csv_chunks(fili, chunk_rows, schema = None) :
 
-    # >> Copy the string-format dictionary (dcty) into the numerized one (ndct):
+    # >> The first line that isn't commented or empty holds the field names:
 
-    ep.ndct = copy.deepcopy(ep.dcty)
-    
-# -- Loop over fields ----------------------------------------------------------
+    field_line = ''
 
-    for field in ep.flds : 
+    for line in fili : 
+        if line[0:1] not in ['#', '\r', '\n'] : 
+            field_line = line.rstrip('\r\n') + '\n'
+            break
 
-        column     = ep.ndct[field]
-        column_arr = np.array(column)
+    if len(field_line) == 0 : return
 
-        # >> First replace all "nulls" with "NaN":
-        # !! I already tried with ::column_arr[inds_nulls] = np.nan::
-        
-        flag_nulls = column_arr == 'null' 
-        flag_empty = column_arr == ''
+    # >> Only record lines are counted; commented and empty lines are carried
+    # >> along with the chunk they fall in:
 
-        inds_not_empty   = np.nonzero(1 - (flag_nulls + flag_empty))[0]
+    lines    = []
+    num_recs = 0
 
-        if len(inds_not_empty) == len(column) : 
-            no_empty_records = True
-        else:
-            no_empty_records = False
-
-        column_arr_short = column_arr[inds_not_empty] 
-
-        # >> Prior to 2010.10.27, this method looped over individual records to
-        # >> determine the appropriate type conversion.  Now, all records of a
-        # >> field are converted to float or integer arrays, all at once.  First
-        # >> we try converting all values to ints.  If this fails, we try
-        # >> converting all values to floats.  If this fails, the column is
-        # >> converted to a numpy array of strings:
-
-        try : tmp = np.int64(column_arr_short)
-        except: 
-            try: tmp = np.float64(column_arr_short)
-            except:
-                try: tmp = np.array(column_arr_short)
-                except: print('Epdobase: error: numerize() choked on ndct.')
-            
+    for line in fili : 
 
-        if (tmp.dtype == np.array([1.,2.]).dtype or \
-                tmp.dtype == np.array([1,2]).dtype) and not no_empty_records:
+        lines.append(line)
 
-            # column had empty records, and the rest were numbers
+        if line[0:1] != '#' and len(line.strip()) > 0 : 
 
-            if precision == 'double': tmp = np.float64(tmp)
-            elif precision == 'single': tmp = np.float32(tmp)
+            num_recs += 1
 
-            column_nan = np.nan + np.zeros(column_arr.shape)
-            column_nan[inds_not_empty] = tmp
-            ep.ndct[field] = column_nan
+            if num_recs == chunk_rows : 
+                yield parse_csv(field_line + ''.join(lines), schema = schema)
+                lines    = []
+                num_recs = 0
 
-        elif not no_empty_records: # column had empty records, but no numbers
+    if num_recs > 0 : 
+        yield parse_csv(field_line + ''.join(lines), schema = schema)
 
-            ep.ndct[field] = column_arr
+# ..............................................................................
 
-        else: # column had no empty records
+# >> Yields parse_epdex() results for successive chunks of records of the Epdex
+# >> file object "fili".  Each chunk is led by the current field-names line
+# >> ("++") and field-definitions line ("**"), and closed with "++":
+
+def iter_epdex_chunks(fili, chunk_rows, schema = None) :
+
+    field_line = ''     # >> The current "++" line, once found
+    defs_line  = ''     # >> The current "**" line, if any
+
+    lines = []
+
+    for line in fili :
+
+        sline = line.strip()
+
+        if sline[0:2] == ';;' : continue    # >> Ignore commented lines
+
+        if sline == '++' : break            # >> End of the epdex matter
+
+        if not line.endswith('\n') : line += '\n'
+
+        if len(sline) > 2 and sline[0:2] == '++' :
+
+            # >> New field names; the records read so far belong to the old
+            # >> ones:
+
+            if len(lines) > 0 : 
+                yield parse_epdex(field_line + defs_line + ''.join(lines)+'++',
+                                  schema = schema)
+                lines = []
+
+            field_line = line
+            defs_line  = ''
+
+        elif len(field_line) == 0 : continue  # >> Not in epdex matter yet
+
+        elif sline[0:2] == '**' : defs_line = line
+
+        else :
+
+            lines.append(line)
+
+            if len(lines) == chunk_rows : 
+                yield parse_epdex(field_line + defs_line + ''.join(lines)+'++',
+                                  schema = schema)
+                lines = []
+
+    if len(lines) > 0 : 
+        yield parse_epdex(field_line + defs_line + ''.join(lines) + '++', 
+                          schema = schema)
+
+# ..............................................................................
+
+# >> Yields parse_epdata() results for successive chunks of records of the
+# >> Epdata file object "fili".  A new chunk is begun at the line with the start
+# >> tag of the (chunk_rows+1)-th record:
+
+def iter_epdata_chunks(fili, chunk_rows) :
+
+    import re
+
+    startag_pat = re.compile(r'^\s*\[(.*?)\](.*)')
+
+    start_tag = None    # >> Tag that begins each record (the first tag found)
+    tag_list  = []      # >> Tags found in the first chunk
+    tag_defs  = {}      # >> Tag definitions found so far
+
+    lines    = []
+    num_recs = 0
+
+    for line in fili :
+
+        patmatch = startag_pat.search(line.strip())
+
+        if patmatch : 
+
+            if start_tag is None : start_tag = patmatch.group(1)
+
+            if patmatch.group(1) == start_tag : 
+
+                if num_recs == chunk_rows : 
+                    yield parse_epdata_chunk(lines, start_tag, tag_list, 
+                                             tag_defs)
+                    lines    = []
+                    num_recs = 0
+
+                num_recs += 1
+
+        lines.append(line)
+
+    if num_recs > 0 : 
+        yield parse_epdata_chunk(lines, start_tag, tag_list, tag_defs)
+
+# ..............................................................................
+
+# >> Parses the lines of one Epdata chunk.  The tags of the first chunk are
+# >> noted in "tag_list" and created in all later chunks, while "tag_defs"
+# >> accumulates the tag definitions found so far:
+
+def parse_epdata_chunk(lines, start_tag, tag_list, tag_defs) :
+
+    if len(tag_list) == 0 : 
+        prsd = parse_epdata(''.join(lines), 'first_tag')
+        tag_list.extend(prsd[1])
+    else : 
+        prsd = parse_epdata(''.join(lines), start_tag, known_tags = tag_list)
+
+    tag_defs.update(prsd[2])
+    prsd[2] = dict(tag_defs)
+
+    return prsd
 
-            ep.ndct[field] = tmp
-        
 # ==============================================================================
 #
-# 20100821-2100-mpuboo - Characterize Epdobase
-# 
+# 20100526-1508-mpuboo - merge_epdobase.py
+#
 # <summary>
-# 
-# Converts the numeric dictionary (ndct) to strings, overwriting dcty </summary>
+#
+# Smart merging and consolidation of two Epdomonus dictionary (epdobase) objects
+# </summary>
 #
 # <syntax>
 # 
-# characterize_epdobase(ep) </syntax>
+# ep3 = merge_epdobase(ep1, ep2, match_fields, add_nonmatching_records = True,
+#                      how = None) </syntax>
 #
 # <inputs>
 # 
-# Input "ep" is an Epdobase object. </inputs>
+# Inputs "ep1" and "ep2" are the Epdobase objects to be merged.  Argument
+# "match_fields" is a list of names of fields to be used for matching records in
+# each epdobase.
+#
+# There is now also a kwarg "add_nonmatching_records" which should be set to
+# False if the user prefers to merge into a database that is the intersection
+# rather than union of the two input databases.  Kwarg "how" says which
+# records are kept, overriding "add_nonmatching_records" if given:
+#
+# * 'outer' = all records of ep1 and ep2 (add_nonmatching_records = True)
+# * 'left'  = all records of ep1 (add_nonmatching_records = False)
+# * 'inner' = only the records of ep1 that some record of ep2 matches 
+# </inputs>
 #
 # <products>
 # 
-# The input "ep" is modified so that dcty has been overwritten by a version of
-# ndct in which all records have been converted to strings.  All numpy "nan"s in
-# the ndct (the "numeric dictionary") are converted to strings with value
-# "null".  </products>
+# Result is the merged database, also an Epdobase object.  The script will loop
+# over all the records in ep2, finding the record in ep1 that matches each one
+# for the fields listed in "match_fields".  If there is no match, a new
+# record is created.  Fields in ep2 but not in ep1 are added to ep3; the empty
+# fields of non-matching records in ep2 will inherit "null" values in ep3.
+# Likewise for fields in ep1 and not in ep2.  Note that matching records having
+# the same non-matching fields with different values for ep1 and ep2 will
+# inherit the values of ep2 (i.e., ep1's values will be "over-written" by ep2's
+# values wherever the values in matching records disagree). </products>
 #
 # <type>
 # 
@@ -1946,58 +2602,222 @@ def numerize_epdobase(ep, precision = None):
 #
 # <dependencies>
 # 
-# copy </dependencies>
+# None </dependencies>
 #
 # <updates>
 #
-# - vectorized conversion to strings; no longer looping over records [101027]
-# </updates>
+# - In some cases, you may not wish to add nonmatching records; I have added
+#   a kwarg whose default argument is "True" for backward compatibility. 
+# - Records are matched by looking up their values in a dictionary of the
+#   records of ep1 (a hash join), instead of searching ep3 for each record of
+#   ep2, which was quadratic; ep1 and ep2 are no longer nullified in place
+#   (only their copies in ep3 are); nonunique matching fields raise a
+#   ValueError instead of exiting; added the "how" kwarg. [261018] </updates>
 #
-# <notes>
+# <notes> 
 #
-# Unassigned matter is ignored. </notes>
+# As currently implemented, records with empty fields in ep2 that match records
+# in ep1 that are not empty will *not* overwrite the ep1 values.  Same behavior
+# applies to the unassigned matter.  That is, as currently implemented, the
+# merger preserves information, never overwriting information with empty record
+# values.  See {saftey1} and {safety2} in the code. 
+#
+# Records of ep1 with the same matching values are only an error if a record
+# of ep2 matches them, and records of ep2 with the same matching values are
+# each merged into the record of ep1 they match, or each added. </notes>
 #
 # ==============================================================================
- 
-def characterize_epdobase(ep):
 
-    import copy
-    import numpy as np
+def merge_epdobase(ep1, ep2, match_fields, add_nonmatching_records = True, 
+                   how = None) :
+
+    if how is None : 
+        if add_nonmatching_records : how = 'outer'
+        else : how = 'left'
+
+    if how not in ['inner', 'left', 'outer'] : 
+        raise ValueError('merge_epdobase: unknown kind of merge: ' + how)
+
+    # >> If their fields are undefined (empty), get them from the dict keys:
+
+    flds1 = list(ep1.flds)
+    flds2 = list(ep2.flds)
+
+    if len(flds1) == 0 : flds1 = list(ep1.dcty.keys())
+    if len(flds2) == 0 : flds2 = list(ep2.dcty.keys())
+
+    # >> Then create the new dict ep3, w/all the fields of both prior structs:
+
+    ep3 = cl_epdobase()
+
+    ep3.flds = flds1[:]
+
+    for field in flds2:
+        if field not in ep3.flds :
+            ep3.flds.append(field)
+
+    # >> Copy the field definitions, overwriting ones from ep2 occurring in ep1:
+
+    for field in flds1 : 
+        if field in ep1.defs : ep3.defs[field] = ep1.defs[field][:]
+
+    for field in flds2 : 
+        if field in ep2.defs : ep3.defs[field] = ep2.defs[field][:]
+
+    # >> The length of ep1 and ep2:
+
+    len_ep1 = ep1.len()    
+    len_ep2 = ep2.len()
+
+    # >> Fill the ep3 dictionary with the nullified records of ep1, and "null"
+    # >> for the fields of ep2 only:
+
+    for field in flds2 : ep3.dcty[field] = ['null'] * len_ep1
+
+    for field in flds1 : ep3.dcty[field] = nullified_column(ep1.dcty[field])
+
+    # >> Fill unassigned matter in ep3 with the unassigned matter of ep1:
+
+    ep3.umat = nullified_column(ep1.umat) # >> Note that ep1.umat may be empty!
+
+    # >> If ep2 has unassigned matter and ep1 does not, fill ep3's unassigned
+    # >> matter with as many nulls as there are records in ep1:
+
+    if len(ep2.umat) > 0 and len(ep3.umat) == 0 : ep3.umat = ['null'] * len_ep1
+
+    # >> ep2's records are read nullified too:
+
+    cols2 = {}
+
+    for field in flds2 : cols2[field] = nullified_column(ep2.dcty[field])
+
+    umat2 = nullified_column(ep2.umat)
 
-    # >> Copy the numeric dictionary (ndct) into the string dictionary (dcty) 
+# -- Find the record of ep3 that matches each record of ep2 --------------------
 
-    ep.dcty = copy.deepcopy(ep.ndct)
+    # >> The records of ep1 by their values in the match_fields (a list of the
+    # >> records, for values that are not unique):
+
+    key_recs = {}
     
-# -- Loop over fields ----------------------------------------------------------
+    keys1 = list(zip(*[ep3.dcty[field] for field in match_fields]))
 
-    for field in ep.flds : 
+    for j, key in enumerate(keys1) : 
+        if key in key_recs : key_recs[key].append(j)
+        else : key_recs[key] = [j]
+
+    # >> For each record of ep2, the record of ep1 it matches, if any; if
+    # >> there is none, it is added to ep3:
+
+    keys2 = list(zip(*[cols2[field] for field in match_fields]))
+
+    matches = []    # >> pairs of records (of ep2, of ep1) that match
+    added   = []    # >> records of ep2 added to ep3
+    matched = set() # >> records of ep1 that were matched
+
+    for i, key in enumerate(keys2) :
+
+        recs = key_recs.get(key)
+
+        if recs is None : 
+            if how == 'outer' : added.append(i)
+
+        # >> If there was more than one matching record, the matching fields
+        # >> are non-unique:
+
+        elif len(recs) > 1 : 
+            raise ValueError('merge_epdobase: matching fields are nonunique; '
+                             'records ' + str(recs) + ' of ep1 match record ' +
+                             str(i) + ' of ep2.')
+
+        else : 
+            matches.append((i, recs[0]))
+            matched.add(recs[0])
+
+# -- Add the new records, overwrite existing ones ------------------------------
+
+    # >> Fields in ep1 not in ep2 are assigned "null"s for all added records:
+
+    for field in ep3.flds :
+        if field in cols2 : 
+            column = cols2[field]
+            ep3.dcty[field].extend([column[i] for i in added])
+        else : ep3.dcty[field].extend(['null'] * len(added))
+
+    # >> Also add the corresponding unassigned matter:        
 
-        # >> Function "map" applies the function supplied as the first argument
-        # >> to all elements in the sequence (supplied as the second argument).
-        # >> I learned this from an 
+    if len(umat2) > 0 : ep3.umat.extend([umat2[i] for i in added])
+    elif len(ep3.umat) > 0 : ep3.umat.extend(['null'] * len(added))
 
-        ep.dcty[field] = map(str,ep.ndct[field])
+    # >> Now update the matching records with the values in ep2.  As long as
+    # >> the field of a record in ep2 is not null, update its value in the
+    # >> matching record in ep3. [safety1]
+
+    for field in flds2 :
+
+        column  = cols2[field]
+        column3 = ep3.dcty[field]
+
+        for i, j in matches : 
+            if column[i] != 'null' : column3[j] = column[i]
+
+    # >> Also update the unassigned matter likewise. [safety2]
+
+    if len(umat2) > 0 : 
+        for i, j in matches : 
+            if umat2[i] != 'null' : ep3.umat[j] = umat2[i]
+
+    # >> Only the records of ep1 that were matched are kept by an inner merge:
+
+    if how == 'inner' : 
+
+        keep = [j for j in range(0,len_ep1,1) if j in matched]
+
+        for field in ep3.flds : 
+            column = ep3.dcty[field]
+            ep3.dcty[field] = [column[j] for j in keep]
+
+        if len(ep3.umat) > 0 : ep3.umat = [ep3.umat[j] for j in keep]
+
+    return ep3
+
+# ..............................................................................
+
+# >> Returns a copy of "column" (a list of strings) in which empty strings (or
+# >> whitespace) are replaced with "null", as nullify_epdobase() does. [261018]
+
+def nullified_column(column) : 
+
+    return ['null' if val.strip() == '' else val for val in column]
 
 # ==============================================================================
 #
-# 20100822-2100-mpuboo - Nullify Epdobase
-# 
-# <summary>
-# 
-# Converts all empty strings to "null" in dcty and umat.
+# 20100526-1510-mpuboo - Parse Epdex
+#
+# <summary> 
+#
+# Parse epdex format into an epdobase (N.B. all arrays will be m x 1) </summary>
 #
 # <syntax>
 # 
-# ep_out = nullify_epdobase(ep) </syntax>
+# epdobase_elements = parse_epdex(string, schema = None) </syntax>
 #
 # <inputs>
 # 
-# Input "ep" is an Epdobase object. </inputs>
+# The input is a string that contains the contents of a text file, where each
+# line is separated by a newline character.  This can be read from a file object
+# using the read() method.  Kwarg "schema" declares the types of some or all
+# fields, as in numerize_epdobase() (see {20100821-2045}). </inputs>
 #
 # <products>
 # 
-# The input "ep" is modified so that all empty strings in dcty and umat have
-# been replaced with "null". </products>
+# The output is a list with four elements: a dictionary containing the database,
+# a list of field-names, a list of field descriptions or definitions, and a list
+# of unassigned matter.  This definitions list is of course empty if there was
+# no field-definitions line in the Epdex file. The unassigned matter is likewise
+# empty if there was no unassigned matter in the document.  If a schema is
+# given, a fifth element holds the numerized columns (as ndct would, after
+# numerize(schema = schema)). </products>
 #
 # <type>
 # 
@@ -2005,124 +2825,3548 @@ def characterize_epdobase(ep):
 #
 # <dependencies>
 # 
-# copy </dependencies>
+# re, operator </dependencies>
 #
-# <notes> </notes>
+# <updates> 
+#
+# - Rewritten to split the records into columns once per block of records,
+#   by the positions of the fields, rather than looking up the position of
+#   each field for each record; "|NL|" is only replaced in records that hold
+#   it; added the "schema" kwarg. [261018] </updates>
+#
+# <notes> 
+#
+# Only the lines that begin with ";;", "++" or "**" are visited one by one; the
+# records between them are gathered, then split at the "#"s all at once (or
+# record by record, if the records don't all have the same number of values),
+# and each field's column is taken from its position in one pass.  This is
+# linear in the number of records and fields, where looking up each field's
+# position with list.index() for each record was quadratic in the number of
+# fields.  A record with fewer "#"-separated values than there are fields
+# raises ValueError (where an IndexError was raised before). [261018] </notes>
 #
 # ==============================================================================
 
-def nullify_epdobase(ep) :
+def parse_epdex(strn, schema = None) :
 
-    # >> Replacing all empty strings in the dcty with "null":
-    
-    for field in ep.flds:
-        for i in range(0,ep.len(),1) : 
-            if ep.dcty[field][i].strip() == '' : ep.dcty[field][i] = "null"
+    import re
 
-    # >> Doing likewise in the unassigned matter:
-    
-    if len(ep.umat) != 0 :
+    # >> Lines are found at newlines below, so any other line breaks (which
+    # >> splitlines() would split at) are made newlines first:
 
-        for i in range(0,ep.len(),1) : 
-            if ep.umat[i].strip() == '' : ep.umat[i] = "null"
+    for char in ['\r', '\x0b', '\x0c', '\x1c', '\x1d', '\x1e', '\x85'] : 
+        if char in strn : strn = '\n'.join(strn.splitlines()); break
 
-# ==============================================================================
-#
-# 20100910-1424-mpuboo - Unnullify Epdobase
-# 
-# <summary>
-# 
-# Converts all "null"s and "nans" to empty strings in dcty and umat. </summary>
-#
-# <syntax>
+    if not isinstance(strn, bytes) and \
+            ('\u2028' in strn or '\u2029' in strn) :
+        strn = '\n'.join(strn.splitlines())
+
+    epdex_open = 0  # >> Keeps track of whether we are reading epdex matter
+
+    s = {}          # >> This dictionary will store the database
+    field_defs = {} # >> This will store the field definitions
+
+    field_list = [] # >> The current field names
+    records    = [] # >> The records read under the current field names
+
+    # >> Keeps track of whether the epdex has unassigned matter:
+
+    has_umatter = False 
+
+    # >> Unassigned matter (if any) is stored in this list:
+
+    umat = []
+
+    # >> Only records that hold newline escapes need to be unescaped:
+
+    has_escapes = '|NL|' in strn
+
+    # >> Lines that begin with ";;" (comments), "++" (field names, or the end
+    # >> of the epdex matter) or "**" (field definitions).  The records are the
+    # >> lines between these.  (The pattern begins with the preceding newline,
+    # >> which is much faster to search for than the start of a line.)
+
+    mark_pat = re.compile(r'\n[^\S\n]*(?:;;|\+\+|\*\*)[^\n]*')
+
+    strn = '\n' + strn
+
+    line_end = 0    # >> The end of the last of these lines
+    closed   = False  # >> Whether the epdex matter was closed by "++"
+
+# -- Main loop over marked lines in file ---------------------------------------
+
+    for patmatch in mark_pat.finditer(strn) : 
+
+        # >> Gather the records since the last marked line, to be split into
+        # >> columns in one pass:
+
+        if epdex_open == 1 : 
+            records.extend(strn[line_end:patmatch.start()+1].splitlines())
+
+        line_end = patmatch.end() + 1
+
+        sline = patmatch.group(0).strip() # >> Remove whitespace
+
+        if sline[0:2] == ';;' : continue  # >> Ignore commented lines
+
+        # >> Quit if you find "++" on a line by itself (otherwise, the
+        # >> program will stop reading at the EOF).
+
+        if sline == '++' : closed = True; break
+
+        # >> On finding this, we're inside epdex matter; the records read so
+        # >> far belong to the previous field names: 
+
+        if len(sline) > 2 and sline[0:2] == '++' :
+
+            add_epdex_records(s, field_list, records, has_escapes)
+
+            epdex_open = 1
+            records    = []
+            field_list = []
+
+            # >> Eliminate whitespace from field names, initialize the
+            # >> dictionary that will hold the database:
+
+            for name in sline[2:].split('#') : 
+
+                name = name.strip()
+
+                # >> First determine whether the field refers to unassigned
+                # >> matter:
+
+                if name == 'umat' or name == 'Umat' or name == 'UMAT' :
+
+                    has_umatter = True
+                    umat_key = name
+
+                if len(name) > 0 : 
+
+                    field_list.append(name)
+                    s[name] = []
+                    field_defs[name] = []
+
+        # >> Store the field definitions :
+
+        elif epdex_open == 1 and sline[0:2] == '**' :
+
+            strs = sline[2:].split('#')
+
+            for field in field_list : 
+                field_defs[field] = strs[field_list.index(field)].strip()
+
+    # >> The records after the last marked line, if the epdex matter wasn't
+    # >> closed by "++":
+
+    if epdex_open == 1 and not closed : 
+        records.extend(strn[line_end:].splitlines())
+
+    add_epdex_records(s, field_list, records, has_escapes)
+
+    # >> Now, separate the unassigned matter, if any, into the "umat" list:
+
+    if has_umatter :
+
+        umat = s[umat_key]
+
+        del s[umat_key]
+        del field_defs[umat_key]
+        field_list.remove(umat_key)
+
+    # >> Finally, if there are no field definitions, return these as an empty
+    # >> dictionary:
+
+    total_def_len = 0
+
+    for field in field_list: total_def_len += len(field_defs[field])
+    if total_def_len == 0 : field_defs = {}
+
+    if schema is None : return [s, field_list, field_defs, umat]
+
+    # >> Numerize the columns, with the declared types where given: 
+
+    ndct = {}
+
+    for field in field_list : 
+        if field in schema : 
+            ndct[field] = numerize_column_schema(s[field], schema[field])
+        else : 
+            ndct[field] = numerize_column(s[field])
+
+    return [s, field_list, field_defs, umat, ndct]
+
+# ..............................................................................
+
+# >> Splits the Epdex "records" (lines) at the "#"s, and appends the values of
+# >> each field in "field_list" to its column in the dictionary "s", taking the
+# >> value at the field's position in every record.  Newline escapes ("|NL|")
+# >> are only looked for if "has_escapes" is True. [261018]
+
+def add_epdex_records(s, field_list, records, has_escapes) :
+
+    import operator
+
+    if len(records) == 0 or len(field_list) == 0 : return
+
+    # >> Each field's value is at the first position of its name:
+
+    positions = [field_list.index(field) for field in field_list]
+
+    # >> If every record has the same number of values, they are split all at
+    # >> once, and each column is a slice of the values; otherwise each record
+    # >> is split on its own:
+
+    counts = set(map(operator.methodcaller('count','#'), records))
+
+    if len(counts) == 1 : 
+
+        num_vals = counts.pop() + 1
+        flat     = '#'.join(records).split('#')
+
+        def column_values(pos) : return flat[pos::num_vals]
+
+    else : 
+
+        num_vals = min(counts) + 1
+        rows     = [tline.split('#') for tline in records]
+
+        def column_values(pos) : return [row[pos] for row in rows]
+
+    if num_vals <= max(positions) : 
+        raise ValueError('Epdobase: an Epdex record has fewer values than ' + \
+                             'there are fields.')
+
+    # >> The strip method of the records' type is mapped over each column:
+
+    strip = type(records[0]).strip
+
+    filled = set()
+
+    for pos in range(0,len(field_list),1) : 
+
+        field = field_list[pos]
+
+        if field in filled : continue
+        filled.add(field)
+
+        column = list(map(strip, column_values(positions[pos])))
+
+        # >> Replace newline characters:
+
+        if has_escapes : 
+            column = [val.replace('|NL|','\n') if '|NL|' in val else val 
+                      for val in column]
+
+        # >> A repeated field name takes the value at its first position once
+        # >> for each repetition (as it did when positions were looked up):
+
+        repeats = field_list.count(field)
+
+        if repeats > 1 : 
+            column = [val for val in column for j in range(0,repeats,1)]
+
+        s[field].extend(column)
+
+# ==============================================================================
+#
+# 20100526-1511-mpuboo - Write Epdex
+#
+# </summary>
+#
+# Writes an epdobase's elements to epdex format (N.B. all arrays must be m x 1)
+# </summary>
+#
+# <syntax>
+# 
+# strn = write_epdex(dcty, fields, field_defs, umat, filo = None, 
+#                    block_rows = 10000) </syntax>
+#
+# <inputs>
+# 
+# The argument "dcty" is a dictionary having the same format as an epdobase dcty
+# variable (see {20100527-1045}). The argument "fields" is equivalent to an
+# epdobase flds variable (a list of field names), and field_defs corresponds to
+# the "defs" variable of an epdobase object (a list of field definitions).  Note
+# that "fields" can be set to an empty string or an empty list, in which case it
+# will be filled using the keys() method.  If "field_defs" is empty, then the
+# fields will not be defined in the epdata file. 
+#
+# Kwarg "filo" is a file object (or any object with a write() method), opened
+# for writing, to which the epdex is written "block_rows" records at a time; if
+# it is None, the epdex is returned as a string instead. </inputs>
+#
+# <products>
+# 
+# This method writes the contents of the injested epdobase elements to an
+# epdex-formatted string "strn" which can, in turn, be written to a
+# file, or writes it to "filo" directly. </products>
+#
+# <type>
+# 
+# Function </type>
+#
+# <updates> 
+#
+# - Writes to a file object a block of records at a time, rather than adding
+#   to a string value by value, which was quadratic in time. [261018] 
+# - Unassigned matter is written as a column of its own: the dictionary, the
+#   list of fields and the definitions given are no longer modified. [261018]
+# </updates>
+#
+# <notes>
+# 
+# Note that all new-line characters are replaced with |NL| in the epdex file,
+# where each record is allowed to occupy exactly one line. </notes>
+#
+# ==============================================================================
+
+def write_epdex(s, fields, field_defs, umat, filo = None, block_rows = 10000) :
+
+    import io
+
+    # >> Without a file, write to an in-memory buffer and return its contents:
+
+    if filo is None : 
+        filo = io.StringIO()
+        write_epdex(s, fields, field_defs, umat, filo, block_rows)
+        return filo.getvalue()
+
+    # >> Use the given field names, or derive them from the dictionary keys if
+    # >> "fields" is empty:
+
+    if len(fields) == 0 : list_fields = list(s.keys())
+    else : list_fields = list(fields)
+
+    list_cols = [s[field] for field in list_fields]
+    if len(field_defs) > 0 : 
+        list_defs = [field_defs[field] for field in list_fields]
+    else : list_defs = []
+
+    # >> If there is umatter, simply add this to the columns to be written, as
+    # >> the field "umat" (the dictionary, the fields and their definitions
+    # >> are not modified): [261018]
+
+    if len(umat) != 0 : 
+        list_fields.append('umat')
+        list_cols.append(umat)
+        list_defs.append('Unassigned matter')
+
+    # >> Build the field-names line, using pound-signs as separators, after the
+    # >> obligatory opening "++":
+
+    filo.write('++ ' + ' # '.join(list_fields) + '\n')
+
+    # >> Now print the field definitions (if field_defs is not empty)
+    # >> (replace any newline characters with "|NL|")
+
+    if len(field_defs) > 0 : # >> this conditional was added circa 101000
+
+        filo.write('** ' + ' # '.join([field_def.replace('\n','|NL|')
+                                       for field_def in list_defs]) + '\n')
+
+    # >> Determine the number of records, and write this many lines, printing
+    # >> the whole contents of the epdobase dcty, a block of records at a
+    # >> time.  All newline characters are replaced with "|NL|" because all
+    # >> contents of each record must lie on the same line.
+    
+    array_len = num_dict_records(s)  
+
+    for start in range(0,array_len,block_rows) :
+
+        block = slice(start, min(start + block_rows, array_len))
+
+        columns = [[str(val).replace('\n','|NL|') for val in column[block]] 
+                   for column in list_cols]
+
+        filo.write(''.join([' # '.join(vals) + '\n' 
+                            for vals in zip(*columns)]))
+
+    # >> Add the closing "++":
+
+    filo.write('++\n')
+
+# ==============================================================================
+#
+# 20100316-3521-mpuboo - Epdata parser
+#
+# <summary>
+# 
+# Parses an Epdata file: i.e., an Epdox database, with square-ref-tag entries.
+# </summary>
+#
+# <syntax>
+# 
+# db_dict = parse_epdata(file_path, start_tag, known_tags=None) </syntax>
+#
+# <inputs>
+#
+# Input "file_path" is the path to the epdata file, including the filename.  
+# (For the definition of the Epdata format, see {20100123-1918}).  The argument
+# "start_tag" is the value of the tag (the text enclosed in square brackets) 
+# that begins each entry of the database. If this is given as 'first_tag', then 
+# parse_epdata will simply use the first tag that it finds.  Kwarg "known_tags"
+# lists tags that should be fields even if the first entry lacks them (used
+# when the file is read in chunks; see {20261018-0930}). </inputs>
+#
+# <products>
+#
+# The output is a dictionary, whose keys correspond to the tags in each entry
+# of the database.  The first entry the epdata file *must* contain *all* 
+# possible tags.  If any of these are omitted in later entries, then the parser 
+# will assign "null" to those values.  If there is no unassigned matter, the
+# "gathered" unassigned matter will be an empty list. </products>
+# 
+# <dependencies>
+# 
+# re, filum </dependencies>
+#
+# <updated>
+#
+# - Previous updates: 2010.04.06; 2010.05.26; 2010.08.15; 
+# - Added support for double-ampersand brackets. [110530] 
+# - Added the "known_tags" kwarg. [261018] 
+# - Rewritten to read the lines once, with compiled patterns, rather than
+#   counting the entries first; a tag that first appears after the first
+#   entry is now filled with "null" for earlier entries. [261018] </updated>
+#
+# <notes>
+#
+# Note that the string next to a square reference tag can continue onto the next 
+# line, as in true Epdata files. 
+#
+# Lines are matched against the tag patterns only if they begin with "[" (or
+# "* [" for tag definitions), and each new entry adds an empty record to every
+# field, so no count of the entries is needed beforehand.  Documents whose
+# entries have the same tags, one per line, with no continued values,
+# unassigned matter or double-ampersands (e.g., tables written by
+# write_epdata()) are parsed in bulk by parse_epdata_in_bulk().  The results
+# are those of the former two-pass parser. </notes>
+#
+# ==============================================================================
+        
+def parse_epdata(strn, start_tag, known_tags = None) :
+
+    import re, filum
+
+    if known_tags is None : known_tags = []
+
+    # >> Documents whose entries all have the same tags, one per line, are
+    # >> parsed in bulk: [261018]
+
+    prsd = parse_epdata_in_bulk(strn, start_tag, known_tags)
+
+    if prsd is not None : return prsd
+
+    fili = strn.splitlines()  # >> Split string into a list of lines
+
+    # >> The pattern of the starting tag (from the beginning of a line).  If
+    # >> start_tag is 'first_tag', any tag will do until the first is found:
+
+    if start_tag == 'first_tag':
+
+        # !! Patterns were modified to accommodate leading whitespace [101027]
+
+        startag_pat = re.compile(r'^\s*\[(.*?)\](.*)') # >> Match the first tag
+
+    else :     
+
+        # >> Escape special characters :
+
+        start_tag = filum.fix_str_for_match(start_tag) 
+
+        startag_pat = re.compile(r'^\s*\[(' + start_tag + r')\](.*)')
+
+    found_start = False   # >> Whether the first start tag has been found
+
+    # >> The pattern of any other tag (from the beginning of a line):
+    
+    normtag_pat = re.compile(r'^\s*\[(.*?)\](.*)') # >> "?" means nongreedy
+
+    # >> The pattern of a tag definition:
+
+    defntag_pat = re.compile(r'^\* \[(.*?)\](.*)')
+
+    # >> Lines that begin with these are partitions / dividers:
+
+    partitions = ['-----', ':::::', '.....', '=====']
+
+# -- Parsing the file ----------------------------------------------------------
+        
+    item_num    = -1    # >> This will be used for counting the database entries
+    dubamp_mode = False # >> Keep track of whether in a double-ampersand bracket
+    
+    # These switches are (like dubamp_mode) used to keep track of state:
+
+    prev_line_had_content = False
+    prev_line_was_umatter = False
+    
+    db = {} # >> This will store the database
+
+    tag_list = [] # >> Will be used to keep order of tags (in order of apprnce)
+    tag_defs = {} # >> Will be used to hold tag definitions (if any are found)
+
+    # >> Will be used to store the "unassigned matter": data not associated with
+    # >> a specific field:
+
+    umat = [] 
+
+    # >> Tags that are known beforehand (e.g., from an earlier chunk of the
+    # >> same file) are given a list of entries even if the first entry lacks
+    # >> them: [261018]
+
+    for tag_name in known_tags : 
+        tag_list.append(tag_name)
+        db[tag_name] = []
+
+    # >> Main loop.  Entries that have not been filled are None, and entries
+    # >> that are continued over several lines are lists of the pieces, joined
+    # >> at the end: [261018]
+
+    for wline in fili :
+
+        line = wline.strip() # >> Ignore leading and trailing whitespace [100926]
+
+        # >> Only lines beginning with "[" can hold a tag, and only those
+        # >> beginning with "*" a tag definition:
+
+        tagmatch = None
+
+        if line[0:1] == '[' : 
+
+            patmatch = startag_pat.match(line)  # >> Try the start tag
+
+            if patmatch : 
+
+                # >> The first start tag found is the one that begins every
+                # >> entry:
+
+                if not found_start : 
+                    found_start = True
+                    startag_pat = re.compile(r'^\s*\[(' + patmatch.group(1) + 
+                                             r')\](.*)')
+
+                # >> Count up when you match the start_tag, and add an (empty)
+                # >> entry to each field and to the unassigned matter:
+
+                item_num += 1 
+
+                for tag_name in db : db[tag_name].append(None)
+                umat.append(None)
+
+            tagmatch = normtag_pat.match(line) # >> Try matching any tag
+
+        elif line[0:3] == '* [' : 
+
+            patmatch = defntag_pat.match(line) # >> Try matching a tag def
+
+            if patmatch : # >> If we've matched the pattern of a tag defintion
+
+                tag_defs[patmatch.group(1)] = patmatch.group(2).strip()
+           
+        # >> Act on a tag only if we're not inside of an ampersand bracket (and
+        # >> once the first entry has begun):
+                     
+        if tagmatch and not dubamp_mode and item_num > -1 : 
+                    
+            # >> First remove the bounding whitespaces from the tag value:
+
+            tag_name = tagmatch.group(1).strip()
+            
+            # >> Note it in the running list that maintains the tag order:
+
+            if tag_name not in tag_list : tag_list.append(tag_name)
+
+            # >> If this tag is in the first entry, create a list for the
+            # >> corresponding dictionary key.  A tag that first appears in a
+            # >> later entry is given empty entries for the earlier ones.
+
+            if item_num == 0 : db[tag_name] = [None]
+            elif tag_name not in db : db[tag_name] = [None] * (item_num + 1)
+        
+            # >> Search the string next to the tag for a double-ampersand, and
+            # >> toggle the double-ampersand mode accordingly (i.e., if there is
+            # >> one, then we're in a double-ampersand bracket):
+
+            strn = tagmatch.group(2)
+
+            if '&&' in strn : strn,dubamp_mode = dubamp(strn,dubamp_mode)
+    
+            # >> Now store the string next to the tag in the dictionary:
+            
+            db[tag_name][item_num] = strn.strip()
+                
+            prevtag = tag_name
+            
+            # >> This will tell the next iteration that there was
+            # >> field-associated content on this line (assigned matter):
+            
+            prev_line_had_content = True  
+        
+            # >> This will tell the next iteration that the this line was not
+            # >> made up of unassigned matter:
+
+            prev_line_was_umatter = False
+
+        elif item_num > -1: 
+            
+            # >> If no match, content is maybe continued from previous line.
+            # >> But we won't even try this until the first match.
+                
+            # >> See if there's anything on the current line: 
+                     
+            length_of_current_line = len(line)
+
+            # >> Determine whether current line is a partition / divider:
+                        
+            is_partition = length_of_current_line > 10 and \
+                line[0:5] in partitions
+                                                          
+            # >> If the previous line had content and the current one isn't
+            # >> empty and not a partition, then append it to the same
+            # >> dictionary entry as we did the previous line:
+        
+            if prev_line_had_content and length_of_current_line > 0 and \
+                not is_partition and not prev_line_was_umatter:
+
+                # >> Clean the line of double-ampersands and toggle the
+                # >> double-ampersand mode (i.e., double-ampersand bracket)
+                # >> accordingly: 
+
+                if '&&' in line : line,dubamp_mode = dubamp(line, dubamp_mode)
+
+                # >> Add it to the database
+
+                append_epdata_text(db[prevtag], item_num, '\n' + line)
+
+            # >> If the previous line had no content and the current one isn't
+            # >> empty and not a partition but we are inside of a
+            # >> double-ampersand bracket, then append it to the same dictionary
+            # >> entry as we did the previous line:
+
+            elif not prev_line_had_content and length_of_current_line > 0 \
+                    and not is_partition and not prev_line_was_umatter and \
+                    dubamp_mode :
+
+                # >> Clean the line of double-ampersands and toggle the
+                # >> double-ampersand mode (i.e., double-ampersand bracket)
+                # >> accordingly: 
+
+                if '&&' in line : line,dubamp_mode = dubamp(line, dubamp_mode)
+
+                # >> Add it to the database:
+
+                append_epdata_text(db[prevtag], item_num, '\n\n' + line)
+                        
+            # >> If the previous line had no content and the current one isn't
+            # >> empty and not a partition and we are not in a double ampersand
+            # >> bracket, then add this to the generic "unassigned matter"
+            # >> (umat) of the current record: matter not associated with any
+            # >> specific field.  Also tell next loop that we had no
+            # >> field-associated content on this iteration:
+        
+            elif not prev_line_had_content and length_of_current_line > 0 \
+                    and not is_partition and not dubamp_mode and not \
+                    prev_line_was_umatter:
+
+                append_epdata_text(umat, item_num, '\n' + wline) # >> w/wspace
+                prev_line_had_content = False
+
+                # >> This will tell the next loop that we're reading unassigned
+                # >> matter:
+
+                prev_line_was_umatter = True   
+
+            # >> Previous line was unassigned matter and current line is not a
+            # >> partition, and so we add it to the unassigned matter:    
+
+            elif not is_partition and prev_line_was_umatter : 
+
+                append_epdata_text(umat, item_num, '\n' + wline) # >> w/wspace
+
+            # >> Otherwise, tell next iteration we had no field-associated
+            # >> content this time:
+
+            else: prev_line_had_content = False                                
+                                
+    # >> This loop assigns to "null" all the fields that were not filled in:
+    # >> i.e., all fields that are still None, or made up entirely of 
+    # >> whitespace characters, or empty strings.  This is used to fill up the
+    # >> database (the dictionary) as well as the unassigned matter (umat).
+    # >> But if umat has *only* nulls, it is set equal to an empty list.
+    
+    for tag in db :         
+            
+        column = db[tag]
+
+        for i in range(0,len(column),1) :
+            
+            if isinstance(column[i], list) : column[i] = ''.join(column[i])
+
+            if column[i] is None or column[i].isspace() or \
+                    len(column[i]) == 0 : column[i] = 'null'
+
+    # >> Repeat for the unassigned matter & strip leading/trailing whitespace:
+
+    for i in range(0,len(umat),1) : 
+
+        if isinstance(umat[i], list) : umat[i] = ''.join(umat[i])
+
+        if umat[i] is None or len(umat[i]) == 0 : umat[i] = 'null'
+
+        umat[i] = umat[i].strip()  # >> wipe leading/trailing whitespace
+
+    # >> If umat has only null values, set it equal to an empty list:
+
+    if umat.count('null') == len(umat) : umat = []
+
+    return [db, tag_list, tag_defs, umat]
+
+# ..............................................................................
+
+# >> Parses Epdata in bulk, if possible: i.e., if there are no double-ampersands,
+# >> and if every entry holds the tags of the first entry, in the same order,
+# >> one per line, followed only by empty lines or partitions.  Returns what
+# >> parse_epdata() would, or None if the document must be parsed line by line.
+# >> The values of all entries are found by one regular expression, built from
+# >> the tags of the first entry. [261018]
+
+def parse_epdata_in_bulk(strn, start_tag, known_tags) : 
+
+    import re
+
+    if '&&' in strn : return None
+
+    # >> Lines are only split at newlines here (str.splitlines() also splits
+    # >> at a few other characters):
+
+    if '\r' in strn : strn = strn.replace('\r\n','\n')
+
+    for char in ['\r', '\x0b', '\x0c', '\x1c', '\x1d', '\x1e', '\x85'] : 
+        if char in strn : return None
+
+    if not isinstance(strn, bytes) and \
+            ('\u2028' in strn or '\u2029' in strn) : return None
+
+    tag_pat = re.compile(r'^[^\S\n]*\[(.*?)\](.*)$', re.M)
+
+    first = tag_pat.search(strn)
+
+    if first is None : return None
+
+    # >> The first tag must be the start tag, and must hold no characters that
+    # >> are special in regular expressions (which the start tag is matched as):
+
+    start = first.group(1)
+
+    if start_tag != 'first_tag' and start != start_tag : return None
+    if not re.match(r'^[\w \-]*$', start) : return None
+
+    # >> Tag definitions are found before the first entry:
+
+    tag_defs = {}
+
+    for line in strn[0:first.start()].splitlines() : 
+        
+        patmatch = re.match(r'^\* \[(.*?)\](.*)', line.strip())
+        if patmatch : tag_defs[patmatch.group(1)] = patmatch.group(2).strip()
+
+    body = strn[first.start():]
+
+    if not body.endswith('\n') : body += '\n'
+
+    # >> The tags of the first entry (up to the next start tag):
+
+    first_tags = []
+
+    for patmatch in tag_pat.finditer(body) : 
+        if patmatch.group(1) == start and len(first_tags) > 0 : break
+        first_tags.append(patmatch.group(1))
+
+    tag_names = [tag.strip() for tag in first_tags]
+
+    if len(set(tag_names)) != len(tag_names) or len(tag_names) > 90 : 
+        return None
+
+    # >> One match of the pattern is one entry; any other line is matched on
+    # >> its own by the last group, and sends the document to the line-by-line
+    # >> parser:
+
+    wspace = r'[^\S\n]*'
+
+    entry_pat = ''
+
+    for tag in first_tags : 
+        entry_pat += wspace + r'\[' + re.escape(tag) + r'\](.*)\n'
+
+    entry_pat += r'(?:' + wspace + r'\n|' + wspace + \
+        r'(?:-----|:::::|\.\.\.\.\.|=====)[^\n]{5,}\S' + wspace + r'\n)*'
+
+    entries = re.findall(r'(?:' + entry_pat + r')|([^\n]*\n)', body)
+
+    columns = list(zip(*entries))
+
+    if any(columns[-1]) : return None
+
+    # >> Populate the fields, with "null" for empty values:
+
+    db       = {}
+    tag_list = []
+
+    for tag_name in known_tags : 
+        tag_list.append(tag_name)
+        db[tag_name] = ['null'] * len(entries)
+
+    for k in range(0,len(tag_names),1) : 
+
+        if tag_names[k] not in tag_list : tag_list.append(tag_names[k])
+
+        db[tag_names[k]] = [val.strip() or 'null' for val in columns[k]]
+
+    return [db, tag_list, tag_defs, []]
+
+# ..............................................................................
+
+# >> Appends "text" to entry i of the list "column", where continued entries
+# >> are kept as lists of pieces (rather than adding to a string, which gets
+# >> slower as the string gets longer). [261018]
+
+def append_epdata_text(column, i, text) : 
+
+    if column[i] is None : column[i] = [text]
+    elif isinstance(column[i], list) : column[i].append(text)
+    else : column[i] = [column[i], text]
+
+# ..............................................................................
+
+# >> Simple method for striking double-ampersands and indicating to the
+# >> interpreter that we are currently reading a double-ampersand bracket.
+
+def dubamp(line, dubamp_mode) : 
+
+    if '&&' in line:
+
+        line = line.replace('&&','').strip()
+        dubamp_mode = True - dubamp_mode
+
+    return line,dubamp_mode
+                        
+# ==============================================================================
+#
+# 20100526-1824-mpuboo - Write Epdata
+# 
+# <summary>
+#
+# Writes an epdobase to epdata format (N.B. all arrays must be m x 1) </summary>
+#
+# <syntax>
+# 
+# strn = write_epdata(dcty, fields, field_defs, umat, filo = None, 
+#                     block_rows = 10000) </syntax>
+#
+# <inputs>
+# 
+# The argument "dcty" is a dictionary having the same format as an epdobase dcty
+# variable (see {20100527-1045}). The argument "fields" is equivalent to an
+# epdobase flds variable (a list of field names), and field_defs corresponds to
+# the "defs" variable of an epdobase object (a list of field definitions).  Note
+# that "fields" can be set to an empty string or an empty list, in which case it
+# will be filled using the keys() method.  If "field_defs" is empty, then the
+# fields will not be defined in the epdata file. 
+#
+# Kwarg "filo" is a file object (or any object with a write() method), opened
+# for writing, to which the epdata is written "block_rows" records at a time; if
+# it is None, the epdata is returned as a string instead. </inputs>
+#
+# <products>
+# 
+# This method writes the contents of the injested epdobase elements to an
+# epdata-formatted string "strn" which can, in turn, be written to a
+# file, or writes it to "filo" directly. </products>
+#
+# <type>
+# 
+# Function </type>
+#
+# <updates> 
+# 
+# - Added support for double-ampersand brackets. [110530] 
+# - Added support for continguous-text blocks. [110530] 
+# - Writes to a file object a block of records at a time. [261018] </updates>
+#
+# <notes> </notes>
+#
+# ==============================================================================
+
+def write_epdata(s, fields, field_defs, umat, filo = None, block_rows = 10000) :
+
+    import io
+
+    # >> Without a file, write to an in-memory buffer and return its contents:
+
+    if filo is None : 
+        filo = io.StringIO()
+        write_epdata(s, fields, field_defs, umat, filo, block_rows)
+        return filo.getvalue()
+
+    # >> Grab fields from dictionary keys if necessary:
+    
+    if len(fields) == 0 : list_fields = s.keys()
+    else : list_fields = fields
+
+    array_len = num_dict_records(s)    
+
+    partition = '-' * 80 + '\n'
+
+    # >> If there are field definitions, print them first:
+
+    if len(field_defs) == len(fields) :
+
+        for field in fields:
+            filo.write('* [' + field + '] ' + field_defs[field] + '\n')
+
+        # >> Then add a partition:
+
+        filo.write('\n' + partition)
+
+    # >> Main loop for printing dictionary contents, whose pieces are written a
+    # >> block of records at a time:
+
+    pieces = []
+
+    for i in range(0, array_len, 1) :
+
+        pieces.append('\n')
+
+        for field in list_fields : 
+
+            val = str(s[field][i])
+
+            # >> Print field and its value having double-ampersand brackets
+            # >> (indicated by two newline characters in a row): [110530]
+
+            if '\n\n' in val :
+                pieces.append('\n[' + str(field) + '] && ' + val + ' &&\n\n')
+
+            # >> Print field and its value if has line continuation (i.e., a
+            # >> contiguous text block, indicated any newline characters):
+            # >> [110530]
+
+            elif '\n' in val :
+                pieces.append('\n[' + str(field) + '] ' + val + '\n\n')
+
+            # >> Print the normal, single-line field and its value:
+                
+            else :
+                pieces.append('[' + str(field) + '] ' + val + '\n')
+
+        # >> ... an ampersand-bracket field or continuing field already got two
+        # >> newline characters appended to the end:
+
+        if '\n' not in val : pieces.append('\n')
+
+        # >> Also print unassigned matter:
+
+        if len(umat) > 0 :
+            if umat[i] != 'null' : 
+                pieces.append(umat[i])
+
+                if umat[i][-2:] == '\n\n' : pass
+                elif umat[i][-1:] == '\n' : pieces.append('\n')
+                else: pieces.append('\n\n')
+
+        pieces.append(partition)
+
+        if (i + 1) % block_rows == 0 : 
+            filo.write(''.join(pieces))
+            pieces = []
+
+    filo.write(''.join(pieces))
+
+    
+# ==============================================================================
+#
+# 20100526-1826-mpuboo - Get number of records
+#
+# <summary>
+#
+# Returns length of epdobase dictionary or -1 if field lengths differ.</summary>
+#
+# <syntax>
+# 
+# array_len = num_dict_records(dictry) </syntax>
+#
+# <inputs>
+# 
+# Sole input, dictry, has the format of an epdobase dictionary (i.e., the "dcty"
+# variable in an epdobase object). </inputs>
+#
+# <products>
+# 
+# Output is just an integer equal to the number of records in the dictionary
+# field: i.e., the number of elements in the single list assigned to each
+# dictionary key. </products>
+#
+# <type>
+# 
+# Function </type>
+#
+# <updates> </updates>
+#
+# <notes> </notes>
+#
+# ==============================================================================
+
+def num_dict_records(s) :
+
+    unequal_lengths = False
+    list_fields = list(s.keys())  # >> Get all dictionary keys
+
+    # >> The lengths of the columns of dcty or ndct are found without
+    # >> converting them (see {20261018-1430}): [261018]
+
+    if isinstance(s, cl_epdocolumns) : lengths = s.lengths()
+    else : lengths = dict([(field, len(s[field])) for field in list_fields])
+
+    if len(list_fields) == 0 : array_len = 0 
+    else: array_len = lengths[list_fields[0]] # >> Num. of records of 1st field
+
+    # >> Confirm that all fields have same length (otherwise return -1)
+
+    for field in list_fields : 
+        if lengths[field] != array_len :
+             unequal_lengths = True
+             print('! Warning: the epdobase columns have ' + \
+                       'an unequal number of records.\n\n')
+             print(field,lengths[field])
+             
+    if unequal_lengths: return -1
+    else: return array_len
+
+# ==============================================================================
+#
+# 20100704-2216-mpuboo - Get matching records
+# 
+# <summary>
+# 
+# Returns index of any & all records matching input values for specific fields
+# </summary>
+#
+# <syntax>
+# 
+# any_matched,all_matched = get_matching_records(dcty, valdict, match_type, 
+#                                               indices = None) </syntax>
+#
+# <inputs>
+# 
+# The input "dcty" is the dictionary on which the matching is performed.  The
+# input "valdict" is a dictionary whose fields are the fields in "dcty" to be
+# matched, whose values are the values of the records in "dcty" to be matched.
+# For example, suppose "dcty" has the fields "height_in_meters" and
+# "weight_in_lbs" and "color" and you wish to find all items weighing "50" lbs
+# or "40" lbs that are "blue" (or that are blue). Then,
+#
+# : valdict = {'weight_in_lbs': [40, 50], 'color' : 'blue'} 
+#
+# The argument "match_type" is a string equal to "partial" (for partial
+# matching: i.e., a match occurs if the sought value is contained in a record)
+# or "exact" (for exact matching: i.e., a match occurs if the sought value is
+# exactly matched.  Kwarg "indices" is a dictionary of indices of some of the
+# fields, by field name (see the method create_index() of cl_epdobase): for
+# exact matching, hash indices as built by make_hash_index(), in which the
+# values are looked up; for partial matching, trigram indices as built by
+# make_trigram_index(), which narrow down the records to be checked. 
+# </inputs>
+# 
+# <products>
+# 
+# The first product "any_matched" will return the indices of all records that
+# match any of the values in valdict for the keys specified in valdict.  In the
+# above example, this means all items that are 40 lbs or 50 lbs or that are
+# blue.  The second product "all_matched" will return all records that match at
+# least one value in each key.  This will return all objects that are 40 lbs and
+# blue or 50 lbs and blue, but not any objects that are not blue, and that do
+# not weigh 40 lbs or 50 lbs.  </products>
+#
+# <type>
+# 
+# Function </type>
+#
+# <updated>
+#
+# - "match_type" added for partial matching ("searching") option. [100821]
+# - Added the "indices" kwarg; records are no longer deduplicated by searching
+#   lists, which was quadratic in the number of matches. [261018]
+# - Partial matching uses trigram indices, if given. [261018]
+#
+# <dependencies>
+# 
+# numpy </dependencies>
+#
+# ==============================================================================
+
+def get_matching_records(dcty, valdict, match_type, indices = None) :
+
+    import numpy as np
+
+    if indices is None : indices = {}
+
+    # >> Sets of the records that match for each key, and the list of records
+    # >> that had at least one match in at least one key (each mentioned once,
+    # >> in the order found): [261018]
+
+    matches_per_key = {}  
+
+    any_matched = []
+    found       = set()
+    
+    # >> This will store the fields that are being matched: 
+
+    match_keys = list(valdict.keys())
+
+    # >> For each key...
+    
+    for key in match_keys :
+
+        vals = valdict[key] # >> Store the matching values...
+
+        # >> ... if there's only one, store it as a list...
+
+        if not isinstance(vals,type([1,2,3])) : vals = [vals];
+
+        # >> ... find all records under the current key in dict that match each
+        # >> of the stipulated values; note also that each val is converted to a
+        # >> string in case that is not already so.  Exact matches are looked
+        # >> up in the key's hash index, if it has one, or else the column is
+        # >> compared with each value, as an array made once per key:
+
+        if match_type == "exact" and key not in indices : 
+            column = np.array(dcty[key])
+
+        matches = []
+
+        for val in vals :
+            
+            if match_type == "exact" and key in indices : 
+                matches += indices[key].get(str(val), [])
+            elif match_type == "exact" : 
+                matches += np.nonzero(column == str(val))[0].tolist()
+            elif match_type == "partial" and key in indices : 
+                matches += find_indexed_partial_matches(dcty[key], str(val),
+                                                        indices[key])
+            elif match_type == "partial" : 
+                matches += find_partial_matches(dcty[key], str(val))
+
+        matches_per_key[key] = set(matches)
+
+        for item in matches : 
+            if item not in found : 
+                found.add(item)
+                any_matched.append(item)
+
+    # >> Now we turn to finding records that have at least one match in each
+    # >> key: 
+
+    all_matched = [item for item in any_matched 
+                   if all([item in matches_per_key[key] for key in match_keys])]
+    
+    return any_matched, all_matched
+
+# ..............................................................................
+
+# >> Returns the indices of the records of "column" (a list of strings) that
+# >> contain the string "val", as omnigenus.findall_partial_matches() does,
+# >> testing all records in one comprehension, or, if "column" is an array
+# >> of strings, in one numpy operation. [261018]
+
+def find_partial_matches(column, val) : 
+
+    if isinstance(column, np.ndarray) and column.dtype.kind in 'SU' : 
+        return np.nonzero(np.char.find(column, val) >= 0)[0].tolist()
+
+    return [i for i, rec in enumerate(column) if val in rec]
+
+# ..............................................................................
+
+# >> Returns the indices of the records of "column" that contain the string
+# >> "val", given the trigram index "index" of the column (see
+# >> make_trigram_index()): only the records that hold all the trigrams of
+# >> "val" are checked.  Values shorter than three characters have no
+# >> trigrams, so all records are checked. [261018]
+
+def find_indexed_partial_matches(column, val, index) : 
+
+    if len(val) < 3 : return find_partial_matches(column, val)
+
+    keys, bounds, rows = index
+
+    # >> The records holding each trigram of val, fewest first:
+
+    val_keys = np.unique(trigram_keys(val))
+    locs = np.searchsorted(keys, val_keys)
+
+    if len(keys) == 0 or np.any(locs == len(keys)) : return []
+    if np.any(keys[locs] != val_keys) : return []
+
+    postings = [rows[bounds[loc]:bounds[loc+1]] for loc in locs]
+    postings.sort(key = len)
+
+    candidates = postings[0]
+
+    # >> Intersecting with much longer lists costs more than checking the
+    # >> candidates would:
+
+    for posting in postings[1:] : 
+        if len(posting) > 8 * len(candidates) : break
+        candidates = np.intersect1d(candidates, posting, assume_unique = True)
+
+    return [i for i in candidates.tolist() if val in column[i]]
+
+# ..............................................................................
+
+# >> Returns a trigram index of "column" (a list of strings): the sorted array
+# >> of the distinct trigrams (three-character substrings) of its records,
+# >> as keys (see trigram_keys()), and, for the trigram at each position of
+# >> that array, the indices of the records holding it, in order, found in
+# >> the array of record indices, from the corresponding bound to the next.
+# >> The trigrams are found with array operations, "block_rows" records at a
+# >> time. [261018]
+
+def make_trigram_index(column, block_rows = 100000) : 
+
+    block_keys = [np.zeros(0, dtype = np.uint64)]
+    block_rows_found = [np.zeros(0, dtype = np.int64)]
+
+    for start in range(0,len(column),block_rows) : 
+
+        recs = column[start:start+block_rows]
+        lens = np.fromiter(map(len, recs), dtype = np.int64, count = len(recs))
+
+        # >> The trigram starting at each character, its record, and whether
+        # >> it lies within that record:
+
+        keys = trigram_keys(''.join(recs))
+        recs_of_chars = np.repeat(np.arange(len(recs)), lens)[:len(keys)]
+        within = np.arange(len(keys)) + 3 <= np.cumsum(lens)[recs_of_chars]
+
+        block_keys.append(keys[within])
+        block_rows_found.append(recs_of_chars[within] + start)
+
+    # >> Sorting stably by trigram keeps the records of each in order, so a
+    # >> trigram found more than once in a record is found in a row:
+
+    keys = np.concatenate(block_keys)
+    rows = np.concatenate(block_rows_found)
+
+    order = np.argsort(keys, kind = 'stable')
+    keys = keys[order]
+    rows = rows[order]
+
+    distinct = np.ones(len(keys), dtype = bool)
+    distinct[1:] = (keys[1:] != keys[:-1]) | (rows[1:] != rows[:-1])
+
+    keys = keys[distinct]
+    rows = rows[distinct]
+
+    firsts = np.flatnonzero(np.append(True, keys[1:] != keys[:-1])[:len(keys)])
+    bounds = np.append(firsts, len(keys))
+
+    return keys[firsts], bounds, rows
+
+# ..............................................................................
+
+# >> Returns the trigram starting at each character of the string "strn" (all
+# >> but the last two) as an integer key, made of the codes of its three
+# >> characters (21 bits apiece). [261018]
+
+def trigram_keys(strn) : 
+
+    codes = np.frombuffer(strn.encode('utf-32-le'), dtype = np.uint32)
+    codes = codes.astype(np.uint64)
+
+    if len(codes) < 3 : return np.zeros(0, dtype = np.uint64)
+
+    return (codes[:-2] << np.uint64(42)) | (codes[1:-1] << np.uint64(21)) | \
+           codes[2:]
+
+# ..............................................................................
+
+# >> Returns a hash index of "column" (a list of values): a dictionary whose
+# >> keys are the values, and whose values are the lists of the indices of the
+# >> records holding them, in order (see create_index()). [261018]
+
+def make_hash_index(column) : 
+
+    index = {}
+
+    for i, val in enumerate(column) : 
+        if val in index : index[val].append(i)
+        else : index[val] = [i]
+
+    return index
+
+
+# ==============================================================================
+#
+# 20100821-1803-mpuboo - Simple sorting of an Epdobase
+# 
+# <summary>
+# 
+# Sorts all records in an epdobase (all columns) according to the values in one
+# column, or several, in forward or reverse order.  </summary>
+#
+# <syntax>
+# 
+# sort_epdobase_simple(ep, field, whether_reverse) </syntax>
+#
+# <inputs>
+# 
+# Input "ep" is an Epdobase object.  Input "field" is the field name or column
+# that will determine the sort order, or a list of them, the first of which
+# decides first, ties being decided by the next, and so on.  Final input
+# "whether_reverse" should be True if the sort order is to be reverse, and
+# False otherwise, or a list of these, one per field.  Numerized fields (in
+# ndct) are sorted as numbers, nulls last; others are sorted as strings (see
+# Python docs for a discussion of the sort order for characters of different
+# classes, e.g., numeric versus alphabet characters). </inputs>
+#
+# <products>
+# 
+# The input ep has been been resorted: its dcty, ndct and unassigned matter 
+# (if it has one record of it per record).  </products>
+#
+# <type>
+# 
+# Function </type>
+#
+# <dependencies>
+# 
+# numpy </dependencies>
+#
+# <updates>
+#
+# - The sort order is found with one stable sort of the key columns, instead
+#   of looking up each sorted value among the originals, which was quadratic
+#   in the number of records; numbers are no longer sorted as strings; several
+#   fields may be sorted by; ndct and unassigned matter are sorted too. 
+#   [261018]
+#
+# </updates>
+#
+# <notes>
+#
+# The sort is stable: records with equal values keep their order, also in
+# reverse order (as with Python's sorted()). </notes>
+#
+# ==============================================================================
+
+def sort_epdobase_simple(ep, field, whether_reverse) :
+
+    if not isinstance(field, list) : field = [field]
+
+    if not isinstance(whether_reverse, list) : 
+        whether_reverse = [whether_reverse] * len(field)
+
+    nrecs = ep.len()
+
+    # >> First find the sort order of the columns indicated by "field", so
+    # >> that this can be applied to all the fields; np.lexsort sorts by its
+    # >> last key first: [261018]
+
+    keys = [sort_key_column(ep, fld, rev, nrecs) 
+            for fld, rev in zip(field, whether_reverse)]
+
+    sort_order = np.lexsort(keys[::-1])
+
+    # >> Now sort all columns using the same sort-order, strings in place (a
+    # >> tracked list is sorted along with its numbers, so it isn't marked as
+    # >> changed; see {20261018-1500}):
+
+    sort_order_lst = sort_order.tolist()
+
+    for fld in ep.strs : 
+        column = ep.strs[fld]
+        if len(column) != nrecs : continue
+        elif isinstance(column, list) : 
+            list.__setitem__(column, slice(None), 
+                             [column[i] for i in sort_order_lst])
+        else : ep.strs[fld] = take_rows(column, sort_order)
+
+    for fld in ep.nums : 
+        if len(ep.nums[fld]) == nrecs : 
+            ep.nums[fld] = take_rows(ep.nums[fld], sort_order)
+
+    if len(ep.umat) == nrecs : 
+        ep.umat[:] = [ep.umat[i] for i in sort_order_lst]
+
+# ..............................................................................
+
+# >> Returns the column of the field "fld" of the epdobase "ep" that its
+# >> records are sorted by: ndct's column, if it is numeric, or else dcty's,
+# >> as an array.  Masked records are replaced by the largest value, and, if
+# >> "whether_reverse", the values by their ranks, reversed.  Nulls (NaN or
+# >> masked records) are given the largest key either way, so that they sort
+# >> last in both orders. [261018]
+
+def sort_key_column(ep, fld, whether_reverse, nrecs) : 
+
+    column = ep.ndct.get(fld)
+
+    if column is None or len(column) != nrecs or \
+       np.asarray(column).dtype.kind not in 'biuf' : 
+        column = np.array(ep.dcty[fld])
+
+    if not whether_reverse and not np.ma.isMaskedArray(column) : return column
+
+    data = np.ma.getdata(column)
+
+    ranks = np.unique(data, return_inverse = True)[1]
+    ranks = ranks.reshape(-1)
+
+    # >> Only the ranks of values are reversed; nulls rank after all of them:
+
+    if whether_reverse and len(ranks) > 0 : ranks = ranks.max() - ranks
+
+    nulls = np.ma.getmaskarray(column)
+    if data.dtype.kind == 'f' : nulls = nulls | np.isnan(data)
+
+    ranks[nulls] = len(ranks)
+
+    return ranks
+
+# ==============================================================================
+#
+# 20100821-2045-mpuboo - Numerize Epdobase
+# 
+# <summary>
+# 
+# Converts all numeric strings to numeric types, stores them in "ndct"</summary>
+#
+# <syntax>
+# 
+# numerize_epdobase(ep, precision = 'double', schema = None) </syntax>
+#
+# <inputs>
+# 
+# Input "ep" is an Epdobase object.  Keyword argument "precision" specifies the
+# number of bits of precision, which may be 'single' (32-bit) or 'double'
+# (64-bit), where 'double' precision is the default.  Keyword argument "schema"
+# is a dictionary whose keys are field names and whose values declare the type
+# of each of those fields (see numerize_column_schema() below), e.g., 
+#
+#   {'x' : {'dtype' : 'float32', 'scale' : 0.01}, 'y' : ... } 
+#
+# for LMI.ino output in centimeters, to be read in meters. </inputs>
+#
+# <products>
+# 
+# Input "ep" is modified so all columns in the dictionary .dcty are converted to
+# numpy arrays.  Lists of pure integers are converted to numpy arrays of single
+# or double precision integers.  Lists of floats and integers are converted to
+# numpy arrays of single or double precision floats.  Lists of floats and
+# integers and strings or floats and strings or integers and strings are
+# converted to numpy arrays of strings.  Note that "null" values are not counted
+# as strings, and are converted to numpy NaNs at the outset.  If the input
+# epdobase ep already has a numerized version of dcty stored in ndct, then it is
+# overwritten.  The columns are converted as they are read from ndct, and kept
+# until their strings are changed and numerize() is called again. </products>
+#
+# <type>
+# 
+# Function </type>
+#
+# <dependencies>
+# 
+# copy, numpy </dependencies>
+#
+# <updates>
+#
+# - ndict columns are now numpy arrays instead of lists [101027]
+# - vectorized conversion to numpy arrays (was looping over records) [101027]
+# - given empty cells (''), numerize often failed to convert numbers [150809]
+# - precision is now always 64 bit; left bogus kwarg for compatibility [150810]
+# - fields declared in a schema are converted directly to their type [261018]
+# - the string columns are no longer deep-copied first; fields only held as
+#   numbers (see {20100527-1045}) are left as they are [261018]
+# - fields are converted when they are next read from ndct, and only if their
+#   strings (or declared types) were changed (see {20261018-1500}) [261018]
+#
+# </updates> 
+#
+# <notes>
+#
+# Unassigned matter is ignored. 
+#
+# Also note that since there are no integer nans, any column that has null
+# values and integers will be converted to a floating point array! (with nans in
+# the nulls). [150810] 
+#
+# Fields declared in a schema skip the cascade of attempted conversions (int,
+# then float, then string) that is otherwise run over each whole column, and
+# keep their declared type even if they hold nulls: integer columns with nulls
+# are masked arrays instead.  The schema can be inferred from a sample of the
+# file with infer_schema() (see {20261018-1100}). [261018] 
+#
+# As before, ndct only follows changes made to the strings of dcty when
+# numerize() is called: a field whose strings are changed in place (by item
+# or slice assignment, append(), extend(), sort(), del, etc.) keeps its old
+# numbers in ndct until then.  numerize() itself converts nothing; it drops
+# the numbers of the changed fields, which ndct converts again when each is
+# next read, and keeps the numbers (the same arrays) of the others, so that
+# numbers changed in place in ndct are not lost either. [261018] </notes>
+#
+# ==============================================================================
+
+def numerize_epdobase(ep, precision = None, schema = None):
+
+    import numpy as np      # >> Numerical Python 
+
+    if schema is None : schema = {}
+
+# -- Loop over fields ----------------------------------------------------------
+
+    # >> The numbers of fields whose strings were changed, or whose declared
+    # >> type was, are dropped; ndct converts the strings again when the
+    # >> field is read (the fields only held as numbers are numeric already):
+    # >> [261018]
+
+    for field in ep.flds : 
+
+        if field not in ep.strs or field not in ep.nums : continue
+
+        if strings_changed(ep.strs[field]) or \
+                ep.schm.get(field) != schema.get(field) : 
+            del ep.nums[field]
+
+    # >> ndct converts the fields of a declared type straight to that type:
+
+    ep.schm = dict(schema)
+
+# ..............................................................................
+
+# >> Converts a single column (a list or array of strings) to the numeric type
+# >> that fits all of its records, exactly as numerize_epdobase() does for each
+# >> field.  This was split out of numerize_epdobase() so that the CSV parser
+# >> can numerize columns as it reads them. [261018]
+
+def numerize_column(column, precision = None) :
+
+    column_arr = np.array(column)
+
+    # >> First replace all "nulls" with "NaN":
+    # !! I already tried with ::column_arr[inds_nulls] = np.nan::
+
+    flag_nulls = column_arr == 'null' 
+    flag_empty = column_arr == ''
+
+    inds_not_empty   = np.nonzero(1 - (flag_nulls + flag_empty))[0]
+
+    if len(inds_not_empty) == len(column) : 
+        no_empty_records = True
+    else:
+        no_empty_records = False
+
+    column_arr_short = column_arr[inds_not_empty] 
+
+    # >> Prior to 2010.10.27, this method looped over individual records to
+    # >> determine the appropriate type conversion.  Now, all records of a
+    # >> field are converted to float or integer arrays, all at once.  First
+    # >> we try converting all values to ints.  If this fails, we try
+    # >> converting all values to floats.  If this fails, the column is
+    # >> converted to a numpy array of strings:
+
+    try : tmp = np.int64(column_arr_short)
+    except: 
+        try: tmp = np.float64(column_arr_short)
+        except:
+            try: tmp = np.array(column_arr_short)
+            except: print('Epdobase: error: numerize() choked on ndct.')
+
+
+    if (tmp.dtype == np.array([1.,2.]).dtype or \
+            tmp.dtype == np.array([1,2]).dtype) and not no_empty_records:
+
+        # column had empty records, and the rest were numbers
+
+        if precision == 'double': tmp = np.float64(tmp)
+        elif precision == 'single': tmp = np.float32(tmp)
+
+        column_nan = np.nan + np.zeros(column_arr.shape)
+        column_nan[inds_not_empty] = tmp
+        return column_nan
+
+    elif not no_empty_records: # column had empty records, but no numbers
+
+        return column_arr
+
+    else: # column had no empty records
+
+        return tmp
+
+# ..............................................................................
+
+# >> Converts a single column to the type declared for it by "spec", a dict with
+# >> the keys 'dtype' (a numpy type name, such as 'int16', 'float32' or 'str'),
+# >> 'null' (a sentinel value, or list of them, to be read as null, besides
+# >> "null" and empty strings), and 'scale' (a factor applied to every value,
+# >> e.g., 0.01 for cm -> m).  Any key may be left out; the default type is
+# >> 'float64'.  The column may hold strings (as in dcty) or numbers (e.g., the
+# >> columns of an Epdobin file, in which NaNs are nulls).  Null records are
+# >> NaN in float columns, while integer columns with nulls are returned as
+# >> masked arrays (numpy.ma), masked at the nulls.  Raises ValueError if the
+# >> values don't fit the declared type. [261018]
+
+def numerize_column_schema(column, spec) :
+
+    dtype = np.dtype(spec.get('dtype', 'float64'))
+    scale = spec.get('scale', None)
+    nulls = spec.get('null', [])
+
+    if not isinstance(nulls, list) : nulls = [nulls]
+
+    column_arr = np.asarray(column)
+
+    # >> Strings are kept as they are, as numerize_column() keeps a column
+    # >> that isn't numeric:
+
+    if dtype.kind in 'US' : return column_arr.astype(str)
+
+    if dtype.kind not in 'iuf' : 
+        raise ValueError('Epdobase: schema type ' + dtype.name + \
+                             ' is not supported.')
+
+    # >> Flag the null records:
+
+    if column_arr.dtype.kind in 'USO' : 
+
+        column_arr = column_arr.astype(str)
+        flag_nulls = np.isin(column_arr, 
+                             ['null', ''] + [str(null) for null in nulls])
+    else : 
+
+        flag_nulls = np.zeros(column_arr.shape, dtype = bool)
+
+        if column_arr.dtype.kind == 'f' : flag_nulls |= np.isnan(column_arr)
+
+        for null in nulls : 
+            try : flag_nulls |= column_arr == float(null)
+            except ValueError : pass
+
+    some_nulls = bool(np.any(flag_nulls))
+
+    if some_nulls : vals = column_arr[~flag_nulls]
+    else : vals = column_arr
+
+    # >> Convert the other records in one step:
+
+    try : vals = convert_column_values(vals, dtype, scale)
+    except (ValueError, OverflowError) : 
+        raise ValueError('Epdobase: column values do not fit schema type ' + \
+                             dtype.name + '.')
+
+    if not some_nulls : return vals
+
+    if dtype.kind == 'f' : 
+        column_out = np.full(column_arr.shape, np.nan, dtype = dtype)
+    else : 
+        column_out = np.zeros(column_arr.shape, dtype = dtype)
+
+    column_out[~flag_nulls] = vals
+
+    if dtype.kind == 'f' : return column_out
+
+    return np.ma.masked_array(column_out, mask = flag_nulls)
+
+# ..............................................................................
+
+# >> Converts an array of strings or numbers (with no nulls) to the numeric type
+# >> "dtype", after multiplying by "scale" (unless it is None).  Integer types
+# >> receive rounded values if a scale is given, and otherwise only whole
+# >> numbers within their range. [261018]
+
+def convert_column_values(vals, dtype, scale) :
+
+    if scale is not None : 
+
+        vals = vals.astype(np.float64) * scale
+
+        if dtype.kind in 'iu' : vals = np.round(vals)
+
+    elif dtype.kind == 'f' : return vals.astype(dtype)
+
+    elif vals.dtype.kind in 'US' : 
+
+        # >> Strings are parsed as integers of the declared type directly
+        # >> (numpy raises on decimals and on values out of range):
+
+        return vals.astype(dtype)
+
+    elif vals.dtype.kind == 'f' and not np.all(vals == np.round(vals)) : 
+        raise ValueError('Epdobase: column holds decimals.')
+
+    if dtype.kind in 'iu' and len(vals) > 0 : 
+
+        limits = np.iinfo(dtype)
+
+        if vals.min() < limits.min or vals.max() > limits.max : 
+            raise OverflowError('Epdobase: column is out of range.')
+
+    return vals.astype(dtype)
+        
+# ==============================================================================
+#
+# 20261018-1100-mpuboo - Infer a column schema from a sample of records
+# 
+# <summary>
+# 
+# Guesses the type of each field from the first records of a file </summary>
+#
+# <syntax>
+# 
+# schema = infer_schema(filepath, format, sample_rows = 1000) </syntax>
+#
+# <inputs>
+# 
+# Input "filepath" is the path of the file, and "format" is its format, as
+# given to iter_chunks() (see {20261018-0930}).  Kwarg "sample_rows" is the
+# number of records that are read. </inputs>
+#
+# <products>
+# 
+# A schema, as taken by numerize_epdobase() (see {20100821-2045}), declaring
+# 'int64', 'float64' or 'str' for each field, according to the type that
+# numerize gives its column in the sample. </products>
+#
+# <type>
+# 
+# Function </type>
+#
+# <dependencies>
+# 
+# numpy </dependencies>
+#
+# <notes>
+#
+# Only the sample is read and numerized, once, so the schema can be inferred
+# from one file of a survey and used to load the others.  Fields whose sampled
+# records are all null are left out of the schema, and so are still numerized
+# the usual way.  A field of whole numbers in the sample may of course hold
+# decimals later on, in which case loading with the schema raises ValueError;
+# declared types can be corrected (or narrowed, e.g., to 'int16') by editing
+# the schema before use. </notes>
+#
+# ==============================================================================
+
+def infer_schema(filepath, format, sample_rows = 1000) :
+
+    schema = {}
+
+    chunks = iter_chunks(filepath, format, chunk_rows = sample_rows)
+
+    try : sample = next(chunks, None)
+    finally : chunks.close()
+
+    if sample is None : return schema
+
+    if format != 'csv' : sample.numerize()
+
+    for field in sample.flds : 
+
+        column = np.asarray(sample.ndct[field])
+
+        if   column.dtype.kind == 'i' : schema[field] = {'dtype' : 'int64'}
+        elif column.dtype.kind == 'f' : 
+            if not np.all(np.isnan(column)) : 
+                schema[field] = {'dtype' : 'float64'}
+        elif not np.all(np.isin(column, ['null', ''])) : 
+            schema[field] = {'dtype' : 'str'}
+
+    return schema
+
+# ==============================================================================
+#
+# 20100821-2100-mpuboo - Characterize Epdobase
+# 
+# <summary>
+# 
+# Converts the numeric dictionary (ndct) to strings, overwriting dcty </summary>
+#
+# <syntax>
+# 
+# characterize_epdobase(ep, fields = None) </syntax>
+#
+# <inputs>
+# 
+# Input "ep" is an Epdobase object.  Kwarg "fields" is a list of the fields to
+# be converted; all are, if it is None. </inputs>
+#
+# <products>
+# 
+# The input "ep" is modified so that dcty has been overwritten by a version of
+# ndct in which all records have been converted to strings.  All numpy "nan"s in
+# the ndct (the "numeric dictionary") are converted to strings with value
+# "null".  Fields with a precision in ep.pres are written with that many
+# decimal places (as when saving; see {20110427-1844}).  </products>
+#
+# <type>
+# 
+# Function </type>
+#
+# <dependencies>
+# 
+# copy </dependencies>
+#
+# <updates>
+#
+# - vectorized conversion to strings; no longer looping over records [101027]
+# - masked records of integer columns are written as "null" [261018]
+# - the string columns are dropped, and converted from ndct when read from 
+#   dcty (see {20100527-1045}), instead of deep-copying ndct [261018]
+# - numbers are formatted with the precision in ep.pres, a whole column at
+#   once; NaNs are written as "null" (they had been written as "nan"); kwarg
+#   "fields" added [261018]
+# </updates>
+#
+# <notes>
+#
+# Unassigned matter is ignored. </notes>
+#
+# ==============================================================================
+ 
+def characterize_epdobase(ep, fields = None):
+
+    if fields is None : fields = ep.flds
+
+    # >> The string columns of the numerized fields are dropped, and dcty
+    # >> converts ndct's columns to strings when they are read: [261018]
+
+    for field in fields : 
+        if field in ep.nums : ep.strs.pop(field, None)
+
+# ..............................................................................
+
+# >> Converts a single numeric column to a list of strings, as 
+# >> characterize_epdobase() does for each field, with "places" decimal
+# >> places (as prescribed by "pres"; see {20110427-1844}), unless it is
+# >> None.  The list is tracked (see {20261018-1500}), and unchanged. 
+# >> [261018]
+
+def characterize_column(column, places = None) : 
+
+    # >> Masked records (nulls of integer columns declared in a schema)
+    # >> and NaNs are written as "null": [261018]
+
+    nulls = np.ma.getmaskarray(column)
+    vals = np.asarray(np.ma.getdata(column))
+
+    if vals.dtype.kind == 'f' : nulls = nulls | np.isnan(vals)
+
+    if vals.dtype.kind in 'iuf' and places is not None : 
+
+        # >> Numbers of a prescribed precision are formatted all at once:
+
+        strs = fixed_point_strings(np.where(nulls, 0, vals), int(places))
+
+    else : 
+
+        # >> Function "map" applies the function supplied as the first 
+        # >> argument to all elements in the sequence (supplied as the second
+        # >> argument).  Floats are written as str() writes them, the shortest
+        # >> string that reads back as the same number (no faster way of
+        # >> writing these, or integers, was found):
+
+        strs = list(map(str, vals.tolist()))
+
+    for i in np.flatnonzero(nulls).tolist() : strs[i] = 'null'
+
+    return cl_epdolist(strs)
+
+# ==============================================================================
+#
+# 20100822-2100-mpuboo - Nullify Epdobase
+# 
+# <summary>
+# 
+# Converts all empty strings to "null" in dcty and umat.
+#
+# <syntax>
+# 
+# ep_out = nullify_epdobase(ep) </syntax>
+#
+# <inputs>
+# 
+# Input "ep" is an Epdobase object. </inputs>
+#
+# <products>
+# 
+# The input "ep" is modified so that all empty strings in dcty and umat have
+# been replaced with "null". </products>
+#
+# <type>
+# 
+# Function </type>
+#
+# <dependencies>
+# 
+# copy </dependencies>
+#
+# <notes> </notes>
+#
+# ==============================================================================
+
+def nullify_epdobase(ep) :
+
+    # >> Replacing all empty strings in the dcty with "null":
+    
+    for field in ep.flds:
+        for i in range(0,ep.len(),1) : 
+            if ep.dcty[field][i].strip() == '' : ep.dcty[field][i] = "null"
+
+    # >> Doing likewise in the unassigned matter:
+    
+    if len(ep.umat) != 0 :
+
+        for i in range(0,ep.len(),1) : 
+            if ep.umat[i].strip() == '' : ep.umat[i] = "null"
+
+# ==============================================================================
+#
+# 20100910-1424-mpuboo - Unnullify Epdobase
+# 
+# <summary>
+# 
+# Converts all "null"s and "nans" to empty strings in dcty and umat. </summary>
+#
+# <syntax>
+# 
+# ep_out = unnullify_epdobase(ep) </syntax>
+#
+# <inputs>
+# 
+# Input "ep" is an Epdobase object. </inputs>
+#
+# <products>
+# 
+# The input "ep" is modified so that all records with "null" values in dcty are
+# changed to empty strings. </products>
+#
+# <type>
+# 
+# Function </type>
+#
+# <dependencies>
+# 
+# copy </dependencies>
+#
+# <notes> </notes>
+#
+# ==============================================================================
+
+def unnullify_epdobase(ep) :
+
+    # >> Replacing all nulls or nans with empty strings:
+    
+    for field in ep.flds:
+        for i in range(0,ep.len(),1) : 
+            if ep.dcty[field][i].strip() == 'null' : ep.dcty[field][i] = ''
+            if ep.dcty[field][i].strip() == 'nan' : ep.dcty[field][i] = ''
+
+    # >> Doing likewise in the unassigned matter:
+    
+    if len(ep.umat) != 0 :
+
+        for i in range(0,ep.len(),1) : 
+            if ep.umat[i].strip() == 'null' : ep.umat[i] = ''
+            if ep.umat[i].strip() == 'nan' : ep.umat[i] = ''
+
+# ==============================================================================
+#
+# 20101025-1615-mpuboo - Write numeric dictionary to Epdobin-formatted string 
+# 
+# <summary>
+# 
+# Writes a numeric dictionary to an Epdobin-formatted file (binary). </summary>
+#
+# <syntax>
+# 
+# write_epdobin(ndct, fields, field_defs, version = 2, compact = False, 
+#               compress = None, block_rows = 65536, filo = None) </syntax>
+#
+# <inputs>
+# 
+# The argument "ndct" is a dictionary having the same format as an epdobase ndct
+# variable (see {20100527-1045}). The argument "fields" is equivalent to an
+# epdobase flds variable (a list of field names), and field_defs corresponds to
+# the "defs" variable of an epdobase object (a list of field definitions).  Note
+# that "fields" can be set to an empty string or an empty list, in which case it
+# will be filled using the keys() method.  If "field_defs" is empty, then the
+# fields will not be defined in the epdobin file.  
+#
+# Kwarg "version" is the version of the Epdobin layout: 2 (the default) or 1
+# (the original layout, for older readers).  If kwarg "compact" is True, each
+# integer column is stored as the smallest of int16, int32 or int64 that holds
+# its values (version 2 only).  If kwarg "compress" is 'zlib' or 'lzma', the
+# records are compressed in blocks of "block_rows" records (version 2 only).
+# Kwarg "filo" is a file object opened for writing in binary mode, to which
+# the header and the columns are written one after another; if it is None,
+# the file is returned as a string of bytes instead. </inputs>
+#
+# <products>
+# 
+# This method writes the contents of the ingested epdobase elements to an
+# epdata-formatted string "strn" which can, in turn, be written to a file.  
+#  
+# Epdobin is comprised of a text header that identifies the file as Epdobin, and
+# supplies the data type of all numbers in the binary data, as well as its shape
+# in rows and columns.  This information is used by parse_epdobin (see
+# {20101026-1536}) to parse the binary part. An example header is shown here:
+#
+# : [file_type] Epdobin
+# : [data_type] double
+# : [nmbr_rows] 98
+# : [nmbr_cols] 4
+# : 
+# : * x = x position
+# : * y = y position
+# : * z = z position
+# : * c = pixel intensity
+#
+# Note that the order of the file-properties information is not important,
+# whereas the order of field-definitions is critical: this order corresponds to
+# the order of columns in the binary data.  The first line "[file_type] Epdobin"
+# is used by the Epdobase "load" function to recognize the file as Epdobin.
+#
+# In version 1 (above), the binary data are the rows of a single matrix of the
+# data type.  Version 2 is marked by the property "file_vers", and gives the
+# type of each column, and whether it has a null bitmap, in the order of the
+# field definitions:
+#
+# : [file_type] Epdobin
+# : [file_vers] 2
+# : [nmbr_rows] 98
+# : [nmbr_cols] 4
+# : [col_types] int16 int16 int16 float32
+# : [col_nulls] 0 0 1 0
+# : 
+# : * x = x position
+# : ...
+#
+# The binary data of version 2 are columnar: each column in turn, in little-
+# endian byte order, followed by its null bitmap (if any), which has one bit
+# per record (numpy.packbits), set for nulls.  Each column and bitmap is padded
+# with zero bytes to a multiple of 8 bytes, as is the header (with newlines),
+# so that all columns are aligned.  The binary data of version 2 begin right
+# after the header, whereas those of version 1 are found at the end of the file.
+#
+# Files written record by record (see {20261018-1200}) have the property
+# "[data_form] records", and hold packed rows instead of columns: the values of
+# each row follow one another in the order of the fields, each in the type of
+# its column, with no padding and no null bitmaps. 
+#
+# Compressed files have the properties "[data_form] blocks", "[blck_rows]" (the
+# number of records per block; the last block may have fewer) and "[blck_comp]"
+# (the compression method).  Their binary data begin with the block index,
+# which has an entry for each column of each block (block by block): the
+# position and size of its compressed values, those of its compressed null
+# bitmap (if the column has one), and the least and greatest of its values
+# (as 8-byte unsigned integers and floats).  The compressed values of each
+# block follow, column by column. </products>
+#
+# <type>
+# 
+# Function </type>
+#
+# <dependencies>
+# 
+# numpy </dependencies>
+#
+# <notes> 
+#
+# Version 1 does not write numeric dictionary columns as distinct data types.
+# For example, if one column is made up of integers and another is made up of
+# floats, the whole lot will be written as floats.  Version 2 keeps the type of
+# each column (which may be declared with a schema, see {20100821-2045}), so a
+# cloud of integer-centimeter x,y,z values stored as int16 takes 6 bytes per
+# point, rather than 24.  Null bitmaps are written for the nulls of integer
+# columns (masked arrays); float columns keep their nulls as NaNs.  Columns
+# that are not numeric can't be written to Epdobin.  
+#
+# Unassigned matter is ignored. </notes>
+#
+# ==============================================================================
+
+def write_epdobin(ndct, fields, field_defs, version = 2, compact = False,
+                  compress = None, block_rows = 65536, filo = None) : 
+
+    import io
+
+    # >> Without a file, write to an in-memory buffer and return its contents:
+
+    if filo is None : 
+        filo = io.BytesIO()
+        write_epdobin(ndct, fields, field_defs, version, compact, compress, 
+                      block_rows, filo)
+        return filo.getvalue()
+
+    if version == 1 : 
+        filo.write(write_epdobin_rows(ndct, fields, field_defs))
+        return
+
+    if len(fields) == 0 : nrows = 0
+    else : nrows = len(ndct[fields[0]])
+
+    col_types = []      # >> Type of each column
+    col_nulls = []      # >> Whether each column has a null bitmap
+    columns   = []      # >> The columns, as written
+    masks     = []      # >> The null flags of each column (or None)
+
+    for field in fields : 
+
+        column = ndct[field]
+        mask   = None
+
+        if np.ma.isMaskedArray(column) : 
+            if np.any(np.ma.getmaskarray(column)) : 
+                mask = np.ma.getmaskarray(column)
+            column = column.data
+
+        column = np.asarray(column)
+
+        if column.dtype.kind not in 'iuf' : 
+            raise ValueError('Epdobase: field ' + field + ' is not numeric, ' + \
+                                 'and cannot be written to Epdobin.')
+
+        if len(column) != nrows : 
+            raise ValueError('Epdobase: the epdobase columns have ' + \
+                                 'an unequal number of records.')
+
+        if compact and column.dtype.kind == 'i' : 
+            column = column.astype(smallest_int_type(column))
+
+        column = column.astype(column.dtype.newbyteorder('<'))
+
+        col_types.append(column.dtype.name)
+        columns.append(column)
+        masks.append(mask)
+
+        if mask is None : col_nulls.append('0')
+        else : col_nulls.append('1')
+
+    # >> Compressed blocks, with their index, or the plain columns, written
+    # >> one after another: 
+
+    if compress is not None : 
+
+        parts = epdobin_block_parts(columns, masks, compress, block_rows)
+
+        hdrstring = make_epdobin_header(str(nrows), fields, field_defs, 
+                                        col_types, col_nulls, 
+                                        data_form = 'blocks', 
+                                        more_props = [
+                ('blck_rows', str(block_rows)), ('blck_comp', compress)])
+
+        filo.write(hdrstring.encode('latin-1'))
+
+        for part in parts : filo.write(part)
+
+    else : 
+
+        hdrstring = make_epdobin_header(str(nrows), fields, field_defs, 
+                                        col_types, col_nulls)
+
+        filo.write(hdrstring.encode('latin-1'))
+
+        for column, mask in zip(columns, masks) : 
+            filo.write(pad_epdobin_bytes(column.tobytes()))
+            if mask is not None : 
+                filo.write(pad_epdobin_bytes(np.packbits(mask).tobytes()))
+
+# ..............................................................................
+
+# >> Returns the numpy type of one entry of the block index: the positions and
+# >> sizes of the compressed values and null bitmap of one column in one block,
+# >> counted from the start of the binary data, and the least and greatest of
+# >> those values (NaN if they are all null). [261018]
+
+def epdobin_index_type() : 
+
+    return np.dtype([('offs', '<u8'), ('size', '<u8'), ('moff', '<u8'), 
+                     ('msiz', '<u8'), ('vmin', '<f8'), ('vmax', '<f8')])
+
+# ..............................................................................
+
+# >> Returns the binary data of compressed blocks of "block_rows" records: the
+# >> block index (one entry per block and column), followed by the compressed
+# >> values and null bitmaps of each block.  Inputs "columns" and "masks" are
+# >> as assembled by write_epdobin(); "compress" is 'zlib' or 'lzma'. [261018]
+
+def epdobin_block_parts(columns, masks, compress, block_rows) : 
+
+    if len(columns) == 0 : nrows = 0
+    else : nrows = len(columns[0])
+
+    nblks = -(-nrows // block_rows)
+
+    index = np.zeros((nblks, len(columns)), dtype = epdobin_index_type())
+    parts = [] 
+    pos   = index.nbytes
+
+    for b in range(0,nblks,1) : 
+
+        rows = slice(b * block_rows, (b + 1) * block_rows)
+
+        for i in range(0,len(columns),1) : 
+
+            vals = columns[i][rows]
+            data = compress_epdobin_bytes(vals.tobytes(), compress)
+
+            index[b,i]['offs'] = pos
+            index[b,i]['size'] = len(data)
+
+            parts.append(data)
+            pos += len(data)
+
+            # >> The range of the values, leaving out nulls:
+
+            if masks[i] is not None : 
+
+                data = compress_epdobin_bytes(
+                    np.packbits(masks[i][rows]).tobytes(), compress)
+
+                index[b,i]['moff'] = pos
+                index[b,i]['msiz'] = len(data)
+
+                parts.append(data)
+                pos += len(data)
+
+                vals = vals[~masks[i][rows]]
+
+            if vals.dtype.kind == 'f' : vals = vals[~np.isnan(vals)]
+
+            if len(vals) == 0 : 
+                index[b,i]['vmin'] = np.nan
+                index[b,i]['vmax'] = np.nan
+            else : 
+                index[b,i]['vmin'] = vals.min()
+                index[b,i]['vmax'] = vals.max()
+
+    return [index.tobytes()] + parts
+
+# ..............................................................................
+
+# >> Compresses, and decompresses, the bytes "data" by the method "compress",
+# >> which is 'zlib' or 'lzma'. [261018]
+
+def compress_epdobin_bytes(data, compress) : 
+
+    if compress == 'zlib' : 
+        import zlib
+        return zlib.compress(data, 6)
+
+    elif compress == 'lzma' : 
+        import lzma
+        return lzma.compress(data)
+
+    raise ValueError('Epdobase: unknown compression ' + str(compress) + '.')
+
+def decompress_epdobin_bytes(data, compress) : 
+
+    if compress == 'zlib' : 
+        import zlib
+        return zlib.decompress(data)
+
+    elif compress == 'lzma' : 
+        import lzma
+        return lzma.decompress(data)
+
+    raise ValueError('Epdobase: unknown compression ' + str(compress) + '.')
+
+# ..............................................................................
+
+# >> Assembles the header string of version 2, padded with newlines to a
+# >> multiple of 8 characters.  Input "nrows" is the number of rows, as a
+# >> string; "col_nulls" holds '0' or '1' for each column.  If kwarg
+# >> "data_form" is given, it is written as the "data_form" property, followed
+# >> by the (name, value) pairs of kwarg "more_props". [261018]
+
+def make_epdobin_header(nrows, fields, field_defs, col_types, col_nulls, 
+                        data_form = None, more_props = None) : 
+
+    if more_props is None : more_props = []
+
+    hdrstring =  ''
+    hdrstring += '[file_type] Epdobin\n'
+    hdrstring += '[file_vers] 2\n'
+
+    if data_form is not None : hdrstring += '[data_form] ' + data_form + '\n'
+
+    for name, value in more_props : 
+        hdrstring += '[' + name + '] ' + value + '\n'
+
+    hdrstring += '[nmbr_rows] ' + nrows + '\n'
+    hdrstring += '[nmbr_cols] ' + str(len(fields)) + '\n'
+    hdrstring += '[col_types] ' + ' '.join(col_types) + '\n'
+    hdrstring += '[col_nulls] ' + ' '.join(col_nulls) + '\n\n'
+
+    # >> Now add the definitions of all fields:
+
+    for field in fields : 
+        hdrstring += '* ' + field + ' = ' 
+        if len(field_defs) > 0 : hdrstring += field_defs[field]
+        hdrstring += '\n'
+
+    hdrstring += '\n' * (-len(hdrstring) % 8)  # >> Align the binary data
+
+    return hdrstring
+
+# ..............................................................................
+
+# >> Pads the bytes "data" with zero bytes to a multiple of 8 bytes. [261018]
+
+def pad_epdobin_bytes(data) : return data + b'\0' * (-len(data) % 8)
+
+# ..............................................................................
+
+# >> Returns the smallest of int16, int32 and int64 that holds all values of
+# >> the integer array "column". [261018]
+
+def smallest_int_type(column) : 
+
+    for int_type in [np.int16, np.int32] : 
+
+        limits = np.iinfo(int_type)
+
+        if len(column) == 0 or (column.min() >= limits.min and \
+                                    column.max() <= limits.max) : 
+            return int_type
+
+    return np.int64
+
+# ..............................................................................
+
+# >> Writes version 1 of Epdobin, as write_epdobin() always did before version 2
+# >> was introduced: 
+
+def write_epdobin_rows(ndct, fields, field_defs) : 
+
+    import numpy as np   # >> Numerical Python
+
+    # >> Create a column-array of the same length as ndct, filled w/zeros:
+
+    matx = np.zeros((num_dict_records(ndct), len(fields)))  
+
+    # >> Fill the array with the values of all records for each field:
+
+    # >> (Nulls of integer columns, which are masked, become NaNs, as floats
+    # >> have no other nulls: [261018])
+
+    for i in range(0,len(fields),1) : 
+
+        column = ndct[fields[i]]
+
+        if np.ma.isMaskedArray(column) : 
+            column = column.astype('float64').filled(np.nan)
+
+        matx[:,i] = column
+
+    dtype = type(matx[0,0]) # >> determine the data type of array elements
+
+    # >> The bytes occupied by each numpy type:
+
+    byte_sizes = {np.int64: 8, np.int32: 4, np.float64: 8, np.double: 8}
+
+    # >> Names used to represent each nympy type:
+
+    type_names = {np.int64: 'int64', np.int32: 'int32', np.float64: 'float64', \
+                      np.double: 'double'}
+
+    nrows = matx.shape[0]  # >> note the number of rows
+    ncols = matx.shape[1]  # >> note the number of columns
+
+    matx = matx.reshape(nrows*ncols,)  # >> reshape into one-dimensional array
+
+    # >> Assemble the header string:
+  
+    hdrstring =  ''
+    hdrstring += '[file_type] Epdobin\n'
+    hdrstring += '[data_type] ' + type_names[dtype] + '\n'
+    hdrstring += '[nmbr_rows] ' + str(nrows) + '\n'
+    hdrstring += '[nmbr_cols] ' + str(ncols) + '\n\n'
+
+    # >> Now add the definitions of all fields:
+
+    for field in fields : 
+        hdrstring += '* ' + field + ' = ' 
+        if len(field_defs) > 0 : hdrstring += field_defs[field]
+        hdrstring += '\n'
+
+    outstring = matx.tobytes()        # >> write the array to a strings
+
+    # >> combine header and data strings:
+
+    totstring = hdrstring.encode('latin-1') + outstring 
+
+    return totstring                
+            
+# ==============================================================================
+#
+# 20101026-1536-mpuboo - Parse Epdobin-formatted string into Epdobase components
+# 
+# <summary>
+# 
+# Parses a numeric dictionary from an Epdobin string. </summary>
+#
+# <syntax>
+# 
+# parse_epdobin(strn) </syntax>
+#
+# <inputs>
+# 
+# Sole argument "strn" is an Epdobin-formatted string.
+# </inputs>
+#
+# <products>
+# 
+# The output is a list with three elements: a Epdobase numeric dictionary
+# containing the database, a list of field-names, and a list of field
+# descriptions or definitions.  This definitions list is of course empty if
+# there was no field-definitions line in the Epdex file. </products>
+#
+# <type>
+# 
+# Function </type>
+#
+# <dependencies>
+# 
+# io, re, numpy </dependencies>
+#
+# <updates>
+#
+# - Applied size limit for "fields" in case regexp is matched in binary
+#   data. [101112] 
+# - Only the header lines are matched, and version 2 is read. [261018] 
+# </updates>
+#
+# <notes> 
+#
+# Unassigned matter is ignored.  A description of the Epdobin format can be
+# found in {20101025-1615}.  Files without a "file_vers" property are version
+# 1. </notes>
+#
+# ==============================================================================
+
+def parse_epdobin(strn) : 
+
+    import io                        # >> Standard Python library
+
+    # >> The string may hold bytes (as read from a file) or characters:
+
+    if not isinstance(strn, bytes) : strn = strn.encode('latin-1')
+
+    # -- Parsing the header data -----------------------------------------------
+
+    props, fields, field_defs = read_epdobin_header(io.BytesIO(strn))
+
+    # -- Parsing the binary data ---------------------------------------------- 
+
+    bsize = epdobin_data_size(props)  # >> total size in bytes
+
+    # >> Ingest binary data into 1-D numpy array of bytes (copied, so that the
+    # >> columns can be changed):
+
+    # !! This illustrates how to do this from a file object (former method):
+    # fili.seek(0 - bsize, os.SEEK_END) # >> move seek to start of binary data
+    # matx = np.fromstring(fili.read(bsize), dtype = type_names[dtype_name])
+
+    if props['file_vers'] == 1 : start = len(strn) - bsize
+    else : start = props['data_offs']
+
+    if bsize is None : bsize = len(strn) - start   # >> Blocks run to the end
+
+    if bsize == 0 : raw = np.zeros(0, dtype = np.uint8)
+    else : 
+        raw = np.frombuffer(bytearray(strn[start:start+bsize]), 
+                            dtype = np.uint8)
+
+    ndct = epdobin_columns(raw, props, fields)
+
+    return [ndct, fields, field_defs]  # >> return epobase components
+
+# ==============================================================================
+#
+# 20261018-1130-mpuboo - Memory-map an Epdobin file into Epdobase components
+# 
+# <summary>
+# 
+# Maps the binary data of an Epdobin file, rather than reading it. </summary>
+#
+# <syntax>
+# 
+# map_epdobin(filepath, box = None) </syntax>
+#
+# <inputs>
+# 
+# Argument "filepath" is the path of an Epdobin file.  Kwarg "box" is a
+# dictionary whose keys are field names, and whose values are pairs (lo, hi) of
+# inclusive limits (either of which may be None); if it is given, only the
+# records within all of these limits are returned. </inputs>
+#
+# <products>
+# 
+# The same three elements returned by parse_epdobin() (see {20101026-1536}),
+# except that the columns of the numeric dictionary are views of a numpy
+# memmap of the file (or copies of the records within the box, if any). 
+# Compressed files are decompressed into new arrays. </products>
+#
+# <type>
+# 
+# Function </type>
+#
+# <dependencies>
+# 
+# os, re, numpy </dependencies>
+#
+# <notes> 
+#
+# Only the lines of the header are read, up to the last field definition, and
+# the binary data are then mapped where parse_epdobin() finds them.  No
+# records are read until they are used, and then only the pages of the file
+# that hold them, so even very large point clouds open at once.
+#
+# The file is mapped copy-on-write: the columns may be changed, but the changes
+# are never written to the file.  Note that the columns of version 1 are
+# strided views of the rows of the file, so reading one column still touches
+# every page, whereas each column of version 2 is stored on its own (see
+# {20101025-1615}). 
+#
+# In a compressed file, only the blocks whose ranges (noted in the block index)
+# overlap the box are read and decompressed, so that a small window of a large
+# point cloud is read quickly.  The records of those blocks are then matched
+# against the box one by one. </notes>
+#
+# ==============================================================================
+
+def map_epdobin(filepath, box = None) : 
+
+    import os
+
+    fili = open(filepath,'rb')
+
+    try : props, fields, field_defs = read_epdobin_header(fili)
+    finally : fili.close()
+
+    bsize = epdobin_data_size(props)
+
+    if props['file_vers'] == 1 : offset = os.path.getsize(filepath) - bsize
+    else : offset = props['data_offs']
+
+    if bsize is None : bsize = os.path.getsize(filepath) - offset
+
+    # >> numpy won't map an empty range:
+
+    if bsize == 0 : raw = np.zeros(0, dtype = np.uint8)
+
+    else : 
+
+        raw = np.memmap(filepath, dtype = np.uint8, mode = 'c', 
+                        offset = offset, shape = (bsize,))
+
+    ndct = epdobin_columns(raw, props, fields, box = box)
+
+    return [ndct, fields, field_defs]
+
+# ..............................................................................
+
+# >> Reads the header of the Epdobin file object "fili" (opened in binary
+# >> mode) line by line, stopping at the last field definition so that none of
+# >> the binary data is read.  Returns a dictionary of the file properties
+# >> ('nmbr_rows' and 'nmbr_cols' as integers, 'data_type' as a numpy type
+# >> name; for version 2, also 'data_offs', the position of the binary data),
+# >> the list of field names, and the field definitions. [261018]
+
+def read_epdobin_header(fili) : 
+
+    import re
+
+    format_pat = re.compile(r'^\s*\[(.*)\](.*)')  # >> file properties
+    define_pat = re.compile(r'^\s*\* (.*)=(.*)')   # >> field definitions
+
+    props      = {'data_type' : 'float64'}
+    fields     = []
+    field_defs = {}
+    end_props  = False
+
+    while True : 
+
+        # >> The properties end at the first empty line, which is followed by
+        # >> nmbr_cols field definitions:
+
+        if 'nmbr_cols' in props and len(fields) == props['nmbr_cols'] and \
+                (len(fields) > 0 or end_props) : break
+
+        bline = fili.readline()
+
+        if len(bline) == 0 : break            # >> End of file
+
+        line = bline.decode('latin-1')
+
+        if len(line.strip()) == 0 : end_props = True
+
+        fmatch = format_pat.search(line)
+        dmatch = define_pat.search(line)
+
+        if dmatch : 
+
+            fields.append(dmatch.group(1).strip())
+            field_defs[dmatch.group(1).strip()] = dmatch.group(2).strip()
+
+        elif fmatch and len(fields) == 0 : 
+
+            if fmatch.group(1) in ['nmbr_rows', 'nmbr_cols', 'blck_rows'] : 
+                props[fmatch.group(1)] = int(fmatch.group(2).strip())
+            else : 
+                props[fmatch.group(1)] = fmatch.group(2).strip()
+
+    # !! The old look-up table named float64 "double":
+
+    if props['data_type'] == 'double' : props['data_type'] = 'float64'
+
+    # >> Version 2 lists the type of each column, and whether it has a null
+    # >> bitmap:
+
+    props['file_vers'] = int(props.get('file_vers', '1'))
+
+    if props['file_vers'] == 2 : 
+
+        props['col_types'] = props['col_types'].split()
+        props['col_nulls'] = [flag == '1' for flag in props['col_nulls'].split()]
+
+        props['data_form'] = props.get('data_form', 'columns')
+
+        # >> The binary data begin after the padding of the header:
+
+        pos = fili.tell()
+        props['data_offs'] = pos + (-pos % 8)
+
+    elif props['file_vers'] != 1 : 
+        raise ValueError('Epdobase: Epdobin version ' + \
+                             str(props['file_vers']) + ' is not supported.')
+
+    return props, fields, field_defs
+
+# ..............................................................................
+
+# >> Returns a list holding the placement of each column in the binary data of
+# >> version 2, described by the header properties "props".  Each element holds
+# >> the column type, the first and last bytes of the column, and those of its
+# >> null bitmap (None if it has none), counted from the start of the binary
+# >> data. [261018]
+
+def epdobin_column_spans(props) : 
+
+    nrows = props['nmbr_rows']
+    spans = []
+    pos   = 0
+
+    for col_type, has_nulls in zip(props['col_types'], props['col_nulls']) : 
+
+        dtype = np.dtype(col_type).newbyteorder('<')
+
+        start = pos
+        pos  += nrows * dtype.itemsize
+        stop  = pos
+        pos  += -pos % 8
+
+        if has_nulls : 
+            mask_span = (pos, pos + (nrows + 7) // 8)
+            pos = mask_span[1] + (-mask_span[1] % 8)
+        else : mask_span = None
+
+        spans.append((dtype, start, stop, mask_span))
+
+    return spans
+
+# ..............................................................................
+
+# >> Returns the size in bytes of the binary data described by the header
+# >> properties "props", or None if the data run to the end of the file.
+# >> [261018]
+
+def epdobin_data_size(props) : 
+
+    if props['file_vers'] == 1 : 
+        return props['nmbr_rows'] * props['nmbr_cols'] * \
+            np.dtype(props['data_type']).itemsize
+
+    if props['data_form'] == 'records' : 
+        return props['nmbr_rows'] * epdobin_record_type(props).itemsize
+
+    # >> The size of compressed blocks is only known from their index, and
+    # >> they run to the end of the file:
+
+    if props['data_form'] == 'blocks' : return None
+
+    spans = epdobin_column_spans(props)
+
+    if len(spans) == 0 : return 0
+    elif spans[-1][3] is None : return spans[-1][2] + (-spans[-1][2] % 8)
+    else : return spans[-1][3][1] + (-spans[-1][3][1] % 8)
+
+# ..............................................................................
+
+# >> Returns the numpy type of one row of binary data in the records form of
+# >> version 2, described by the header properties "props".  The value of the
+# >> i-th column is named 'f' + str(i). [261018]
+
+def epdobin_record_type(props) : 
+
+    names = ['f' + str(i) for i in range(0,len(props['col_types']),1)]
+    types = [np.dtype(col_type).newbyteorder('<') \
+                 for col_type in props['col_types']]
+
+    return np.dtype({'names' : names, 'formats' : types})
+
+# ..............................................................................
+
+# >> Returns the numeric dictionary of the binary data "raw" (an array of bytes,
+# >> which may be memory-mapped), described by the header properties "props".
+# >> The columns are views of "raw" (except those of compressed blocks); the
+# >> columns of version 2 with null bitmaps are masked arrays.  If kwarg "box"
+# >> is given, only the records within it are returned (see map_epdobin()).
+# >> [261018]
+
+def epdobin_columns(raw, props, fields, box = None) : 
+
+    ndct  = {}
+    nrows = props['nmbr_rows']
+
+    if props['file_vers'] == 1 : 
+
+        matx = raw.view(np.dtype(props['data_type']))
+        matx = matx.reshape(nrows, props['nmbr_cols'])
+
+        for i in range(0,len(fields),1) : ndct[fields[i]] = matx[:,i]
+
+    elif props['data_form'] == 'records' : 
+
+        recs = raw.view(epdobin_record_type(props))
+
+        for i in range(0,len(fields),1) : ndct[fields[i]] = recs['f' + str(i)]
+
+    elif props['data_form'] == 'blocks' : 
+
+        ndct = epdobin_block_columns(raw, props, fields, box)
+
+    else : ndct = epdobin_columnar(raw, props, fields)
+
+    # >> Keep only the records within the box:
+
+    if box is not None : 
+
+        inds = np.nonzero(epdobin_box_flags(ndct, box))[0]
+
+        for field in fields : ndct[field] = ndct[field][inds]
+
+    return ndct
+
+# ..............................................................................
+
+# >> Returns the numeric dictionary of the binary data "raw" in the columnar
+# >> form of version 2, as views of "raw". [261018]
+
+def epdobin_columnar(raw, props, fields) : 
+
+    ndct  = {}
+    nrows = props['nmbr_rows']
+
+    spans = epdobin_column_spans(props)
+
+    for i in range(0,len(fields),1) : 
+
+        dtype, start, stop, mask_span = spans[i]
+
+        column = raw[start:stop].view(dtype)
+
+        if mask_span is not None : 
+            mask = np.unpackbits(raw[mask_span[0]:mask_span[1]])[0:nrows]
+            column = np.ma.masked_array(column, mask = mask.astype(bool))
+
+        ndct[fields[i]] = column
+
+    return ndct
+
+# ..............................................................................
+
+# >> Returns the numeric dictionary of the binary data "raw" in the compressed
+# >> blocks form of version 2.  If "box" is not None, only the blocks whose
+# >> ranges overlap it are decompressed. [261018]
+
+def epdobin_block_columns(raw, props, fields, box) : 
+
+    nrows = props['nmbr_rows']
+    brows = props['blck_rows']
+    ncols = len(props['col_types'])
+    nblks = -(-nrows // brows)
+
+    index_type = epdobin_index_type()
+
+    index = raw[0:nblks*ncols*index_type.itemsize].view(index_type)
+    index = index.reshape(nblks, ncols)
+
+    # >> Skip the blocks with no values within the box (a block whose values
+    # >> in a field of the box are all null has none):
+
+    keep = np.ones(nblks, dtype = bool)
+
+    if box is not None : 
+        for field in box : 
+
+            i = fields.index(field)
+            lo, hi = box[field]
+
+            keep &= ~np.isnan(index['vmin'][:,i])
+
+            if lo is not None : keep &= ~(index['vmax'][:,i] < lo)
+            if hi is not None : keep &= ~(index['vmin'][:,i] > hi)
+
+    blocks = np.flatnonzero(keep)
+
+    ndct = {}
+
+    for i in range(0,len(fields),1) : 
+
+        dtype  = np.dtype(props['col_types'][i]).newbyteorder('<')
+        pieces = [np.zeros(0, dtype = dtype)]
+        masks  = [np.zeros(0, dtype = bool)]
+
+        for b in blocks : 
+
+            entry = index[b,i]
+            brng  = raw[int(entry['offs']):int(entry['offs']+entry['size'])]
+            data  = decompress_epdobin_bytes(brng.tobytes(), 
+                                             props['blck_comp'])
+
+            pieces.append(np.frombuffer(data, dtype = dtype))
+
+            if props['col_nulls'][i] : 
+
+                brng = raw[int(entry['moff']):int(entry['moff']+entry['msiz'])]
+                data = decompress_epdobin_bytes(brng.tobytes(), 
+                                                props['blck_comp'])
+
+                mask = np.unpackbits(np.frombuffer(data, dtype = np.uint8))
+                masks.append(mask[0:len(pieces[-1])].astype(bool))
+
+        column = np.concatenate(pieces)
+
+        if props['col_nulls'][i] : 
+            column = np.ma.masked_array(column, mask = np.concatenate(masks))
+
+        ndct[fields[i]] = column
+
+    return ndct
+
+# ..............................................................................
+
+# >> Returns an array of flags, True for the records of the numeric dictionary
+# >> "ndct" that are within the box (see map_epdobin()).  Nulls are never
+# >> within the box. [261018]
+
+def epdobin_box_flags(ndct, box) : 
+
+    nrecs = 0
+
+    for field in ndct : nrecs = len(ndct[field])
+
+    flags = np.ones(nrecs, dtype = bool)
+
+    for field in box : 
+
+        lo, hi = box[field]
+        column = ndct[field]
+
+        if np.ma.isMaskedArray(column) : 
+            flags &= ~np.ma.getmaskarray(column)
+            column = column.data
+
+        if lo is not None : flags &= column >= lo
+        if hi is not None : flags &= column <= hi
+
+    return flags
+
+# ==============================================================================
+#
+# 20261018-1200-mpuboo - Epdobin Appender Class
+#
+# <summary>
+#
+# Writes an Epdobin file block by block, as records arrive </summary>
+#
+# <syntax>
+# 
+# appender_name = cl_epdobin_appender(filepath, fields, field_defs = None,
+#                                     col_types = None, compact = False) 
+# appender_name = cl_epdobin_appender(filepath) </syntax>
+#
+# <methods>
+# 
+# * append(ndct)                        = append records (formatted like ndct)
+# * flush()                             = write the number of rows, and flush
+# * close()                             = flush and close the file
+# </methods>
+# 
+# <variables>
+#
+# * flds = the field names, in the order of the columns
+# * nrws = the number of records in the file
+# </variables>
+# 
+# <inputs>
+# 
+# Input "filepath" is the path of the Epdobin file.  If "fields" (a list of
+# field names) is given, a new file is created, with the field definitions
+# "field_defs" (see {20101025-1615}), and with the types listed in "col_types"
+# (numpy type names, e.g., 'int16'; all 'float64' by default).  If "compact"
+# is True and "col_types" is not given, the types are those of the columns
+# first appended, each integer column as the smallest integer type that holds
+# it, as write_epdobin() chooses them (see {20101025-1615}).  If "fields" is
+# not given, an existing file written by an appender is opened, to be extended.
+# </inputs>
+#
+# <products>
+# 
+# An Epdobin file of version 2, in the records form (see {20101025-1615}),
+# which can be loaded like any other. </products>
+#
+# <type>
+# 
+# Class </type>
+#
+# <dependencies>
+# 
+# os, numpy </dependencies>
+#
+# <notes>
+#
+# The header is written once, when the file is created, with room for the
+# number of rows, which is updated in place by flush() and close().  Each call
+# to append() just adds its rows to the end of the file, so a long acquisition
+# (e.g., the x,y,z stream of a rover) can be written to disk as it goes, and
+# never held in memory as a whole.
+#
+# If the program stops before the file is closed, the rows appended since the
+# last flush() are in the file but not counted in its header; a reader sees
+# only the rows counted at that flush.  Opening the file again with an
+# appender counts all whole rows in the file (dropping a row that was only
+# partly written), updates the header, and carries on appending.
+#
+# The records form has no null bitmaps: nulls of float columns are NaNs, and
+# integer columns can't hold nulls (with "compact", an integer column first 
+# appended with nulls is given the type float64).  Integers that don't fit
+# the type of their column raise ValueError, rather than wrapping around.
+#
+# With "compact", the header is written by the first append() (or by flush(),
+# with the default types, if nothing has been appended), as the types are only
+# known then. </notes>
+#
+# ==============================================================================
+
+class cl_epdobin_appender : 
+
+    def __init__(self, filepath, fields = None, field_defs = None, 
+                 col_types = None, compact = False) : 
+
+        if field_defs is None : field_defs = {}
+
+        if fields is None : self.reopen(filepath)
+        else : self.create(filepath, fields, field_defs, col_types, compact)
+
+    # :: Create a new file :::::::::::::::::::::::::::::::::::::::::::::::::::::
+
+    def create(self, filepath, fields, field_defs, col_types, compact = False) : 
+
+        self.flds = list(fields)
+        self.nrws = 0
+
+        self.fili = open(filepath,'wb+')
+
+        # >> The types of a compact file are those of the first records, whose
+        # >> append() writes the header: 
+
+        if compact and col_types is None : 
+            self.defs = field_defs
+            self.rtyp = None
+            return
+
+        self.write_header(field_defs, col_types)
+
+    # >> Writes the header of a new file, with the types "col_types" (all
+    # >> 'float64', if None):
+
+    def write_header(self, field_defs, col_types) : 
+
+        if col_types is None : col_types = ['float64'] * len(self.flds)
+
+        self.rtyp = epdobin_record_type({'col_types' : list(col_types)})
+
+        # >> The number of rows is written in a fixed width, so that it can be
+        # >> updated without moving the rows:
+
+        hdrstring = make_epdobin_header('0'.ljust(20), self.flds, field_defs, 
+                                        col_types, ['0'] * len(self.flds), 
+                                        data_form = 'records')
+
+        self.rows_pos = hdrstring.find('[nmbr_rows] ') + len('[nmbr_rows] ')
+        self.rows_len = 20
+        self.data_pos = len(hdrstring)
+
+        self.fili.write(hdrstring.encode('latin-1'))
+        self.fili.flush()
+
+    # >> Returns the types of a compact file, from the columns of "ndct" (see
+    # >> write_epdobin()); integer columns with nulls are written as floats:
+
+    def compact_types(self, ndct) : 
+
+        col_types = []
+
+        for field in self.flds : 
+
+            column = ndct[field]
+
+            if np.ma.isMaskedArray(column) : 
+                if np.any(np.ma.getmaskarray(column)) : 
+                    column = column.astype('float64').filled(np.nan)
+                else : column = np.ma.getdata(column)
+
+            column = np.asarray(column)
+
+            if column.dtype.kind in 'biu' : 
+                col_types.append(np.dtype(smallest_int_type(column)).name)
+            elif column.dtype.kind == 'f' : 
+                col_types.append(column.dtype.name)
+            else : col_types.append('float64')
+
+        return col_types
+
+    # :: Open an existing file, to be extended :::::::::::::::::::::::::::::::::
+
+    def reopen(self, filepath) : 
+
+        import os
+
+        self.fili = open(filepath,'rb+')
+
+        props, fields, field_defs = read_epdobin_header(self.fili)
+
+        if props['file_vers'] != 2 or props['data_form'] != 'records' : 
+            self.fili.close()
+            raise ValueError('Epdobase: ' + filepath + ' was not written ' + \
+                                 'by an Epdobin appender.')
+
+        self.flds = fields
+        self.rtyp = epdobin_record_type(props)
+
+        self.data_pos = props['data_offs']
+
+        # >> Find the room left for the number of rows in the header:
+
+        self.fili.seek(0)
+        hdrstring = self.fili.read(self.data_pos).decode('latin-1')
+
+        self.rows_pos = hdrstring.find('[nmbr_rows] ') + len('[nmbr_rows] ')
+        self.rows_len = hdrstring.find('\n', self.rows_pos) - self.rows_pos
+
+        # >> Count the whole rows in the file, and drop any partial row:
+
+        data_size = os.path.getsize(filepath) - self.data_pos
+
+        self.nrws = data_size // self.rtyp.itemsize
+
+        self.fili.truncate(self.data_pos + self.nrws * self.rtyp.itemsize)
+        self.flush()
+
+    # :: Append records ::::::::::::::::::::::::::::::::::::::::::::::::::::::::
+
+    # >> Input "ndct" is a dictionary with a column (list or array) for every
+    # >> field, all of the same length, e.g., the ndct of an epdobase.
+
+    def append(self, ndct) : 
+
+        if len(self.flds) == 0 : return
+
+        if self.rtyp is None : 
+            self.write_header(self.defs, self.compact_types(ndct))
+
+        recs = np.zeros(len(ndct[self.flds[0]]), dtype = self.rtyp)
+
+        for i in range(0,len(self.flds),1) : 
+
+            column = ndct[self.flds[i]]
+
+            # >> Nulls become NaNs in float fields; an integer column can only
+            # >> be masked where it has no nulls (e.g., a typed column):
+
+            if np.ma.isMaskedArray(column) : 
+                if recs.dtype[i].kind == 'f' : 
+                    column = column.astype('float64').filled(np.nan)
+                elif np.any(np.ma.getmaskarray(column)) : 
+                    raise ValueError('Epdobase: integer field ' + \
+                                         self.flds[i] + ' cannot hold nulls.')
+                else : column = np.ma.getdata(column)
+
+            # >> (Integers are checked to fit their type, as the assignment
+            # >> would wrap them around:)
+
+            column = np.asarray(column)
+
+            if recs.dtype[i].kind in 'iu' and column.dtype.kind in 'biu' and \
+                    len(column) > 0 : 
+
+                limits = np.iinfo(recs.dtype[i])
+
+                if column.min() < limits.min or column.max() > limits.max : 
+                    raise ValueError('Epdobase: field ' + self.flds[i] + \
+                                         ' has values that don\'t fit ' + \
+                                         'its type, ' + \
+                                         recs.dtype[i].name + '.')
+
+            recs['f' + str(i)] = column
+
+        self.fili.seek(0, 2)
+        self.fili.write(recs.tobytes())
+
+        self.nrws += len(recs)
+
+    # :: Write the number of rows, and flush the file ::::::::::::::::::::::::::
+
+    def flush(self) : 
+
+        import os
+
+        if self.rtyp is None : self.write_header(self.defs, None)
+
+        # >> The rows reach the disk before the header counts them:
+
+        self.fili.flush()
+        os.fsync(self.fili.fileno())
+
+        self.fili.seek(self.rows_pos)
+        self.fili.write(str(self.nrws).ljust(self.rows_len).encode('latin-1'))
+
+        self.fili.flush()
+        os.fsync(self.fili.fileno())
+
+    # :: Close the file ::::::::::::::::::::::::::::::::::::::::::::::::::::::::
+
+    def close(self) : 
+
+        self.flush()
+        self.fili.close()
+
+# ==============================================================================
+#
+# 20110427-1844-mpuboo - Write comma-separated values (CSV) file 
+#
+# </summary>
+#
+# Writes an epdobase's elements to csv format (N.B. all arrays must be m x 1)
+# </summary>
+#
+# <syntax>
 # 
-# ep_out = unnullify_epdobase(ep) </syntax>
+# strn = write_csv(dcty, fields, field_defs, umat, pres=, filo=, block_rows=,
+#                  ndct=) </syntax>
 #
 # <inputs>
 # 
-# Input "ep" is an Epdobase object. </inputs>
+# The argument "dcty" is a dictionary having the same format as an epdobase dcty
+# variable (see {20100527-1045}). The argument "fields" is equivalent to an
+# epdobase flds variable (a list of field names), and field_defs corresponds to
+# the "defs" variable of an epdobase object (a list of field definitions).  Note
+# that "fields" can be set to an empty string or an empty list, in which case it
+# will be filled using the keys() method.  If "field_defs" is empty, then the
+# fields will not be defined in the epdata file. Finally, "pres" is a
+# dictionary, formated like the defs dictionary in the epdobase class, which
+# prescribes the number of zeros that should follow a decimal place for each
+# quantity. 
+#
+# Kwarg "filo" is a file object (or any object with a write() method), opened
+# for writing, to which the csv is written "block_rows" records at a time; if
+# it is None, the csv is returned as a string instead.  Kwarg "ndct" is the
+# numeric dictionary of the same records (see {20100527-1045}); if given, the
+# numbers of the fields with a prescribed precision are taken from it rather
+# than converted from the strings of "dcty". </inputs>
 #
 # <products>
 # 
-# The input "ep" is modified so that all records with "null" values in dcty are
-# changed to empty strings. </products>
+# This method writes the contents of the injested epdobase elements to an
+# csv-formatted string "strn" which can, in turn, be written to a
+# file, or writes it to "filo" directly. </products>
 #
 # <type>
 # 
 # Function </type>
 #
-# <dependencies>
+# <updates> 
+#
+# - Writes to a file object a block of records at a time, rather than adding
+#   to a string value by value, which was quadratic in time. [261018] 
+# - Unassigned matter is written as a column of its own: the dictionary, the
+#   list of fields and the definitions given are no longer modified. [261018]
+# - The prescribed precision is applied to a whole column at once (and is
+#   applied again: np.int() had been removed from numpy, so that no number
+#   was formatted). [261018]
+# </updates>
+#
+# <notes>
 # 
-# copy </dependencies>
+# Note that all new-line characters are replaced with |NL| in the csv file,
+# where each record is allowed to occupy exactly one line. 
 #
-# <notes> </notes>
+# The numbers of a field with a prescribed precision are converted with float()
+# and formatted with one format string, a block of records at a time, by
+# precision_column().  Values that aren't numbers, "nan" and "null" are written
+# as they are, as they were when each value was formatted on its own, which is
+# still done for a column whose values can't all be converted.  Given "ndct",
+# the numbers of such a field are taken from it once, and if "s" is the dcty
+# of an epdobase (see {20261018-1430}) that holds the field only as numbers,
+# its strings aren't converted from them either. </notes>
 #
 # ==============================================================================
 
-def unnullify_epdobase(ep) :
+def write_csv(s, fields, field_defs, umat, pres=None, filo = None, 
+              block_rows = 10000, ndct = None) :
 
-    # >> Replacing all nulls or nans with empty strings:
-    
-    for field in ep.flds:
-        for i in range(0,ep.len(),1) : 
-            if ep.dcty[field][i].strip() == 'null' : ep.dcty[field][i] = ''
-            if ep.dcty[field][i].strip() == 'nan' : ep.dcty[field][i] = ''
+    import io
 
-    # >> Doing likewise in the unassigned matter:
+    # >> Without a file, write to an in-memory buffer and return its contents:
+
+    if filo is None : 
+        filo = io.StringIO()
+        write_csv(s, fields, field_defs, umat, pres, filo, block_rows, ndct)
+        return filo.getvalue()
+
+    if ndct is None : ndct = {}
+
+    # >> Use the given field names, or derive them from the dictionary keys if
+    # >> "fields" is empty:
+
+    if len(fields) == 0 : list_fields = list(s.keys())
+    else : list_fields = list(fields)
+
+    array_len = num_dict_records(s)  
+
+    # >> The numbers of the fields with a prescribed precision are taken from
+    # >> "ndct" once, and the strings of a field held only as numbers are not
+    # >> converted from them (see {20261018-1430}): [261018]
+
+    if isinstance(s, cl_epdocolumns) : held = s.held()[0]
+    else : held = s
+
+    list_nums = []
+    list_cols = []
+
+    for field in list_fields : 
+
+        nums = None
+
+        if field in ndct and pres is not None and field in pres : 
+            nums = ndct[field]
+            if np.asarray(nums).dtype.kind not in 'iuf' or \
+                    len(nums) != array_len : nums = None
+
+        list_nums.append(nums)
+
+        if nums is not None and field not in held : list_cols.append(None)
+        else : list_cols.append(s[field])
+
+    # >> If there is umatter, simply add this to the columns to be written, as
+    # >> the field "umat" (the dictionary and the fields are not modified):
+    # >> [261018]
+
+    if len(umat) != 0 : 
+        list_fields.append('umat')
+        list_nums.append(None)
+        list_cols.append(umat)
+
+    # >> Build the field-names line, using commas as separators:
+
+    filo.write(','.join(['\"' + field + '\"' for field in list_fields]) + '\n')
+
+    # >> Determine the number of records, and write this many lines, printing
+    # >> the whole contents of the epdobase dcty, a block of records at a
+    # >> time.  All newline characters are replaced with "|NL|" because all
+    # >> contents of each record must lie on the same line.
     
-    if len(ep.umat) != 0 :
+    for start in range(0,array_len,block_rows) :
 
-        for i in range(0,ep.len(),1) : 
-            if ep.umat[i].strip() == 'null' : ep.umat[i] = ''
-            if ep.umat[i].strip() == 'nan' : ep.umat[i] = ''
+        block = slice(start, min(start + block_rows, array_len))
+
+        columns = []
+
+        for field, column, nums in zip(list_fields, list_cols, list_nums) : 
+
+            # >> Print each value (if that's what it is) with the prescribed
+            # >> precision (from the numeric column, if given): [140102]
+
+            if nums is None : vals = precision_column(column[block], field, pres)
+            elif column is None : 
+                vals = precision_column(None, field, pres, nums[block])
+            else : 
+                vals = precision_column(column[block], field, pres, nums[block])
+
+            # >> (Only columns that hold newlines need to be searched:)
+
+            if '\n' in ''.join(vals) : 
+                vals = [val.replace('\n','|NL|') for val in vals]
+
+            columns.append(vals)
+
+        # >> Each record is a line of quoted values, separated by commas:
+
+        if block.stop > block.start : 
+            filo.write('\"' + '\"\n\"'.join(map('\",\"'.join, zip(*columns))) + 
+                       '\"\n')
+
+# ..............................................................................
+
+# >> Returns the value "orgval" of the field "field" as a string with the number
+# >> of decimal places prescribed by "pres" (see write_csv() above), or as it
+# >> is, if it is not a number or no precision is prescribed for the field.
+# >> This was split out of write_csv() and write_latex(). [261018]
+
+def apply_precision(orgval, field, pres) :
+
+    if pres is not None and orgval != 'nan' and orgval != 'null':
+        if len(pres.keys()) != 0 :
+
+            if field in pres.keys():
+
+                try : 
+                    tmpval = np.float64(orgval)
+
+                    if int(pres[field]) != 0:
+                        datval = '%.' + str(int(pres[field])) + 'f' 
+                        datval = datval % tmpval
+                    else:
+                        datval = str(np.int64(np.round(tmpval)))
+
+                except: datval = orgval
+            else: datval = orgval
+        else: datval = orgval
+    else: datval = orgval
+
+    return datval
+
+# ..............................................................................
+
+# >> Returns the values "vals" (part of a column of dcty) of the field "field"
+# >> as apply_precision() would, value by value, but converting and formatting
+# >> all numbers of the column at once, with one format.  The numbers may be
+# >> given as "nums", a numeric column holding the same records (e.g., from
+# >> ndct), so that the strings needn't be converted; NaNs and masked values
+# >> there are written as in "vals" (e.g., "null"), or as "null", as 
+# >> characterize_column() writes them, if "vals" is None. [261018]
+
+def precision_column(vals, field, pres, nums = None) :
+
+    if pres is None or field not in pres : return list(vals)
+
+    places = int(pres[field])
+
+    if nums is not None and np.asarray(nums).dtype.kind not in 'iuf' : 
+        nums = None
+
+    if nums is not None : 
+
+        keep = np.ma.getmaskarray(nums)
+        nums = np.ma.getdata(nums).astype(np.float64)
+        keep = keep | np.isnan(nums)
+
+    else : 
+
+        # >> The strings are converted as float() converts them ("nan" is
+        # >> formatted as "nan" anyway).  If any isn't a number, the nulls are
+        # >> kept as they are, and if any other isn't, apply_precision() is used
+        # >> instead:
+
+        try : 
+            nums = np.fromiter(map(float, vals), np.float64, len(vals))
+            keep = np.zeros(len(vals), dtype = bool)
+
+        except (ValueError, TypeError) : 
+
+            strs = np.asarray(vals)
+
+            if strs.dtype.kind not in 'US' : 
+                return [apply_precision(val, field, pres) for val in vals]
+
+            keep = (strs == 'nan') | (strs == 'null')
+
+            try : nums = np.where(keep, '0', strs).astype(np.float64)
+            except ValueError : 
+                return [apply_precision(val, field, pres) for val in vals]
+
+    # >> Format all numbers with the prescribed decimal places, or as integers
+    # >> (values that are not finite, or out of range, are kept as they are):
+
+    if places == 0 : 
+        nums = np.round(nums)
+        keep = keep | ~((nums >= -2.**63) & (nums < 2.**63))
+
+    strs = fixed_point_strings(np.where(keep, 0, nums), places)
+
+    for i in np.nonzero(keep)[0] : 
+        strs[i] = vals[i] if vals is not None else 'null'
+
+    return strs
+
+# ..............................................................................
+
+# >> Returns the numbers "nums" (an array, with no nulls) as a list of strings
+# >> with "places" decimal places, as the format '%.<places>f' writes them, or
+# >> as integers (rounded) if "places" is 0.  The digits of all the numbers
+# >> are found with array arithmetic, "block_rows" numbers at a time, and laid
+# >> out right-aligned in a table of bytes, one row per number, whose unused
+# >> cells are dropped before it is split into strings.  Numbers that don't
+# >> fit in the table, or that lie within a rounding error of halfway between
+# >> two values of the last place, are formatted one by one. [261018]
+
+def fixed_point_strings(nums, places, block_rows = 1000000) : 
+
+    nums = np.asarray(nums)
+
+    strs = []
+
+    for start in range(0, len(nums), block_rows) : 
+        strs.extend(fixed_point_block(nums[start:start + block_rows], places))
+
+    return strs
+
+# ..............................................................................
+
+# >> Returns the strings of a block of numbers, for fixed_point_strings() 
+# >> above. [261018]
+
+def fixed_point_block(nums, places) : 
+
+    # >> Scale the numbers to integers of the last place:
+
+    if nums.dtype.kind in 'iu' and places == 0 : 
+
+        limit = np.iinfo(np.int64).max
+
+        if nums.dtype.kind == 'u' and len(nums) > 0 and nums.max() > limit : 
+            return list(map(str, nums.tolist()))
+
+        ints = nums.astype(np.int64)
+        odd = ints == -limit - 1
+        negs = ints < 0
+
+    else : 
+
+        nums = nums.astype(np.float64)
+
+        with np.errstate(invalid = 'ignore') : 
+            scaled = nums * 10.**places
+            frac = np.abs(scaled - np.trunc(scaled))
+
+        odd = ~(np.abs(scaled) < 2.**31) | (np.abs(frac - 0.5) < 1e-6)
+        ints = np.where(odd, 0, np.round(scaled)).astype(np.int64)
+
+        # >> The format keeps the sign of negative numbers that round to zero
+        # >> (e.g., "-0.00"), but integers have none:
+
+        if places == 0 : negs = ints < 0
+        else : negs = np.signbit(nums) & ~odd
+
+    mags = np.abs(np.where(odd, 0, ints))
+    whole = mags // 10**places
+    fracs = mags % 10**places
+
+    # >> Count the digits of the whole part of each number:
+
+    ndig = np.ones(len(nums), dtype = np.intp)
+
+    for k in range(1, 19, 1) : 
+        more = whole >= 10**k
+        if not np.any(more) : break
+        ndig += more
+
+    # >> Lay out each number in a column of the table (it is transposed when
+    # >> it is read), right-aligned, followed by a comma: the decimal places,
+    # >> the point, the digits of the whole part, and a minus sign (zero bytes
+    # >> are empty cells):
+
+    point = places + 1 if places != 0 else 0
+    width = 1 + int(ndig.max() if len(nums) > 0 else 1) + point + 1
+
+    table = np.zeros((width, len(nums)), dtype = np.uint8)
+    table[-1] = ord(',')
+
+    for k in range(0, places, 1) : 
+        fracs, table[width - 2 - k] = np.divmod(fracs, 10)
+
+    for k in range(0, width - point - 2, 1) : 
+        whole, table[width - 2 - point - k] = np.divmod(whole, 10)
+
+    table[:-1] += ord('0')
+
+    if places != 0 : table[width - 2 - places] = ord('.')
+
+    # >> Empty the cells left of each number's first digit, and put in the
+    # >> minus signs:
+
+    lead = np.arange(width - 1)[:, np.newaxis] < width - 1 - point - ndig
+    table[:-1][lead] = 0
+
+    rows = np.flatnonzero(negs)
+    table[width - 2 - point - ndig[rows], rows] = ord('-')
+
+    raw = table.T.ravel()
+    strs = raw[raw != 0].tobytes().decode('ascii').split(',')[:-1]
+
+    # >> The rest are formatted one at a time:
+
+    form = '%.' + str(places) + 'f'
+
+    for i in np.flatnonzero(odd).tolist() : 
+
+        val = nums[i].item()
+
+        if places == 0 and np.isfinite(val) : strs[i] = str(int(round(val)))
+        else : strs[i] = form % val
+
+    return strs
 
 # ==============================================================================
 #
-# 20101025-1615-mpuboo - Write numeric dictionary to Epdobin-formatted string 
-# 
-# <summary>
-# 
-# Writes a numeric dictionary to an Epdobin-formatted file (binary). </summary>
+# 20110530-1335-mpuboo - Parse comma-separated values (CSV) file 
+#
+# <summary> 
+#
+# Parse csv format into an epdobase (N.B. all arrays will be m x 1) </summary>
 #
 # <syntax>
 # 
-# write_epdobin(ndct, fields, field_defs) </syntax>
+# epdobase_elements = parse_csv(string, schema = None) </syntax>
 #
 # <inputs>
 # 
-# The argument "ndct" is a dictionary having the same format as an epdobase ndct
-# variable (see {20100527-1045}). The argument "fields" is equivalent to an
-# epdobase flds variable (a list of field names), and field_defs corresponds to
-# the "defs" variable of an epdobase object (a list of field definitions).  Note
-# that "fields" can be set to an empty string or an empty list, in which case it
-# will be filled using the keys() method.  If "field_defs" is empty, then the
-# fields will not be defined in the epdobin file. </inputs>
+# The input is a string that contains the contents of a text file, where each
+# line is separated by a newline character.  This can be read from a file object
+# using the read() method.  Kwarg "schema" declares the types of some or all
+# fields, as in numerize_epdobase() (see {20100821-2045}). </inputs>
 #
 # <products>
 # 
-# This method writes the contents of the ingested epdobase elements to an
-# epdata-formatted string "strn" which can, in turn, be written to a file.  
-#  
-# Epdobin is comprised of a text header that identifies the file as Epdobin, and
-# supplies the data type of all numbers in the binary data, as well as its shape
-# in rows and columns.  This information is used by parse_epdobin (see
-# {20101026-1536}) to parse the binary part. An example header is shown here:
-#
-# : [file_type] Epdobin
-# : [data_type] double
-# : [nmbr_rows] 98
-# : [nmbr_cols] 4
-# : 
-# : * x = x position
-# : * y = y position
-# : * z = z position
-# : * c = pixel intensity
-#
-# Note that the order of the file-properties information is not important,
-# whereas the order of field-definitions is critical: this order corresponds to
-# the order of columns in the binary data.  The first line "[file_type] Epdobin"
-# is used by the Epdobase "load" function to recognize the file as Epdobin.
-# </products>
+# The output is a list with four elements: a dictionary containing the database,
+# a list of field-names, a list of field descriptions or definitions, and a list
+# of unassigned matter.  This definitions list is of course empty if there was
+# no field-definitions line in the Epdex file. The unassigned matter is likewise
+# empty if there was no unassigned matter in the document.  A fifth element
+# holds the numerized columns (formatted like an epdobase ndct), which load()
+# assigns to ndct directly. </products>
 #
 # <type>
 # 
@@ -2130,317 +6374,355 @@ def unnullify_epdobase(ep) :
 #
 # <dependencies>
 # 
-# numpy </dependencies>
+# numpy, warnings </dependencies>
 #
-# <notes> 
+# <updates> 
 #
-# At present we do not write numeric dictionary columns as distinct data types.
-# For example, if one column is made up of integers and another is made up of
-# floats, the whole lot will be written as floats. 
+# - Fixed a bug that was cutting off last digit. [120808] 
+# - Added pound-sign commenting. [150809] 
+# - Records are now parsed in bulk whenever no line needs the quote-aware
+#   splitter (e.g., the x,y,z output of LMI.ino), and columns are numerized
+#   as they are read. [261018] 
+# - Fields declared in a schema are numerized directly to their type. [261018]
+# </updates>
 #
-# Unassigned matter is ignored. </notes>
+# <notes> 
+#
+# When no record contains quotation marks, whitespace, escaped newlines
+# ("|NL|"), comments, or an irregular number of commas, the whole body of the
+# file is split at once by parse_csv_body().  Otherwise, each line is split on
+# its own, and only lines with quotation marks are sent to csv_line_splitter().
+# Both paths yield the same dcty as the original character-by-character
+# parser. </notes>
 #
 # ==============================================================================
 
-def write_epdobin(ndct, fields, field_defs) : 
+def parse_csv(strn, schema = None) :
+
+# -- Reading the field names ---------------------------------------------------
+
+    # >> The first line of the file that isn't commented (i.e., does not begin
+    # >> with a pound sign) indicates the field names:
+
+    head_start = 0
+
+    while head_start < len(strn) and strn[head_start] in '#\r\n' :
+
+        if strn[head_start] == '#' :
+            head_start = strn.find('\n', head_start)
+            if head_start == -1 : head_start = len(strn)
+        else : head_start += 1
+
+    head_end = strn.find('\n', head_start)
+    if head_end == -1 : head_end = len(strn)
+
+    field_list, field_defs, umat_key, num_vals = \
+        parse_csv_header(strn[head_start:head_end])
+
+# -- Reading the records -------------------------------------------------------
+
+    s, ndct = parse_csv_body(strn[head_end+1:], field_list, num_vals, 
+                             schema = schema)
+
+    return split_csv_umat(s, ndct, field_list, field_defs, umat_key)
+
+# ..............................................................................
+
+# >> Parses the field-names line of a CSV file.  Returns the list of field
+# >> names, the field definitions (equal to the field names), the name of the
+# >> field holding unassigned matter (None if there is none), and the number
+# >> of comma-separated values on the line. [261018]
+
+def parse_csv_header(sline) :
+
+    field_list_tmp = csv_line_splitter(sline.strip())
+
+    field_list = []
+    field_defs = {}
+    umat_key   = None
+
+    # >> Eliminate whitespace from field names:
+
+    for strn in field_list_tmp : 
+
+        # >> First determine whether the field refers to unassigned matter:
+
+        if strn.strip() == 'umat' or strn.strip() == 'Umat' \
+                               or strn.strip() == 'UMAT':
+
+           umat_key = strn.strip()
+
+        if len(strn.strip()) > 0 : 
+
+            field_list.append(strn.strip())
+            field_defs[strn.strip()] = strn.strip()
+
+    return field_list, field_defs, umat_key, len(field_list_tmp)
+
+# ..............................................................................
+
+# >> Separates the unassigned matter, if any, from the parsed CSV columns, and
+# >> returns the five elements described in the header of parse_csv(). Note
+# >> that "field_list" and "field_defs" are modified. [261018]
+
+def split_csv_umat(s, ndct, field_list, field_defs, umat_key) :
+
+    umat = []  # >> Unassigned matter (if any) is stored in this list
+
+    if umat_key is not None :
+
+        umat = s[umat_key]
+
+        del s[umat_key]
+        del field_defs[umat_key]
+        field_list.remove(umat_key)
+
+        if umat_key in ndct : del ndct[umat_key]
+
+    # >> Finally, if there are no field definitions, return these as an empty
+    # >> dictionary:
+
+    total_def_len = 0
+
+    for field in field_list: total_def_len += len(field_defs[field])
+    if total_def_len == 0 : field_defs = {}
+    
+    return [s, field_list, field_defs, umat, ndct]
+
+# ..............................................................................
+
+# >> Parses the records (all lines after the field-names line) of a CSV file.
+# >> Inputs are the text of the records "body", the list of field names
+# >> "field_list", and the number of comma-separated values "num_vals" found on
+# >> the field-names line (which may exceed len(field_list) if some names were
+# >> blank).  Kwarg "schema" declares the types of some fields.  Returns the
+# >> string dictionary and the numerized dictionary. [261018]
+
+def parse_csv_body(body, field_list, num_vals, schema = None) :
+
+    s    = {}
+    ndct = {}
+
+    if schema is None : schema = {}
 
-    import numpy as np   # >> Numerical Python
+    for field in field_list : s[field] = []
 
-    # >> Create a column-array of the same length as ndct, filled w/zeros:
+    if '\r' in body : body = body.replace('\r\n','\n').replace('\r','\n')
 
-    matx = np.zeros((num_dict_records(ndct), len(fields)))  
+    body = body.rstrip('\n')
 
-    # >> Fill the array with the values of all records for each field:
+    if len(field_list) == 0 : return s, ndct
 
-    for i in range(0,len(fields),1) : matx[:,i] = ndct[fields[i]]
+    # >> Position of each field among the values on a line.  As before, a field
+    # >> name that occurs twice reads from the position of its first mention:
 
-    dtype = type(matx[0,0]) # >> determine the data type of array elements
+    field_pos = [field_list.index(field) for field in field_list]
 
-    # >> The bytes occupied by each numpy type:
+    if len(body) == 0 : pass  # >> No records
 
-    byte_sizes = {np.int64: 8, np.int32: 4, np.float64: 8, np.double: 8}
+    elif csv_body_in_bulk(body, field_list, num_vals) :
 
-    # >> Names used to represent each nympy type:
+        # >> Split all records at once, then take every num_vals-th value,
+        # >> starting at the position of each field:
 
-    type_names = {np.int64: 'int64', np.int32: 'int32', np.float64: 'float64', \
-                      np.double: 'double'}
+        flat = body.replace('\n',',')
+        vals = flat.split(',')
 
-    nrows = matx.shape[0]  # >> note the number of rows
-    ncols = matx.shape[1]  # >> note the number of columns
+        for k in range(0,len(field_list),1) : 
+            s[field_list[k]] = vals[k::num_vals]
 
-    matx = matx.reshape(nrows*ncols,)  # >> reshape into one-dimensional array
+        # >> Convert numeric columns in bulk, too (columns that can't be are
+        # >> returned as None, and numerized from their strings below):
 
-    # >> Assemble the header string:
-  
-    hdrstring =  ''
-    hdrstring += '[file_type] Epdobin\n'
-    hdrstring += '[data_type] ' + type_names[dtype] + '\n'
-    hdrstring += '[nmbr_rows] ' + str(nrows) + '\n'
-    hdrstring += '[nmbr_cols] ' + str(ncols) + '\n\n'
+        num_rows = len(vals) // num_vals
 
-    # >> Now add the definitions of all fields:
+        # >> (Declared fields are converted from their numbers, whole or not:)
 
-    for field in fields : 
-        hdrstring += '* ' + field + ' = ' 
-        if len(field_defs) > 0 : hdrstring += field_defs[field]
-        hdrstring += '\n'
+        whole = [k for k in range(0,len(field_list),1) \
+                     if field_list[k] in schema]
 
-    outstring = matx.tostring()       # >> write the array to a strings
-    totstring = hdrstring + outstring # >> combine header and data strings
+        columns = numerize_csv_values(flat, num_rows, num_vals, whole = whole)
 
-    return totstring                
-            
-# ==============================================================================
-#
-# 20101026-1536-mpuboo - Parse Epdobin-formatted string into Epdobase components
-# 
-# <summary>
-# 
-# Parses a numeric dictionary from an Epdobin string. </summary>
-#
-# <syntax>
-# 
-# parse_epdobin(strn) </syntax>
-#
-# <inputs>
-# 
-# Sole argument "strn" is an Epdobin-formatted string.
-# </inputs>
-#
-# <products>
-# 
-# The output is a list with three elements: a Epdobase numeric dictionary
-# containing the database, a list of field-names, and a list of field
-# descriptions or definitions.  This definitions list is of course empty if
-# there was no field-definitions line in the Epdex file. </products>
-#
-# <type>
-# 
-# Function </type>
-#
-# <dependencies>
-# 
-# re, os, numpy </dependencies>
-#
-# <updates>
-#
-# - Applied size limit for "fields" in case regexp is matched in binary
-#   data. [101112] </updates>
-#
-# <notes> 
-#
-# Unassigned matter is ignored.  A description of the Epdobin format can be
-# found in {20101025-1615}. </notes>
-#
-# ==============================================================================
+        for k in range(0,len(field_list),1) : 
 
-def parse_epdobin(strn) : 
+            if field_list[k] in schema : 
+                if columns[k] is not None : 
+                    ndct[field_list[k]] = numerize_column_schema(\
+                        columns[k], schema[field_list[k]])
+                continue
 
-    import numpy as np               # >> Numerical Python
-    import re, os                    # >> Standard Python libraries
+            # >> A column of whole numbers in a table that also has decimals
+            # >> may still be a column of integers; try it on its own:
 
-    lines = strn.splitlines()        # >> Split string at newlines to make list
- 
-    fields     = []                  # >> Epdobase fields will be stored here
-    field_defs = {}                  # >> Epdobase definitions to be stored here
+            if columns[k] is None : 
+                columns[k] = numerize_csv_values(\
+                    ','.join(s[field_list[k]]), num_rows, 1)[0]
 
-    dtype_name = 'float64'           # >> Default type assumed for parsing data
+            if columns[k] is not None : ndct[field_list[k]] = columns[k]
 
-    # -- Parsing the header data -----------------------------------------------
+    else :
 
-    for line in lines :         
+        for tline in body.split('\n') : 
 
-        format_string = '^\s*\[(.*)\](.*)' # >> reg exp for file properties
-        define_string = '^\s*\* (.*)=(.*)' # >> reg exp for field definitions
+            # >> Skip lines that begin with a pound sign, or that are empty:
 
-        fmatch = re.search(format_string,line) # >> attempt matching property
-        dmatch = re.search(define_string,line) # >> attempt matching definition
+            if tline[0:1] == '#' or len(tline.strip()) == 0 : continue
 
-        if dmatch :   # >> populate the field definitions
+            sline = tline.strip() # >> Remove leading and trailing whitespace
 
-            fields.append(dmatch.group(1).strip())
-            field_defs[dmatch.group(1).strip()] = dmatch.group(2).strip()
+            # >> Only lines with quotes need the quote-aware splitter:
 
-        elif fmatch:  # >> populate the file properties
+            if '"' in sline : strs = csv_line_splitter(sline)
+            else : strs = sline.split(',')
 
-            if fmatch.group(1) == 'nmbr_rows' : 
-                nrows = int(fmatch.group(2).strip())
+            for field, pos in zip(field_list, field_pos) : 
 
-            elif fmatch.group(1) == 'nmbr_cols' : 
-                ncols = int(fmatch.group(2).strip())
+                stmp = strs[pos].strip()
 
-            elif fmatch.group(1) == 'data_type' : 
-                dtype_name = fmatch.group(2).strip() 
+                # >> Replace newline characters:
 
-    # !! This is required in the event that the regular expression pattern for
-    # !! field name definitions was matched somewhere in the binary data:
+                if '|NL|' in stmp : stmp = stmp.replace('|NL|','\n')
 
-    fields = fields[0:ncols]
+                s[field].append(stmp)
 
-    # >> Look-up tables for byte-size of data types and data type labels:
+    # >> Numerize the remaining columns from their strings:
 
-    byte_sizes = {'int64': 8, 'int32': 4, 'float64': 8, 'double': 8}
+    for field in field_list : 
+        if field in ndct : continue
+        elif field in schema : 
+            ndct[field] = numerize_column_schema(s[field], schema[field])
+        else : ndct[field] = numerize_column(s[field])
 
-    type_names = {'int64': np.int64, 'int32': np.int32, 'float64': np.float64, \
-                      'double': np.double}
+    return s, ndct
 
-    # -- Parsing the binary data ---------------------------------------------- 
+# ..............................................................................
 
-    bsize = nrows * ncols * byte_sizes[dtype_name] # >> total size in bytes
+# >> Returns True if the CSV records in "body" can be split in bulk: i.e., if
+# >> no line is a comment, is empty, or contains quotes, whitespace or escaped
+# >> newlines, if no field name is repeated, and if every line holds exactly
+# >> num_vals values. [261018]
 
-    # >> Ingest binary data into 1-D numpy array:
+def csv_body_in_bulk(body, field_list, num_vals) :
 
-    # !! This illustrates how to do this from a file object (former method):
-    # fili.seek(0 - bsize, os.SEEK_END) # >> move seek to start of binary data
-    # matx = np.fromstring(fili.read(bsize), dtype = type_names[dtype_name])
+    if len(set(field_list)) != len(field_list) : return False
 
-    matx = np.fromstring(strn[-bsize:], dtype = type_names[dtype_name])  
+    if body[0:1] == '#' or '\n#' in body or '\n\n' in body : return False
 
-    matx = matx.reshape(nrows, ncols)  # >> reshape the array 
+    for char in ['"', ' ', '\t', '\f', '\v', '|NL|'] : 
+        if char in body : return False
 
-    ndct = {}
+    return csv_commas_per_line_equal(body, num_vals - 1)
 
-    # >> Populate columns of the numeric dictionary:
+# ..............................................................................
 
-    for i in range(0,len(fields),1) : ndct[fields[i]] = matx[:,i]
+# >> Returns True if every line of "body" holds exactly "num_commas" commas.
+# >> The positions of newlines and commas are found with numpy, so that the
+# >> lines are never split into Python strings. [261018]
 
-    return [ndct, fields, field_defs]  # >> return epobase components
+def csv_commas_per_line_equal(body, num_commas) :
 
-# ==============================================================================
-#
-# 20110427-1844-mpuboo - Write comma-separated values (CSV) file 
-#
-# </summary>
-#
-# Writes an epdobase's elements to csv format (N.B. all arrays must be m x 1)
-# </summary>
-#
-# <syntax>
-# 
-# strn = write_csv(dcty, fields, field_defs, umat, pres=) </syntax>
-#
-# <inputs>
-# 
-# The argument "dcty" is a dictionary having the same format as an epdobase dcty
-# variable (see {20100527-1045}). The argument "fields" is equivalent to an
-# epdobase flds variable (a list of field names), and field_defs corresponds to
-# the "defs" variable of an epdobase object (a list of field definitions).  Note
-# that "fields" can be set to an empty string or an empty list, in which case it
-# will be filled using the keys() method.  If "field_defs" is empty, then the
-# fields will not be defined in the epdata file. Finally, "pres" is a
-# dictionary, formated like the defs dictionary in the epdobase class, which
-# prescribes the number of zeros that should follow a decimal place for each
-# quantity. </inputs>
-#
-# <products>
-# 
-# This method writes the contents of the injested epdobase elements to an
-# csv-formatted string "strn" which can, in turn, be written to a
-# file. </products>
-#
-# <type>
-# 
-# Function </type>
-#
-# <updates> </updates>
-#
-# <notes>
-# 
-# Note that all new-line characters are replaced with |NL| in the csv file,
-# where each record is allowed to occupy exactly one line. </notes>
-#
-# ==============================================================================
+    if not isinstance(body, bytes) : body = body.encode('utf-8')
 
-def write_csv(s, fields, field_defs, umat, pres=None) :
+    raw = np.frombuffer(body, dtype = np.uint8)
 
-    strn = '';
+    ends = np.flatnonzero(raw == ord('\n'))   # >> newline positions
+    coms = np.flatnonzero(raw == ord(','))    # >> comma positions
 
-    # >> Use the given field names, or derive them from the dictionary keys if
-    # >> "fields" is empty:
+    # >> Number of commas preceding the end of each line:
 
-    if len(fields) == 0 : list_fields = s.keys()  
-    else : list_fields = fields
+    coms_before = np.append(np.searchsorted(coms, ends), len(coms))
 
-    # >> If there is umatter, simply add this to the list of field names.
+    return bool(np.all(np.diff(coms_before, prepend = 0) == num_commas))
 
-    if len(umat) != 0 : 
-        list_fields.append('umat')
-        s['umat'] = umat       # !! This passes the object, not the reference.
+# ..............................................................................
 
-    # >> Build the field-names line, using commas as separators:
+# >> Converts the comma-separated values in "flat" (records joined by commas)
+# >> into num_vals numeric columns of length num_rows, without creating a
+# >> Python string per value.  The result is a list holding one array per
+# >> column, or None for columns that must be numerized from their strings by
+# >> numerize_column() in order to get the same result: i.e., columns that are
+# >> not numeric, or float columns whose values are all whole numbers (which
+# >> numerize_column() might turn into integers).  Kwarg "whole" lists the
+# >> columns that are returned as floats even so. [261018]
 
-    for field in list_fields : strn += '\"' + field + '\",'
+def numerize_csv_values(flat, num_rows, num_vals, whole = None) :
 
-    strn = strn[0:-1]  # >> strike the last ','
-    strn += '\n'
+    import warnings
 
-    # >> Determine the number of records, and add this many lines to the string,
-    # >> printing the whole contents of the epdobase dcty.  All newline
-    # >> characters are replaced with "|NL|" because all contents of each record
-    # >> must lie on the same line.
-    
-    array_len = num_dict_records(s)  
+    if whole is None : whole = []
 
-    for i in range(0,array_len,1) :
-        
-        for field in list_fields : 
+    columns = [None] * num_vals
 
-            orgval = s[field][i]
+    for dtype in [np.int64, np.float64] : 
 
-            # >> Print each value (if that's what it is) with the prescribed
-            # >> precision: [140102]
+        # !! Older versions of numpy warn (rather than raise) and return what
+        # !! they could read when they meet a non-numeric value:
 
-            if pres is not None and orgval != 'nan' and orgval != 'null':
-                if len(pres.keys()) != 0 :
+        try : 
+            with warnings.catch_warnings() :
+                warnings.simplefilter('ignore')
+                vals = np.fromstring(flat, dtype = dtype, sep = ',')
 
-                    if field in pres.keys():
+        except ValueError : continue
 
-                        try : 
-                            tmpval = np.float64(orgval)
+        if len(vals) != num_rows * num_vals : continue
 
-                            if np.int(pres[field]) != 0:
-                                datval = '%.' + str(np.int(pres[field])) + 'f' 
-                                datval = datval % tmpval
-                            else:
-                                datval = str(np.int64(np.round(tmpval)))
+        vals = vals.reshape(num_rows, num_vals)
 
-                        except: datval = orgval
-                    else: datval = orgval
-                else: datval = orgval
-            else: datval = orgval
+        if dtype == np.int64 : 
 
-            strn += '\"' + datval.replace('\n','|NL|') + '\",'
+            # >> numpy saturates integers that overflow, where numerize_column()
+            # >> would have fallen back on floats:
 
-        strn = strn[0:-1]  # >> strike the last ','
-        strn += '\n'   
-            
-    return strn
+            limits = np.iinfo(np.int64)
+
+            if np.any(vals == limits.max) or np.any(vals == limits.min) : 
+                continue
+
+            for k in range(0,num_vals,1) : columns[k] = vals[:,k].copy()
+
+        else : 
+
+            for k in range(0,num_vals,1) : 
+
+                column = vals[:,k]
+
+                if k in whole or not np.all(column == np.round(column)) : 
+                    columns[k] = column.copy()
+
+        break
+
+    return columns
 
 # ==============================================================================
 #
-# 20110530-1335-mpuboo - Parse comma-separated values (CSV) file 
+# 20261018-1015-mpuboo - Parse a CSV file in parallel
 #
 # <summary> 
 #
-# Parse csv format into an epdobase (N.B. all arrays will be m x 1) </summary>
+# Parses a memory-mapped CSV file in byte ranges, using several processes.
+# </summary>
 #
 # <syntax>
 # 
-# epdobase_elements = parse_csv(string) </syntax>
+# epdobase_elements = parse_csv_parallel(filepath, workers, schema = None,
+#                                        pres = None) 
+# </syntax>
 #
 # <inputs>
 # 
-# The input is a string that contains the contents of a text file, where each
-# line is separated by a newline character.  This can be read from a file object
-# using the read() method. </inputs>
+# Input "filepath" is the path of the CSV file, and "workers" is the number of
+# processes among which the records are divided.  Kwarg "schema" declares the
+# types of some fields, as in parse_csv().  If kwarg "pres" (a dictionary of
+# precisions, as an epdobase's "pres") is given, the columns that are held as
+# numbers alone after loading (see {20100527-1045}) are left out of the
+# strings dictionary, and the precisions of their floats are put in "pres".
+# </inputs>
 #
 # <products>
 # 
-# The output is a list with four elements: a dictionary containing the database,
-# a list of field-names, a list of field descriptions or definitions, and a list
-# of unassigned matter.  This definitions list is of course empty if there was
-# no field-definitions line in the Epdex file. The unassigned matter is likewise
-# empty if there was no unassigned matter in the document. </products>
+# The same five elements returned by parse_csv() (see {20110530-1335}), but
+# for the strings left out if "pres" is given. </products>
 #
 # <type>
 # 
@@ -2448,106 +6730,260 @@ def write_csv(s, fields, field_defs, umat, pres=None) :
 #
 # <dependencies>
 # 
-# None </dependencies>
+# mmap, multiprocessing, re, numpy </dependencies>
 #
-# <updates> 
-#
-# - Fixed a bug that was cutting off last digit. [120808] 
-# - Added pound-sign commenting. [150809] </updates>
+# <notes>
 #
-# <notes> </notes>
+# The file is memory-mapped, and only its field-names line is read here.  The
+# rest is divided into "workers" byte ranges of about equal size, each ending
+# at a newline, and each process maps the file for itself and parses its own
+# range (see parse_csv_range() below), so that no records are passed to the
+# processes.  The columns of the ranges are then joined in order.  
+#
+# Each process returns the numerized columns of its range, plus the strings of
+# any column that can't be written back exactly from its numbers (anything but
+# plain integers, without plus signs or leading zeros).  Ranges that can't be
+# split in bulk are parsed line by line in their process, as in parse_csv().
+# Columns that are numeric in some ranges and not in others are numerized
+# again from their joined strings, so that ndct is what numerize_column()
+# gives for the whole column. 
+#
+# The strings of dcty are assembled by a single process, which limits the
+# speedup for very large files.  With "pres", as load() gives it, this is only
+# done for columns whose strings are kept: those of plain integers, and those
+# of floats written with the same number of decimal places in all ranges (and
+# with the precision already in "pres" for the field, if any), aren't passed
+# between processes or assembled at all. </notes>
 #
 # ==============================================================================
 
-def parse_csv(strn) :
+def parse_csv_parallel(filepath, workers, schema = None, pres = None) : 
 
-    fili = strn.splitlines() # >> Splits string into list of strings at newlines
+    import mmap, multiprocessing
 
-    field_line = 0  # >> Keeps track of whether we are reading the field-line
+    if schema is None : schema = {}
 
-    s = {}          # >> This dictionary will store the database
-    field_defs ={}  # >> We'll return field definitions as equal to field names
+    fili = open(filepath,'rb')
 
-    # >> Keeps track of whether the file has unassigned matter:
+    # >> An empty file can't be mapped:
 
-    has_umatter = False 
+    if len(fili.read(1)) == 0 : 
+        fili.close()
+        return parse_csv('', schema = schema)
 
-    # >> Unassigned matter (if any) is stored in this list:
+    mmap_fili = mmap.mmap(fili.fileno(), 0, access = mmap.ACCESS_READ)
+    file_size = len(mmap_fili)
 
-    umat = []
+# -- Reading the field names ---------------------------------------------------
 
-# -- Main loop over lines in file ----------------------------------------------
+    # >> As in parse_csv(), the first line that isn't commented holds the field
+    # >> names:
 
-    field_line = 1 # >> First line of the file indicates field names
+    head_start = 0
 
-    for tline in fili : 
+    while head_start < file_size and \
+            mmap_fili[head_start:head_start+1] in [b'#', b'\r', b'\n'] :
 
-        # >> Skip lines that begin with a pound sign:
-        if tline[0] == '#' : continue
-        
-        sline = tline.strip() # >> Remove leading and trailing whitespace
+        if mmap_fili[head_start:head_start+1] == b'#' :
+            head_start = mmap_fili.find(b'\n', head_start)
+            if head_start == -1 : head_start = file_size
+        else : head_start += 1
 
-        # >> Populate the database :
+    head_end = mmap_fili.find(b'\n', head_start)
+    if head_end == -1 : head_end = file_size
 
-        if field_line == 0 :
-            strs = csv_line_splitter(sline) # >> Split at commas not in quotes
+    field_list, field_defs, umat_key, num_vals = \
+        parse_csv_header(mmap_fili[head_start:head_end].decode('utf-8'))
 
-            for field in field_list : 
-                
-                stmp = strs[field_list.index(field)].strip()
+# -- Dividing the records into byte ranges -------------------------------------
 
-                # >> Replace newline characters:
+    # >> Ranges are no smaller than a megabyte, and each ends after a newline:
 
-                s[field].append(stmp.replace('|NL|','\n'))                 
+    body_start = min(head_end + 1, file_size)
+    num_ranges = max(1, min(workers, (file_size - body_start) // 2**20))
 
-        # >> Populate the list of fields : 
+    bounds = [body_start]
 
-        if field_line == 1 :
+    for k in range(1,num_ranges,1) : 
 
-            field_line = 0
-            field_list_tmp = csv_line_splitter(sline)
+        pos = body_start + k * (file_size - body_start) // num_ranges
+        pos = mmap_fili.find(b'\n', max(pos, bounds[-1]))
 
-            field_list = []
+        if pos == -1 : break
+        if pos + 1 < file_size : bounds.append(pos + 1)
 
-            # >> Eliminate whitespace from field names, initialize the
-            # >> dictionary that will hold the database:
+    bounds.append(file_size)
 
-            for strn in field_list_tmp : 
+    mmap_fili.close()
+    fili.close()
 
-                # >> First determine whether the field refers to unassigned
-                # >> matter:
+    args = []
 
-                if strn.strip() == 'umat' or strn.strip() == 'Umat' \
-                                   or strn.strip() == 'UMAT':
+    for k in range(0,len(bounds)-1,1) : 
+        args.append((filepath, bounds[k], bounds[k+1], field_list, num_vals,
+                     pres is not None))
 
-                   has_umatter = True
-                   umat_key = strn.strip()
+# -- Parsing the ranges --------------------------------------------------------
 
-                if len(strn.strip()) > 0 : 
+    if len(args) == 1 : parts = [parse_csv_range(args[0])]
 
-                    field_list.append(strn.strip())
-                    s[strn.strip()] = []
-                    field_defs[strn.strip()] = strn.strip()
-            
-    # >> Now, separate the unassigned matter, if any, into the "umat" list:
+    else :
 
-    if has_umatter :
+        pool = multiprocessing.Pool(min(workers, len(args)))
 
-        umat = s[umat_key]
+        try : parts = pool.map(parse_csv_range, args)
+        finally : 
+            pool.close()
+            pool.join()
 
-        del s[umat_key]
-        del field_defs[umat_key]
-        field_list.remove(umat_key)
+# -- Joining the columns -------------------------------------------------------
 
-    # >> Finally, if there are no field definitions, return these as an empty
-    # >> dictionary:
+    s    = {}
+    ndct = {}
 
-    total_def_len = 0
+    for field in field_list : 
 
-    for field in field_list: total_def_len += len(field_defs[field])
-    if total_def_len == 0 : field_defs = {}
-    
-    return [s, field_list, field_defs, umat]
+        columns = [part[field][0] for part in parts]
+        numeric = all([column.dtype.kind in 'if' for column in columns])
+
+        # >> A column whose strings were left out in all ranges, all plain
+        # >> integers or all floats of the same number of decimal places, is
+        # >> held as numbers alone (as load() would hold it):
+
+        places = set([part[field][2] for part in parts])
+
+        if numeric and pres is not None and field not in schema and \
+                field != umat_key and len(places) == 1 and \
+                all([part[field][1] is None for part in parts]) : 
+
+            places = places.pop()
+
+            if places is None or pres.get(field, places) == places : 
+                ndct[field] = np.concatenate(columns)
+                if places is not None : pres[field] = places
+                continue
+
+        # >> Otherwise, the strings left out are written back from the numbers
+        # >> here, since passing them between processes costs more:
+
+        strings = []
+
+        for column, strs, places in [part[field] for part in parts] : 
+            if strs is not None : strings.append(strs)
+            elif places is None : strings.append(column.astype(str))
+            else : strings.append(np.array(characterize_column(column, places),
+                                           dtype = str))
+
+        s[field] = np.concatenate(strings).tolist()
+
+        # >> Numeric columns are joined as they are (integers are promoted to
+        # >> floats if any range has floats); anything else is numerized anew.
+        # >> Declared fields are then converted to their type:
+
+        if numeric : ndct[field] = np.concatenate(columns)
+
+        if field in schema : 
+            if numeric : column = ndct[field]
+            else : column = s[field]
+            ndct[field] = numerize_column_schema(column, schema[field])
+        elif not numeric :
+            ndct[field] = numerize_column(s[field])
+
+    return split_csv_umat(s, ndct, field_list, field_defs, umat_key)
+
+# ..............................................................................
+
+# >> Parses the byte range [start, stop) of the CSV file at "filepath", which
+# >> holds whole records.  The single input is a tuple (filepath, start, stop,
+# >> field_list, num_vals, fixed), for use with multiprocessing.Pool.map().
+# >> Returns a dictionary whose keys are the fields, and whose values are
+# >> lists holding the numerized column, an array of its strings (or None if
+# >> the strings are just the integers of the column, written out), and the
+# >> number of decimal places of its floats (see fixed_point_places()), if
+# >> "fixed" is True and its strings were left out for them (or None). 
+# >> [261018]
+
+def parse_csv_range(args) : 
+
+    import mmap, re
+
+    filepath, start, stop, field_list, num_vals, fixed = args
+
+    fili = open(filepath,'rb')
+    mmap_fili = mmap.mmap(fili.fileno(), 0, access = mmap.ACCESS_READ)
+
+    body = mmap_fili[start:stop]
+
+    mmap_fili.close()
+    fili.close()
+
+    if not isinstance(body, str) : body = body.decode('utf-8')
+    if '\r' in body : body = body.replace('\r\n','\n').replace('\r','\n')
+
+    body = body.rstrip('\n')
+
+    part = {}
+
+    if len(body) > 0 and len(field_list) > 0 and \
+            csv_body_in_bulk(body, field_list, num_vals) :
+
+        flat     = body.replace('\n',',')
+        num_rows = body.count('\n') + 1
+
+        columns = numerize_csv_values(flat, num_rows, num_vals)
+
+        # >> Integers can be written back exactly unless some have a plus sign
+        # >> or leading zeros, or are "-0" (searching for each of these on its
+        # >> own is much faster than searching for all of them at once):
+
+        plain_ints = '+' not in flat and not flat.endswith(',-0') and \
+            not re.match('-?0[0-9]|-0(?:,|$)', flat) and \
+            not re.search(',0[0-9]', flat) and not re.search(',-0[0-9,]', flat)
+
+        vals = None
+
+        for k in range(0,len(field_list),1) : 
+
+            if columns[k] is not None and columns[k].dtype.kind == 'i' \
+                    and plain_ints :
+                part[field_list[k]] = [columns[k], None, None]
+                continue
+
+            # >> Other columns need their strings (split only if needed):
+
+            if vals is None : vals = flat.split(',')
+
+            strs = vals[k::num_vals]
+
+            if columns[k] is None : 
+                columns[k] = numerize_csv_values(','.join(strs), num_rows, 1)[0]
+
+            if columns[k] is None : columns[k] = numerize_column(strs)
+
+            part[field_list[k]] = range_column(columns[k], strs, fixed)
+
+    else : 
+
+        s, ndct = parse_csv_body(body, field_list, num_vals)
+
+        for field in field_list : 
+            part[field] = range_column(ndct[field], s[field], fixed)
+
+    return part
+
+# >> Returns the list of parse_csv_range() for the numerized column "column" of
+# >> a range, and its strings "strs": these are left out if "fixed" is True and
+# >> they are the floats of the column with one number of decimal places.
+# >> [261018]
+
+def range_column(column, strs, fixed) : 
+
+    places = None
+
+    if fixed : places = fixed_point_places(strs, column)
+
+    if places is None : return [column, np.array(strs, dtype = str), None]
+    else : return [column, None, places]
 
 # ..............................................................................
 
@@ -2591,7 +7027,7 @@ def csv_line_splitter(line) :
 # <syntax>
 # 
 # strn = write_latex(dcty, fields, field_defs, umat, justify_char=, caption=,
-# pres=) </syntax>
+# pres=, filo=, block_rows=) </syntax>
 #
 # <inputs>
 # 
@@ -2606,19 +7042,28 @@ def csv_line_splitter(line) :
 # Kwarg arguments are justify_char (text justification is l = left (default), r
 # = right, c = center), and caption (table caption).  
 #
-# See {20110427-1844} for the definition of the "pres" variable.
+# See {20110427-1844} for the definition of the "pres" variable, and of the
+# "filo" and "block_rows" variables, to which the table is written.
 #</inputs>
 #
 # <products>
 # 
 # This method writes the contents of the injested epdobase elements to a string
-# containing a latex-formatted table. </products>
+# containing a latex-formatted table, or writes it to "filo". </products>
 #
 # <type>
 # 
 # Function </type>
 #
-# <updates> </updates>
+# <updates> 
+#
+# - Writes to a file object a block of records at a time, rather than adding
+#   to a string value by value, which was quadratic in time. [261018] 
+# - Unassigned matter is written as a column of its own: the dictionary, the
+#   list of fields and the definitions given are no longer modified. [261018]
+# - The prescribed precision is applied to a whole column at once, as in
+#   write_csv(). [261018]
+# </updates>
 #
 # <notes>
 # 
@@ -2632,103 +7077,85 @@ def csv_line_splitter(line) :
 # ==============================================================================
 
 def write_latex(s, fields, field_defs, umat, justify_char = 'l',
-                caption = 'Epdobase table', pres=None) :
+                caption = 'Epdobase table', pres=None, filo = None, 
+                block_rows = 10000) :
+
+    import io
+
+    # >> Without a file, write to an in-memory buffer and return its contents:
+
+    if filo is None : 
+        filo = io.StringIO()
+        write_latex(s, fields, field_defs, umat, justify_char, caption, pres, 
+                    filo, block_rows)
+        return filo.getvalue()
 
-    strn = '';
-    
     # Write the document preamble text
 
-    strn += '\\documentclass[11pt]{article}\n'
-    strn += '\\usepackage{fullpage}\n'
-    strn += '\\usepackage[dvips]{graphicx}\n'
-    strn += '\\begin{document}\n\n'
+    filo.write('\\documentclass[11pt]{article}\n')
+    filo.write('\\usepackage{fullpage}\n')
+    filo.write('\\usepackage[dvips]{graphicx}\n')
+    filo.write('\\begin{document}\n\n')
     
     # >> Write the preamble text
     
-    strn += '\\begin{table}\n'
-    strn += '\\begin{center}\n'
-    strn += '\\caption{' + caption + '}'
-    strn += '\\vspace{3mm}\n'
+    filo.write('\\begin{table}\n')
+    filo.write('\\begin{center}\n')
+    filo.write('\\caption{' + caption + '}')
+    filo.write('\\vspace{3mm}\n')
 
     # >> Use the given field names, or derive them from the dictionary keys if
     # >> "fields" is empty:
 
-    if len(fields) == 0 : list_fields = s.keys()  
-    else : list_fields = fields
+    if len(fields) == 0 : list_fields = list(s.keys())
+    else : list_fields = list(fields)
+
+    list_cols = [s[field] for field in list_fields]
 
-    # >> If there is umatter, simply add this to the list of field names.
+    # >> If there is umatter, simply add this to the columns to be written, as
+    # >> the field "notes" (the dictionary and the fields are not modified):
+    # >> [261018]
 
     if len(umat) != 0 : 
         list_fields.append('notes')
-        s['notes'] = umat       # !! This passes the object, not the reference.
+        list_cols.append(umat)
 
     # >> Write the string that determines how text is justified:
 
-    justify_string = '\\begin{tabular}{'
-
-    for i in range(0,len(list_fields),1) : 
-        justify_string += justify_char
-        
-    justify_string += '}\n'
-
-    strn += justify_string
+    filo.write('\\begin{tabular}{' + justify_char * len(list_fields) + '}\n')
 
     # >> Build the column names line, using &s as separators:
 
-    for field in list_fields : strn += field + ' & '
-
-    strn = strn[0:-2]  # >> strike the last '&'
-    strn += ' \\\\\n\hline\n'
+    filo.write(' & '.join(list_fields) + '  \\\\\n\\hline\n')
 
-    # >> Determine the number of records, and add this many lines to the string,
-    # >> printing the whole contents of the epdobase dcty.  All newline
-    # >> characters are replaced with " " because all contents of each record
-    # >> must lie on the same line.
+    # >> Determine the number of records, and write this many lines, printing
+    # >> the whole contents of the epdobase dcty, a block of records at a
+    # >> time.  All newline characters are replaced with " " because all
+    # >> contents of each record must lie on the same line.
     
     array_len = num_dict_records(s)  
 
-    for i in range(0,array_len,1) :
-
-        for field in list_fields : 
+    for start in range(0,array_len,block_rows) :
 
-            orgval = s[field][i]
+        block = slice(start, min(start + block_rows, array_len))
 
-            # >> Print each value (if that's what it is) with the prescribed
-            # >> precision: [140102]
-
-            if pres is not None and orgval != 'nan' and orgval != 'null':
-                if len(pres.keys()) != 0 :
-
-                    if field in pres.keys() :
-                        try : 
-                            tmpval = np.float64(orgval)
-                            
-                            if np.int(pres[field]) != 0:
-                                datval = '%.' + str(np.int(pres[field])) + 'f' 
-                                datval = datval % tmpval
-                            else:
-                                datval = str(np.int64(np.round(tmpval)))
-
-                        except: datval = orgval
-                    else: datval = orgval
-                else: datval = orgval
-            else: datval = orgval
+        # >> Print each value (if that's what it is) with the prescribed
+        # >> precision: [140102]
 
-            strn += datval.replace('\n',' ') + ' & '
+        columns = [[val.replace('\n',' ') 
+                    for val in precision_column(column[block], field, pres)] 
+                   for field, column in zip(list_fields, list_cols)]
 
-        strn = strn[0:-2]  # >> strike the last '&'
-        strn += '\\\\\n'   
+        filo.write(''.join([' & '.join(vals) + ' \\\\\n' 
+                            for vals in zip(*columns)]))
 
     # >> Closing the table environment:
 
-    strn += '\hline\n'
-    strn += '\end{tabular}\n'
-    strn += '\end{center}\n'
-    strn += '\end{table}\n\n'
+    filo.write('\\hline\n')
+    filo.write('\\end{tabular}\n')
+    filo.write('\\end{center}\n')
+    filo.write('\\end{table}\n\n')
 
-    strn += '\end{document}\n'
-    
-            
-    return strn
+    filo.write('\\end{document}\n')
 
 
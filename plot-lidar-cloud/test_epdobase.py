@@ -0,0 +1,2814 @@
+# ==============================================================================
+#
+# test_epdobase.py
+# Tests of the Epdobase module (run with "python -m pytest -q")
+#
+# ==============================================================================
+
+import pytest
+
+import epdobase
+
+# ------------------------------------------------------------------------------
+# -- Test files ----------------------------------------------------------------
+# ------------------------------------------------------------------------------
+
+# >> Writes "text" to a file in "tmp_path", and returns its path:
+
+def write_text(tmp_path, name, text) :
+
+    filepath = tmp_path / name
+    filepath.write_text(text)
+
+    return str(filepath)
+
+# >> Returns an epdobase loaded from an Epdex file in "tmp_path", with fields
+# >> "a" (integers), "b" (decimals) and "c" (text):
+
+def load_epdex(tmp_path, umat = None) :
+
+    text = '++ a # b # c' + (' # umat' if umat else '') + '\n'
+
+    for i in range(0,4,1) :
+        text += str(i + 1) + ' # ' + str(i + 1) + '.5 # t' + str(i)
+        if umat : text += ' # ' + umat[i]
+        text += '\n'
+
+    ep = epdobase.cl_epdobase()
+    ep.load(write_text(tmp_path, 'table.dex', text + '++\n'))
+
+    return ep
+
+# ------------------------------------------------------------------------------
+# -- Reading a file in chunks (iter_chunks) ------------------------------------
+# ------------------------------------------------------------------------------
+
+# >> Concatenates the columns and unassigned matter of a list of Epdobases:
+
+def reassemble(eps) :
+
+    dcty = {}
+    umat = []
+
+    for ep in eps :
+        for field in ep.flds :
+            dcty.setdefault(field, []).extend(ep.dcty[field])
+        umat.extend(ep.umat)
+
+    return dcty, umat
+
+CSV_TEXT = '# LMI scan\nx,y,z\n1,2,3\n# a comment\n\n4,5,6\n7,8,9\n' + \
+           '# two\n# comments\n10,11,12\n13,14,15\n\n# trailing\n'
+
+DEX_TEXT = ';; LMI scan\n++ x # y # umat\n** East # North # Note\n' + \
+           '1 # 2 # a\n;; a comment\n3 # 4 # b\n5 # 6 # c\n7 # 8 # d\n++\n'
+
+DAT_TEXT = '* [x] East\n[x] 1\n[y] 2\nnote a\n[x] 3\n[y] 4\n' + \
+           '[x] 5\n[y] 6\nnote c\n[x] 7\n'
+
+def check_chunks(filepath, format, chunk_rows) :
+
+    whole = epdobase.cl_epdobase()
+    whole.load(filepath, format = format)
+
+    chunks = list(epdobase.iter_chunks(filepath, format,
+                                       chunk_rows = chunk_rows))
+
+    for ep in chunks : assert 0 < ep.len() <= chunk_rows
+
+    dcty, umat = reassemble(chunks)
+
+    assert dcty == whole.dcty.copy()
+    assert umat == list(whole.umat)
+
+    return chunks
+
+def test_csv_chunks_count_records_not_lines(tmp_path) :
+
+    filepath = write_text(tmp_path, 'scan.csv', CSV_TEXT)
+
+    for chunk_rows in [1, 2, 3, 5, 100] :
+        check_chunks(filepath, 'csv', chunk_rows)
+
+    assert [ep.len() for ep in epdobase.iter_chunks(filepath, 'csv',
+                                                     chunk_rows = 2)] \
+        == [2, 2, 1]
+
+def test_epdex_chunks_reassemble(tmp_path) :
+
+    filepath = write_text(tmp_path, 'scan.dex', DEX_TEXT)
+
+    for chunk_rows in [1, 3, 100] : check_chunks(filepath, 'dex', chunk_rows)
+
+def test_epdata_chunks_reassemble(tmp_path) :
+
+    filepath = write_text(tmp_path, 'scan.dat', DAT_TEXT)
+
+    for chunk_rows in [1, 3, 100] : check_chunks(filepath, 'dat', chunk_rows)
+
+# ------------------------------------------------------------------------------
+# -- Parsing CSV (parse_csv) ---------------------------------------------------
+# ------------------------------------------------------------------------------
+
+# >> The line-by-line CSV parser that parse_csv() replaced, kept as the
+# >> reference for its strings.  (It failed on empty lines, and misplaced the
+# >> values of the fields after a blank field name, so the documents below
+# >> have neither.)
+
+def reference_parse_csv(strn) :
+
+    fili = strn.splitlines()
+
+    s = {}
+    field_defs = {}
+    has_umatter = False
+    umat = []
+    field_line = 1
+
+    for tline in fili :
+
+        if tline[0] == '#' : continue
+
+        sline = tline.strip()
+
+        if field_line == 0 :
+            strs = epdobase.csv_line_splitter(sline)
+
+            for field in field_list :
+                stmp = strs[field_list.index(field)].strip()
+                s[field].append(stmp.replace('|NL|','\n'))
+
+        if field_line == 1 :
+
+            field_line = 0
+            field_list = []
+
+            for strn in epdobase.csv_line_splitter(sline) :
+
+                if strn.strip() in ['umat', 'Umat', 'UMAT'] :
+                    has_umatter = True
+                    umat_key = strn.strip()
+
+                if len(strn.strip()) > 0 :
+                    field_list.append(strn.strip())
+                    s[strn.strip()] = []
+                    field_defs[strn.strip()] = strn.strip()
+
+    if has_umatter :
+        umat = s[umat_key]
+        del s[umat_key]
+        del field_defs[umat_key]
+        field_list.remove(umat_key)
+
+    if sum([len(field_defs[field]) for field in field_list]) == 0 :
+        field_defs = {}
+
+    return [s, field_list, field_defs, umat]
+
+# >> Generates a CSV document of "num_rows" records of the fields "fields",
+# >> using the random number generator "rng".  If "simple" is True, the values
+# >> are plain numbers, as parse_csv_body() splits in bulk; otherwise there are
+# >> also text, quoted commas, escaped newlines, whitespace, comments, nulls
+# >> and extra values.
+
+def make_csv_document(rng, fields, num_rows, simple) :
+
+    def value(kind) :
+
+        if kind == 0 : return str(rng.randint(-99999, 99999))
+        if kind == 1 : return '%.*f' % (rng.randint(0, 4), rng.uniform(-9, 9))
+        if kind == 2 : return rng.choice(['1e3', '-2.5E-2', '+7', '007', '-0'])
+
+        return rng.choice(['null', 'nan', 'a', ' 5 ', '"b,c"', 'd|NL|e', ''])
+
+    kinds = [rng.randint(0, 1 if simple else 3) for field in fields]
+    lines = [','.join(fields)]
+
+    if not simple and rng.random() < 0.5 : lines.insert(0, '# comment')
+
+    for k in range(0,num_rows,1) :
+
+        vals = [value(kind) for kind in kinds]
+
+        if ''.join(vals) == '' : vals[0] = 'null'     # >> (not an empty line)
+
+        if not simple and rng.random() < 0.2 : vals.append('extra')
+        if not simple and rng.random() < 0.2 : lines.append('# comment')
+
+        lines.append(','.join(vals))
+
+    return '\n'.join(lines) + rng.choice(['', '\n'])
+
+# >> Checks the parse of "strn" against the reference; if the document's
+# >> "fields" are given, its records must also be split in bulk:
+
+def check_csv(strn, fields = None) :
+
+    import numpy as np
+
+    reference = reference_parse_csv(strn)
+    prsd = epdobase.parse_csv(strn)
+
+    assert prsd[:4] == reference
+
+    # >> The numbers are those numerize_column() gives for the strings:
+
+    for field in reference[1] :
+
+        column = epdobase.numerize_column(reference[0][field])
+
+        assert prsd[4][field].dtype == column.dtype
+        np.testing.assert_array_equal(prsd[4][field], column)
+
+    if fields is not None :
+        body = strn[strn.find('\n') + 1:].rstrip('\n')
+        assert epdobase.csv_body_in_bulk(body, fields, len(fields))
+
+def test_parse_csv_matches_reference(monkeypatch) :
+
+    import random
+
+    rng = random.Random(20110530)
+
+    docs = []
+
+    for trial in range(0,300,1) :
+
+        fields = rng.choice([['x', 'y', 'z'], ['i'], ['a b', 'umat', 'c']])
+        simple = trial % 2 == 0
+
+        strn = make_csv_document(rng, fields, rng.randint(1, 20), simple)
+
+        if simple : check_csv(strn, fields)
+        else : check_csv(strn)
+
+        docs.append(strn)
+
+    # >> The line-by-line parser alone gives the same results, too:
+
+    monkeypatch.setattr(epdobase, 'csv_body_in_bulk',
+                        lambda body, field_list, num_vals : False)
+
+    for strn in docs : check_csv(strn)
+
+# ------------------------------------------------------------------------------
+# -- Sniffing the format of a file (sniff_format) ------------------------------
+# ------------------------------------------------------------------------------
+
+# >> The rules with which load() found the format of the whole file, before
+# >> sniff_format() (None where it failed):
+
+def reference_format(text) :
+
+    if '[file_type] Epdobin' in text : return 'dob'
+
+    if '++' in text and '[' in text : 
+        if text.find('[') < text.find('++') : return 'dat'
+        else : return 'dex'
+
+    if '++' in text : return 'dex'
+    if '[' in text : return 'dat'
+
+    return None
+
+FILLER = '# ' + 'x' * 78 + '\n'
+
+@pytest.mark.parametrize('text, expected', [
+        ('++ a # b\n1 # 2\n++\n' + FILLER * 1000 + '[c] 3\n', 'dex'),
+        ('[a] 1\n[b] 2\n' + FILLER * 1000 + '++ c\n', 'dat'),
+        ('#' + 'x' * 65534 + '++ a\n1\n++\n', 'dex'),  # >> split "++"
+        (FILLER * 1000 + '[a] 1\n', 'dat')])
+def test_sniff_format_markers_in_other_pieces(tmp_path, capsys, text, 
+                                              expected) :
+
+    # >> The format is the one load() found, but no warning is printed for
+    # >> markers more than 64 KB apart:
+
+    assert reference_format(text) == expected
+    assert epdobase.sniff_format(write_text(tmp_path, 'f', text)) == expected
+    assert capsys.readouterr().out == ''
+
+def test_sniff_format_warns_of_markers_in_the_same_piece(tmp_path, capsys) :
+
+    text = '[a] 1\n++ b\n2\n++\n'
+
+    assert epdobase.sniff_format(write_text(tmp_path, 'f', text)) == 'dat'
+    assert 'reading as Epdata' in capsys.readouterr().out
+
+@pytest.mark.parametrize('text', ['x,y\n1,2\n', '# LMI\n\nx,y\n1,2\n', 
+                                  'x\n1\n2\n', FILLER * 1000 + 'x\n1\n'])
+def test_sniff_format_reads_files_without_markers_as_csv(tmp_path, text) :
+
+    # >> (load() failed to read these, unless told they were CSV:)
+
+    filepath = write_text(tmp_path, 'f', text)
+
+    assert reference_format(text) is None
+    assert epdobase.sniff_format(filepath) == 'csv'
+
+    ep = epdobase.cl_epdobase()
+    ep.load(filepath)
+
+    assert ep.flds[0] == 'x' and list(ep.ndct['x'])[0] == 1
+
+def test_sniff_format_reads_csv_with_brackets_as_epdata(tmp_path) :
+
+    # >> As load() did, so the format must be given:
+
+    text = 'x[m],y[m]\n1,2\n'
+    filepath = write_text(tmp_path, 'f.csv', text)
+
+    assert reference_format(text) == 'dat'
+    assert epdobase.sniff_format(filepath) == 'dat'
+
+    ep = epdobase.cl_epdobase()
+    ep.load(filepath, format = 'csv')
+
+    assert ep.flds == ['x[m]', 'y[m]']
+
+def test_sniff_format_finds_epdobin_by_its_first_line(tmp_path) :
+
+    import numpy as np
+
+    strn = epdobase.write_epdobin({'x' : np.arange(3)}, ['x'], {})
+    filepath = str(tmp_path / 'f.dob')
+
+    with open(filepath, 'wb') as filo : filo.write(strn)
+
+    assert epdobase.sniff_format(filepath) == 'dob'
+
+    # >> ... and not by the text of another format:
+
+    text = '++ note\n[file_type] Epdobin\n++\n'
+
+    assert reference_format(text) == 'dob'
+    assert epdobase.sniff_format(write_text(tmp_path, 'f', text)) == 'dex'
+
+# ------------------------------------------------------------------------------
+# -- Parsing CSV in parallel (parse_csv_parallel) ------------------------------
+# ------------------------------------------------------------------------------
+
+# >> Writes a CSV file of more than 2 MB (so that two workers get a range
+# >> each), with a quoted field-names line, and rows with extra values, quoted
+# >> commas, comments and empty lines in the first range only, so that it is
+# >> parsed line by line, and the second in bulk:
+
+def write_parallel_csv(tmp_path) :
+
+    import numpy as np
+
+    rng = np.random.default_rng(3)
+    lines = ['"i","x","t","z","w"']
+
+    for k in range(0,100000,1) : 
+
+        line = '%d,%.3f,t%d,%.2f,%s' % (rng.integers(-1000, 1000), 
+                                        rng.uniform(-500, 500), k % 7, 
+                                        rng.uniform(0, 10), 
+                                        ['1.5', '2', '0.25'][k % 3])
+
+        if k < 1000 and k % 10 == 0 : line += ',extra'
+        if k < 1000 and k % 10 == 5 : 
+            line = line.replace('t' + str(k % 7), '"t,' + str(k) + '"')
+            lines.append('# a comment\n')
+
+        lines.append(line)
+
+    return write_text(tmp_path, 'big.csv', '\n'.join(lines) + '\n')
+
+def test_parse_csv_parallel_matches_one_worker(tmp_path) :
+
+    import os
+    import numpy as np
+
+    filepath = write_parallel_csv(tmp_path)
+    assert os.path.getsize(filepath) > 2 * 2**20
+
+    eps = []
+
+    for workers in [1, 2] : 
+        ep = epdobase.cl_epdobase()
+        ep.load(filepath, format = 'csv', workers = workers)
+        eps.append(ep)
+
+    one, two = eps
+
+    assert two.flds == one.flds == ['i', 'x', 't', 'z', 'w']
+    assert two.defs == one.defs
+    assert two.umat == one.umat
+    assert two.pres == one.pres == {'x' : 3, 'z' : 2}
+
+    # >> Only the text, and the floats of varying places, keep their strings:
+
+    assert sorted(two.strs) == sorted(one.strs) == ['t', 'w']
+
+    for field in one.flds : 
+        assert two.dcty[field] == one.dcty[field]
+        np.testing.assert_array_equal(two.ndct[field], one.ndct[field])
+
+    assert one.dcty['t'][5] == 't,5'
+    assert one.dcty['z'][1] == '%.2f' % one.ndct['z'][1]
+
+# ------------------------------------------------------------------------------
+# -- Memory-mapping Epdobin (map_epdobin) --------------------------------------
+# ------------------------------------------------------------------------------
+
+# >> The parser that read version 1 of Epdobin from the whole file, kept as the
+# >> reference for map_epdobin().  (Only np.fromstring() and the decoding of
+# >> the header were changed.)
+
+def reference_parse_epdobin(strn) :
+
+    import re
+    import numpy as np
+
+    fields = []
+    field_defs = {}
+    dtype_name = 'float64'
+
+    for line in strn.decode('latin-1').splitlines() :
+
+        fmatch = re.search(r'^\s*\[(.*)\](.*)', line)
+        dmatch = re.search(r'^\s*\* (.*)=(.*)', line)
+
+        if dmatch :
+            fields.append(dmatch.group(1).strip())
+            field_defs[dmatch.group(1).strip()] = dmatch.group(2).strip()
+
+        elif fmatch :
+            if fmatch.group(1) == 'nmbr_rows' : 
+                nrows = int(fmatch.group(2).strip())
+            elif fmatch.group(1) == 'nmbr_cols' : 
+                ncols = int(fmatch.group(2).strip())
+            elif fmatch.group(1) == 'data_type' : 
+                dtype_name = fmatch.group(2).strip()
+
+    fields = fields[0:ncols]
+
+    byte_sizes = {'int64': 8, 'int32': 4, 'float64': 8, 'double': 8}
+    type_names = {'int64': np.int64, 'int32': np.int32, 'float64': np.float64,
+                  'double': np.double}
+
+    bsize = nrows * ncols * byte_sizes[dtype_name]
+
+    matx = np.frombuffer(strn[len(strn) - bsize:], 
+                         dtype = type_names[dtype_name])
+    matx = matx.reshape(nrows, ncols)
+
+    ndct = {}
+
+    for i in range(0,len(fields),1) : ndct[fields[i]] = matx[:,i]
+
+    return [ndct, fields, field_defs]
+
+# >> Returns a version 1 Epdobin file holding "matx" (an array of the type
+# >> "data_type"), as written before write_epdobin(), which only writes
+# >> 'double':
+
+def make_epdobin_v1(matx, fields, data_type) :
+
+    strn = '[file_type] Epdobin\n[data_type] ' + data_type + '\n' + \
+        '[nmbr_rows] ' + str(matx.shape[0]) + '\n' + \
+        '[nmbr_cols] ' + str(matx.shape[1]) + '\n\n'
+
+    for field in fields : strn += '* ' + field + ' = field ' + field + '\n'
+
+    return strn.encode('latin-1') + matx.tobytes()
+
+@pytest.mark.parametrize('data_type', ['double', 'float64', 'int32', 'int64'])
+def test_map_epdobin_matches_reference(tmp_path, data_type) :
+
+    import numpy as np
+
+    rng = np.random.default_rng(5)
+
+    for nrows in [0, 1, 7, 1000] :
+
+        matx = rng.integers(-10**6, 10**6, size = (nrows, 3))
+        matx = matx.astype({'double' : 'float64'}.get(data_type, data_type))
+
+        # >> Binary data that look like a field definition:
+
+        if nrows > 0 : 
+            matx.view(np.uint8).reshape(-1)[:8] = \
+                np.frombuffer(b'\n* z=12\n', np.uint8)
+
+        strn = make_epdobin_v1(matx, ['a', 'b', 'c'], data_type)
+        filepath = str(tmp_path / 'v1.dob')
+
+        with open(filepath, 'wb') as filo : filo.write(strn)
+
+        reference = reference_parse_epdobin(strn)
+
+        ep = epdobase.cl_epdobase()
+        ep.load(filepath)
+
+        # >> (The reference also took a definition out of the binary data:)
+
+        assert ep.flds == reference[1] == ['a', 'b', 'c']
+        assert ep.defs == dict((field, reference[2][field]) 
+                               for field in ep.flds)
+
+        for field in ep.flds : 
+            np.testing.assert_array_equal(ep.ndct[field], reference[0][field])
+            assert ep.ndct[field].dtype == reference[0][field].dtype
+
+        # >> ... as does the parser of Epdobin held in strings:
+
+        prsd = epdobase.parse_epdobin(strn)
+
+        for field in ep.flds : 
+            np.testing.assert_array_equal(prsd[0][field], reference[0][field])
+
+@pytest.mark.parametrize('version', [1, 2])
+def test_map_epdobin_is_a_copy_on_write_view(tmp_path, version) :
+
+    import numpy as np
+
+    filepath = str(tmp_path / 'f.dob')
+    strn = epdobase.write_epdobin({'x' : np.array([1.5, 2.5, 3.5])}, ['x'], 
+                                  {}, version = version)
+
+    with open(filepath, 'wb') as filo : filo.write(strn)
+
+    ep = epdobase.cl_epdobase()
+    ep.load(filepath)
+
+    assert isinstance(ep.ndct['x'], np.memmap)
+    assert ep.strs == {}
+
+    # >> Changing the numbers doesn't change the file:
+
+    ep.ndct['x'][0] = 9.5
+
+    assert list(ep.ndct['x']) == [9.5, 2.5, 3.5]
+
+    with open(filepath, 'rb') as fili : assert fili.read() == strn
+
+# ------------------------------------------------------------------------------
+# -- Writing Epdobin (write_epdobin, save) -------------------------------------
+# ------------------------------------------------------------------------------
+
+# >> Returns the columns of an epdobase with integers of each size, nulls and
+# >> NaNs, in three records (so that no column fills a multiple of 8 bytes):
+
+def epdobin_columns() :
+
+    import numpy as np
+
+    return {'i' : np.array([1, -2, 300]),
+            'n' : np.ma.masked_array([5, 6, 7], mask = [0, 1, 0]),
+            'x' : np.array([0.5, np.nan, -1.25]),
+            'w' : np.array([70000, 0, -1]),
+            'y' : np.array([2**40, 1, 2], dtype = np.int64),
+            'f' : np.array([1.5, 2.5, 3.5], dtype = np.float32)}
+
+def saved_epdobin(tmp_path, **kwargs) :
+
+    ep = epdobase.cl_epdobase()
+    ep.flds = ['i', 'n', 'x', 'w', 'y', 'f']
+    ep.defs = dict((field, 'field ' + field) for field in ep.flds)
+
+    for field, column in epdobin_columns().items() : ep.ndct[field] = column
+
+    filepath = str(tmp_path / 'out.dob')
+    ep.save('dob', filepath, **kwargs)
+
+    ep = epdobase.cl_epdobase()
+    ep.load(filepath)
+
+    return ep
+
+@pytest.mark.parametrize('compact', [False, True])
+@pytest.mark.parametrize('compress', [None, 'zlib'])
+def test_epdobin_version_2_round_trip(tmp_path, compact, compress) :
+
+    import numpy as np
+
+    ep = saved_epdobin(tmp_path, compact = compact, compress = compress)
+    columns = epdobin_columns()
+
+    assert ep.flds == ['i', 'n', 'x', 'w', 'y', 'f']
+    assert ep.defs['w'] == 'field w'
+
+    # >> (NaNs are equal in assert_array_equal():)
+
+    for field in ep.flds : 
+        assert list(np.ma.getmaskarray(ep.ndct[field])) == \
+            list(np.ma.getmaskarray(columns[field]))
+        np.testing.assert_array_equal(np.ma.filled(ep.ndct[field], 0), 
+                                      np.ma.filled(columns[field], 0))
+
+    assert list(np.ma.getmaskarray(ep.ndct['n'])) == [False, True, False]
+
+    # >> Compact files hold each integer column in the smallest type, and
+    # >> floats as they are:
+
+    types = dict((field, np.asarray(ep.ndct[field]).dtype.name) 
+                 for field in ep.flds)
+
+    if compact : 
+        assert types == {'i' : 'int16', 'n' : 'int16', 'x' : 'float64',
+                         'w' : 'int32', 'y' : 'int64', 'f' : 'float32'}
+    else : 
+        assert types['i'] == types['n'] == types['w'] == 'int64'
+
+def test_epdobin_version_1_round_trip(tmp_path) :
+
+    import numpy as np
+
+    ep = epdobase.cl_epdobase()
+    filepath = str(tmp_path / 'v1.dob')
+
+    with open(filepath, 'wb') as filo : 
+        filo.write(epdobase.write_epdobin(epdobin_columns(), 
+                                          ['i', 'n', 'x', 'w'], {}, 
+                                          version = 1))
+
+    ep.load(filepath)
+
+    # >> Version 1 holds floats only, whose nulls are NaNs:
+
+    assert list(ep.ndct['i']) == [1.0, -2.0, 300.0]
+    assert list(ep.ndct['w']) == [70000.0, 0.0, -1.0]
+    assert np.isnan(ep.ndct['n'][1]) and np.isnan(ep.ndct['x'][1])
+    assert list(ep.ndct['n'][[0, 2]]) == [5.0, 7.0]
+
+def test_epdobin_version_2_is_padded(tmp_path) :
+
+    import numpy as np
+
+    strn = epdobase.write_epdobin(epdobin_columns(), ['i', 'n'], {}, 
+                                  compact = True)
+
+    # >> The header, 6 bytes of "i", 6 bytes of "n" and 1 byte of its null
+    # >> bitmap, each padded to 8 bytes:
+
+    data = strn[-24:]
+
+    assert len(strn) % 8 == 0
+    assert list(np.frombuffer(data[0:6], '<i2')) == [1, -2, 300]
+    assert list(np.frombuffer(data[8:14], '<i2')) == [5, 6, 7]
+    assert data[16:24] == bytes([0b01000000]) + b'\0' * 7
+    assert data[6:8] == data[14:16] == b'\0\0'
+
+# ------------------------------------------------------------------------------
+# -- Compressed Epdobin blocks (compress, box) ---------------------------------
+# ------------------------------------------------------------------------------
+
+# >> Returns the columns of a point cloud of "nrows" records sorted by "x", so
+# >> that blocks hold distinct ranges of it, with nulls in "c" and NaNs in "y":
+
+def cloud_columns(nrows) :
+
+    import numpy as np
+
+    rng = np.random.default_rng(8)
+
+    y = rng.uniform(-10, 10, nrows)
+    y[::13] = np.nan
+
+    return {'x' : np.arange(nrows, dtype = np.int32) * 3 - 100,
+            'y' : y,
+            'c' : np.ma.masked_array(rng.integers(0, 255, nrows), 
+                                     mask = rng.random(nrows) < 0.1)}
+
+def write_cloud(tmp_path, nrows, compress, block_rows) :
+
+    filepath = str(tmp_path / ('cloud.' + str(compress) + '.dob'))
+    strn = epdobase.write_epdobin(cloud_columns(nrows), ['x', 'y', 'c'], {},
+                                  compress = compress, block_rows = block_rows)
+
+    with open(filepath, 'wb') as filo : filo.write(strn)
+
+    return filepath
+
+def assert_columns_equal(column, expected) :
+
+    import numpy as np
+
+    assert column.dtype == expected.dtype
+    assert list(np.ma.getmaskarray(column)) == \
+        list(np.ma.getmaskarray(expected))
+    np.testing.assert_array_equal(np.ma.filled(column, 0), 
+                                  np.ma.filled(expected, 0))
+
+@pytest.mark.parametrize('compress', ['zlib', 'lzma'])
+@pytest.mark.parametrize('nrows, block_rows', [(0, 7), (5, 7), (7, 7), 
+                                                (100, 7), (100, 1000)])
+def test_compressed_blocks_round_trip(tmp_path, compress, nrows, block_rows) :
+
+    ep = epdobase.cl_epdobase()
+    ep.load(write_cloud(tmp_path, nrows, compress, block_rows))
+
+    expected = cloud_columns(nrows)
+
+    assert ep.flds == ['x', 'y', 'c']
+
+    for field in ep.flds : assert_columns_equal(ep.ndct[field], expected[field])
+
+@pytest.mark.parametrize('box', [{'x' : (50, 80)}, {'x' : (None, -95)},
+                                 {'x' : (150, None), 'y' : (0, 5)},
+                                 {'c' : (100, 200)}, {'x' : (10**6, None)}])
+def test_box_reads_only_blocks_that_overlap_it(tmp_path, monkeypatch, box) :
+
+    import numpy as np
+
+    filepath = write_cloud(tmp_path, 100, 'zlib', 10)
+
+    # >> The records of a plain file within the box (nulls and NaNs are not)
+    # >> are the reference:
+
+    plain = epdobase.cl_epdobase()
+    plain.load(write_cloud(tmp_path, 100, None, 10))
+
+    flags = np.ones(100, dtype = bool)
+
+    for field in box : 
+
+        lo, hi = box[field]
+        vals = np.ma.masked_invalid(np.ma.asarray(plain.ndct[field], 
+                                                  dtype = float))
+
+        if lo is not None : flags &= (vals >= lo).filled(False)
+        if hi is not None : flags &= (vals <= hi).filled(False)
+
+    # >> Count the pieces decompressed:
+
+    sizes = []
+    decompress = epdobase.decompress_epdobin_bytes
+
+    def counting(data, compress) :
+        sizes.append(len(data))
+        return decompress(data, compress)
+
+    monkeypatch.setattr(epdobase, 'decompress_epdobin_bytes', counting)
+
+    ep = epdobase.cl_epdobase()
+    ep.load(filepath, box = box)
+
+    for field in ep.flds : 
+        assert_columns_equal(ep.ndct[field], plain.ndct[field][flags])
+
+    # >> Only the blocks (of ten records) whose ranges overlap the box are
+    # >> decompressed: four pieces each (x, y, c and the null bitmap of c):
+
+    keep = np.ones(10, dtype = bool)
+
+    for field in box : 
+
+        lo, hi = box[field]
+
+        vals = np.ma.masked_invalid(np.ma.asarray(plain.ndct[field], 
+                                                  dtype = float))
+        vals = vals.reshape(10, 10)
+
+        vmin = vals.min(axis = 1).filled(np.nan)
+        vmax = vals.max(axis = 1).filled(np.nan)
+
+        keep &= ~np.isnan(vmin)
+        if lo is not None : keep &= vmax >= lo
+        if hi is not None : keep &= vmin <= hi
+
+    assert len(sizes) == 4 * np.count_nonzero(keep)
+    assert np.all(keep[flags.reshape(10, 10).any(axis = 1)])
+
+    if 'x' in box : assert np.count_nonzero(keep) < 10
+
+# ------------------------------------------------------------------------------
+# -- Appending to an Epdobin file (cl_epdobin_appender) ------------------------
+# ------------------------------------------------------------------------------
+
+def test_appender_masked_int_column_and_crash(tmp_path) :
+
+    import os
+    import numpy as np
+
+    filepath = str(tmp_path / 'scan.dob')
+
+    app = epdobase.cl_epdobin_appender(filepath, ['i', 'x'],
+                                       col_types = ['int32', 'float64'])
+
+    # >> A masked integer column without nulls (as a typed numerize gives),
+    # >> and a masked integer column with a null, written to a float field:
+
+    app.append({'i' : np.ma.masked_array([1, 2, 3], mask = False),
+                'x' : np.ma.masked_array([4, 5, 6], mask = [0, 1, 0])})
+    app.flush()
+
+    # >> Rows appended after the flush, then a crash partway through a row:
+
+    app.append({'i' : np.ma.masked_array([7, 8], mask = False),
+                'x' : [9.5, 10.5]})
+    app.fili.flush()
+    app.fili.close()
+
+    with open(filepath, 'rb+') as fili :
+        fili.truncate(os.path.getsize(filepath) - 3)
+
+    ep = epdobase.cl_epdobase()
+    ep.load(filepath, format = 'dob')
+    assert list(ep.ndct['i']) == [1, 2, 3]
+
+    # >> Reopening counts the whole rows and drops the partial one:
+
+    app = epdobase.cl_epdobin_appender(filepath)
+    assert app.nrws == 4
+
+    app.append({'i' : np.ma.masked_array([11], mask = False), 'x' : [12.0]})
+    app.close()
+
+    ep = epdobase.cl_epdobase()
+    ep.load(filepath, format = 'dob')
+
+    assert list(ep.ndct['i']) == [1, 2, 3, 7, 11]
+
+    x = np.ma.filled(np.ma.asarray(ep.ndct['x'], dtype = float), np.nan)
+    assert np.isnan(x[1])
+    assert list(x[[0, 2, 3, 4]]) == [4.0, 6.0, 9.5, 12.0]
+
+def test_appender_rejects_nulls_in_int_field(tmp_path) :
+
+    import numpy as np
+
+    app = epdobase.cl_epdobin_appender(str(tmp_path / 'scan.dob'), ['i'],
+                                       col_types = ['int32'])
+
+    with pytest.raises(ValueError) :
+        app.append({'i' : np.ma.masked_array([1, 2], mask = [0, 1])})
+
+    app.close()
+
+def test_compact_appender_takes_types_of_first_records(tmp_path) :
+
+    import numpy as np
+
+    filepath = str(tmp_path / 'scan.dob')
+
+    app = epdobase.cl_epdobin_appender(filepath, ['i', 'n', 'x'], 
+                                       compact = True)
+
+    app.append({'i' : np.array([1, -2, 300]),
+                'n' : np.ma.masked_array([5, 6, 7], mask = [0, 1, 0]),
+                'x' : np.array([0.5, 1.5, 2.5], dtype = np.float32)})
+
+    # >> Integers that don't fit the type taken are refused, not wrapped:
+
+    with pytest.raises(ValueError) :
+        app.append({'i' : [70000], 'n' : [1], 'x' : [1.0]})
+
+    app.append({'i' : [-7], 'n' : [8], 'x' : [3.5]})
+    app.close()
+
+    ep = epdobase.cl_epdobase()
+    ep.load(filepath, format = 'dob')
+
+    assert np.asarray(ep.ndct['i']).dtype.name == 'int16'
+    assert np.asarray(ep.ndct['n']).dtype.name == 'float64'
+    assert np.asarray(ep.ndct['x']).dtype.name == 'float32'
+
+    assert list(ep.ndct['i']) == [1, -2, 300, -7]
+    assert np.isnan(ep.ndct['n'][1])
+    assert list(ep.ndct['x']) == [0.5, 1.5, 2.5, 3.5]
+
+def test_compact_appender_without_records(tmp_path) :
+
+    filepath = str(tmp_path / 'scan.dob')
+
+    epdobase.cl_epdobin_appender(filepath, ['i'], compact = True).close()
+
+    ep = epdobase.cl_epdobase()
+    ep.load(filepath, format = 'dob')
+
+    assert ep.flds == ['i'] and len(ep.ndct['i']) == 0
+
+# ------------------------------------------------------------------------------
+# -- Parsing Epdex (parse_epdex) -----------------------------------------------
+# ------------------------------------------------------------------------------
+
+# >> The Epdex parser that parse_epdex() replaced, kept as the reference for
+# >> its output.  (It failed on empty lines within the records, so the
+# >> documents below have none there.)
+
+def reference_parse_epdex(strn) :
+
+    s = {}
+    field_defs = {}
+    has_umatter = False
+    umat = []
+    field_line = 0
+    epdex_open = 0
+
+    for tline in strn.splitlines() :
+
+        sline = tline.strip()
+
+        if sline[0:2] != ';;' :
+
+            if len(sline) >= 2 and sline == '++' : break
+
+            if len(sline) > 2 and sline[0:2] == '++' :
+                field_line = 1
+                epdex_open = 1
+
+            if epdex_open == 1 and field_line == 0 and sline[0:2] != '**':
+                strs = tline.split('#')
+
+                for field in field_list :
+                    stmp = strs[field_list.index(field)].strip()
+                    s[field].append(stmp.replace('|NL|','\n'))
+
+            if field_line == 1 :
+
+                field_line = 0
+                field_list = []
+
+                for strn in sline[2:].split('#') :
+
+                    if strn.strip() in ['umat', 'Umat', 'UMAT'] :
+                        has_umatter = True
+                        umat_key = strn.strip()
+
+                    if len(strn.strip()) > 0 :
+                        field_list.append(strn.strip())
+                        s[strn.strip()] = []
+                        field_defs[strn.strip()] = []
+
+            if epdex_open == 1 and field_line == 0 and sline[0:2] == '**':
+
+                strs = sline[2:].split('#')
+
+                for field in field_list :
+                    field_defs[field] = strs[field_list.index(field)].strip()
+
+    if has_umatter :
+        umat = s[umat_key]
+        del s[umat_key]
+        del field_defs[umat_key]
+        field_list.remove(umat_key)
+
+    if sum([len(field_defs[field]) for field in field_list]) == 0 :
+        field_defs = {}
+
+    return [s, field_list, field_defs, umat]
+
+# >> Generates an Epdex document of "num_rows" records of the fields "fields",
+# >> using the random number generator "rng": with or without definitions, a
+# >> preamble, comments, padding, escaped newlines and matter after the end.
+
+def make_epdex_document(rng, fields, num_rows) :
+
+    # >> (A record can't begin with "++" or "**", which mark field names and
+    # >> definitions:)
+
+    def value(k) :
+        return rng.choice([str(rng.randint(-99, 99)), '%.2f' % rng.random(),
+                           'null', '', 'two words', 'a|NL|b', '  pad  ', 
+                           '[tag] v', ['x++', '++x'][k > 0]])
+
+    lines = []
+
+    if rng.random() < 0.5 : lines += ['preamble [x] 1', '', ';; comment']
+
+    lines.append(rng.choice(['++ ', '++', '  ++ ']) + ' # '.join(fields))
+
+    if rng.random() < 0.5 : 
+        lines.append('** ' + ' # '.join(['def of ' + field 
+                                          for field in fields]))
+
+    for k in range(0,num_rows,1) :
+
+        if rng.random() < 0.1 : lines.append(';; comment # x')
+
+        lines.append(rng.choice([' # ', '#', ' #  ']).join(
+                [value(k) for k in range(0,len(fields),1)]))
+
+    if rng.random() < 0.8 : lines += [rng.choice(['++', '  ++  ']), 'after']
+
+    return '\n'.join(lines) + rng.choice(['', '\n'])
+
+def test_parse_epdex_matches_reference() :
+
+    import random
+
+    rng = random.Random(20100315)
+
+    for trial in range(0,300,1) :
+
+        fields = rng.choice([['a', 'b', 'c'], ['x'], ['id', 'umat', 'note'],
+                             ['p q', 'Umat']])
+        strn = make_epdex_document(rng, fields, rng.randint(0, 15))
+
+        assert epdobase.parse_epdex(strn) == reference_parse_epdex(strn)
+
+def test_parse_epdex_with_schema_matches_reference() :
+
+    import numpy as np
+
+    strn = '++ a # b # t\n** A # B # T\n1 # 2.5 # x\nnull # -3 # y\n++\n'
+    schema = {'a' : {'dtype' : 'int32'}}
+
+    prsd = epdobase.parse_epdex(strn, schema = schema)
+
+    assert prsd[:4] == reference_parse_epdex(strn)
+    assert list(np.ma.getmaskarray(prsd[4]['a'])) == [False, True]
+    assert list(prsd[4]['b']) == [2.5, -3.0]
+
+# ------------------------------------------------------------------------------
+# -- Parsing Epdata (parse_epdata) ---------------------------------------------
+# ------------------------------------------------------------------------------
+
+# >> The two-pass Epdata parser that parse_epdata() replaced, kept as the
+# >> reference for its output.  (Only the Python 2 "range" lists and the raw
+# >> strings of the patterns were changed.)
+
+def reference_parse_epdata(strn, start_tag) :
+
+    import re, filum
+
+    fili = strn.splitlines()
+
+    prev_line_was_umatter = False
+
+    if start_tag == 'first_tag':
+        startag_pat = r'^\s*\[(.*?)\](.*)'
+    else :
+        start_tag = filum.fix_str_for_match(start_tag)
+        startag_pat = r'^\s*\[(' + start_tag + r')\](.*)'
+
+    normtag_pat = r'^\s*\[(.*?)\](.*)'
+    defntag_pat = r'^\* \[(.*?)\](.*)'
+
+    tot_entries = 0
+
+    for line in fili :
+
+        line  = line.strip()
+
+        patmatch = re.search(startag_pat,line)
+
+        if patmatch :
+
+            tot_entries += 1
+
+            if tot_entries == 1 :
+
+                start_tag   = patmatch.group(1)
+                startag_pat = r'^\s*\[(' + start_tag + r')\](.*)'
+
+    item_num    = -1
+    dubamp_mode = False
+
+    prev_line_had_content = False
+    prev_line_was_umatter = False
+
+    db = {}
+
+    tag_list = []
+    tag_defs = {}
+
+    umat = []
+
+    for line in fili :
+
+        wline = line
+        line = line.strip()
+
+        patmatch = re.search(startag_pat,line,re.M)
+
+        if patmatch :
+            item_num += 1
+
+        patmatch = re.search(defntag_pat,line,re.M)
+
+        if patmatch :
+
+            strn = patmatch.group(2)
+            tag_defs[patmatch.group(1)] = strn.strip()
+
+        patmatch = re.search(normtag_pat,line,re.M)
+
+        if patmatch and not dubamp_mode:
+
+            strn = patmatch.group(1)
+            tag_name = strn.strip()
+
+            if tag_name not in tag_list : tag_list.append(tag_name)
+
+            if item_num == 0 : db[tag_name] = list(range(0,tot_entries,1))
+
+            strn = str(patmatch.group(2))
+            strn,dubamp_mode = reference_dubamp(strn,dubamp_mode)
+
+            db[tag_name][item_num] = strn.strip()
+
+            prevtag = tag_name
+
+            prev_line_had_content = True
+            prev_line_was_umatter = False
+
+        elif item_num > -1:
+
+            length_of_current_line = len(line)
+
+            if length_of_current_line > 10 :
+                if line[0:5] == '-----' or line[0:5] == ':::::' or \
+                   line[0:5] == '.....' or line[0:5] == '=====' :
+                   is_partition = True
+                else : is_partition = False
+            else : is_partition = False
+
+            if len(umat) == 0: umat = list(range(0,tot_entries,1))
+
+            if prev_line_had_content and length_of_current_line > 0 and \
+                not is_partition and not prev_line_was_umatter:
+
+                line,dubamp_mode = reference_dubamp(line, dubamp_mode)
+                db[prevtag][item_num] += '\n' + line
+
+            elif not prev_line_had_content and length_of_current_line > 0 \
+                    and not is_partition and not prev_line_was_umatter and \
+                    dubamp_mode :
+
+                line,dubamp_mode = reference_dubamp(line, dubamp_mode)
+                db[prevtag][item_num] += '\n\n' + line
+
+            elif not prev_line_had_content and length_of_current_line > 0 \
+                    and not is_partition and not dubamp_mode and not \
+                    prev_line_was_umatter:
+
+                if isinstance(umat[item_num], type(1)) : umat[item_num] = ''
+
+                umat[item_num] += '\n' + wline
+                prev_line_had_content = False
+                prev_line_was_umatter = True
+
+            elif not is_partition and prev_line_was_umatter :
+
+                umat[item_num] += '\n' + wline
+
+            else: prev_line_had_content = False
+
+    for tag in db :
+
+        for i in range(0,tot_entries,1) :
+
+            str_ver = str(db[tag][i])
+
+            if isinstance(db[tag][i],int) or str_ver.isspace() or \
+                (len(str_ver) == 0) :
+
+                db[tag][i] = 'null'
+
+    if len(umat) > 0 :
+
+        for i in range(0,tot_entries,1) :
+
+            if isinstance(umat[i],int) or umat[i].strip().isspace() or \
+                    len(umat[i]) == 0 : umat[i] = 'null'
+
+            umat[i] = umat[i].strip()
+
+        if umat.count('null') == len(umat) : umat = []
+
+    return [db, tag_list, tag_defs, umat]
+
+def reference_dubamp(line, dubamp_mode) :
+
+    if '&&' in line:
+
+        line = line.replace('&&','').strip()
+        dubamp_mode = True - dubamp_mode
+
+    return line,dubamp_mode
+
+# >> Generates an Epdata document of "num_entries" entries with the tags
+# >> "tags" (all of which are in the first entry), using the random number
+# >> generator "rng".  If "simple" is True, each entry is one line per tag,
+# >> followed by empty lines or partitions, as parse_epdata_in_bulk() reads;
+# >> otherwise the entries also have continued lines, "&&" paragraphs, empty
+# >> values, unassigned matter and missing tags.
+
+def make_epdata_document(rng, tags, num_entries, simple) :
+
+    words = ['alpha', 'beta', '3.25', '-17', 'null', 'x y z', 'a, b',
+             'end.', '(paren)', 'tab\tbed']
+
+    def text() : return ' '.join(rng.sample(words, rng.randint(1, 3)))
+
+    def space() : return rng.choice(['', '', ' ', '  ', '\t'])
+
+    lines = []
+
+    # >> Tag definitions, and matter before the first entry:
+
+    for tag in tags :
+        if rng.random() < 0.6 : lines.append('* [' + tag + '] ' + text())
+
+    if not simple and rng.random() < 0.5 : lines.append('preamble ' + text())
+    if rng.random() < 0.5 : lines.append('')
+
+    for n in range(0,num_entries,1) :
+
+        for k in range(0,len(tags),1) :
+
+            tag = tags[k]
+
+            if not simple and n > 0 and k > 0 and rng.random() < 0.2 :
+                continue
+
+            if rng.random() < 0.1 : lines.append(space() + '[' + tag + ']')
+            elif not simple and rng.random() < 0.15 :
+
+                # >> A paragraph block over several lines:
+
+                lines.append(space() + '[' + tag + '] && ' + text())
+                lines.append('')
+                lines.append(text())
+                lines.append('[not a tag] ' + text())
+                lines.append(text() + ' &&')
+
+            else :
+                lines.append(space() + '[' + tag + '] ' + text() + space())
+
+            if not simple and rng.random() < 0.2 :
+                lines.append(space() + 'continued ' + text())
+
+        # >> Matter between entries:
+
+        for _ in range(0,rng.randint(0, 2),1) :
+
+            choice = rng.random()
+
+            if choice < 0.4 : lines.append(space())
+            elif choice < 0.6 : lines.append(rng.choice(['-----', ':::::',
+                                                         '.....', '=====']) * 3)
+            elif not simple and choice < 0.8 :
+                lines.append('')
+                lines.append(space() + 'umat ' + text())
+                lines.append(space() + text())
+            elif not simple :
+                lines.append('')
+                lines.append('short ---')
+
+    return '\n'.join(lines) + rng.choice(['', '\n'])
+
+def check_epdata(strn, start_tag, bulk) :
+
+    reference = reference_parse_epdata(strn, start_tag)
+
+    # >> Simple documents must be parsed in bulk; the others may or may not
+    # >> be, by chance:
+
+    in_bulk = epdobase.parse_epdata_in_bulk(strn, start_tag, []) is not None
+
+    if bulk : assert in_bulk
+
+    assert epdobase.parse_epdata(strn, start_tag) == reference
+
+    return reference, in_bulk
+
+def test_parse_epdata_matches_reference(monkeypatch) :
+
+    import random
+
+    rng = random.Random(20100316)
+
+    docs = []
+    num_in_bulk = 0
+
+    for trial in range(0,300,1) :
+
+        tags = rng.choice([['id', 'x', 'y', 'note'], ['x', 'y'], ['only'],
+                           ['rec 1', 'val-a', 'val b']])
+        start_tag = rng.choice(['first_tag', tags[0]])
+        simple = trial % 2 == 0
+
+        strn = make_epdata_document(rng, tags, rng.randint(1, 12), simple)
+
+        reference, in_bulk = check_epdata(strn, start_tag, simple)
+
+        docs.append((strn, start_tag, reference))
+        num_in_bulk += in_bulk
+
+    # >> (Most of the other documents go to the line-by-line parser:)
+
+    assert len(docs) - num_in_bulk >= 100
+
+    # >> The line-by-line parser alone gives the same results, too:
+
+    monkeypatch.setattr(epdobase, 'parse_epdata_in_bulk',
+                        lambda strn, start_tag, known_tags : None)
+
+    for strn, start_tag, reference in docs :
+        assert epdobase.parse_epdata(strn, start_tag) == reference
+
+def test_parse_epdata_examples() :
+
+    strn = '* [x] East\n* [y] North\n[x] 1\n[y] 2\ncontinued\n\n' + \
+           'umat one\n  umat two\n------------\n[x] 3\n[y] && para\n\n' + \
+           'two [z] &&\n'
+
+    (db, tag_list, tag_defs, umat), in_bulk = check_epdata(strn, 'first_tag',
+                                                            False)
+    assert not in_bulk
+
+    assert tag_list == ['x', 'y']
+    assert tag_defs == {'x' : 'East', 'y' : 'North'}
+    assert db == {'x' : ['1', '3'], 'y' : ['2\ncontinued', 'para\n\ntwo [z]']}
+    assert umat == ['umat one\n  umat two', 'null']
+
+# ------------------------------------------------------------------------------
+# -- Parsing records on access (get_epdices, cl_epdices) -----------------------
+# ------------------------------------------------------------------------------
+
+# >> Returns an epdobase of "num" records, each with an Epdex document in its
+# >> unassigned matter (of one field, as "#" separates the records) and an
+# >> Epdata document in its field "doc":
+
+def load_catalog(tmp_path, num) :
+
+    text = '++ id # doc # umat\n'
+
+    for i in range(0,num,1) :
+        text += str(i) + ' # [x] ' + str(i) + '|NL|[y] ' + str(2 * i) + \
+            ' # ++ p|NL|' + str(i) + '|NL|++\n'
+
+    ep = epdobase.cl_epdobase()
+    ep.load(write_text(tmp_path, 'catalog.dex', text + '++\n'), 
+            format = 'dex')
+
+    return ep
+
+# >> Makes a parser of "epdobase" record the documents it parses, in the
+# >> returned list:
+
+def count_parses(monkeypatch, name) :
+
+    parsed = []
+    parser = getattr(epdobase, name)
+
+    def counting(strn, *args, **kwargs) :
+        parsed.append(strn)
+        return parser(strn, *args, **kwargs)
+
+    monkeypatch.setattr(epdobase, name, counting)
+
+    return parsed
+
+def test_epdices_parse_records_as_before(tmp_path) :
+
+    ep = load_catalog(tmp_path, 5)
+
+    epdices = ep.get_epdices()
+
+    assert len(epdices) == 5
+
+    for i, sub in enumerate(epdices) : 
+        assert sub.flds == ['p']
+        assert sub.dcty == {'p' : [str(i)]}
+        assert sub.meta == {'id' : str(i), 'doc' : ep.dcty['doc'][i]}
+
+    # >> Epdata documents of another field:
+
+    sub = ep.get_epdices('doc', 'dat')[-1]
+
+    assert sub.dcty == {'x' : ['4'], 'y' : ['8']}
+
+def test_epdices_cache_least_recently_used(tmp_path, monkeypatch) :
+
+    ep = load_catalog(tmp_path, 6)
+    parsed = count_parses(monkeypatch, 'parse_epdex')
+
+    epdices = ep.get_epdices(cache_size = 2)
+
+    assert parsed == []
+
+    first = epdices[0]
+    assert epdices[0] is first and len(parsed) == 1
+
+    epdices[1]
+    epdices[0]              # >> 1 is now the least recently used
+    epdices[2]              # >> ... and is dropped
+
+    assert len(parsed) == 3
+    assert list(epdices.cche.keys()) == [0, 2]
+
+    assert epdices[0] is first and len(parsed) == 3
+    epdices[1]
+    assert len(parsed) == 4 and list(epdices.cche.keys()) == [0, 1]
+
+def test_epdices_slices_share_the_cache(tmp_path, monkeypatch) :
+
+    ep = load_catalog(tmp_path, 6)
+    parsed = count_parses(monkeypatch, 'parse_epdex')
+
+    epdices = ep.get_epdices()
+    part = epdices[2:6:2]
+
+    assert len(part) == 2 and parsed == []
+
+    assert part[1] is epdices[4] and part[-1] is epdices[-2]
+    assert len(parsed) == 1
+
+    assert [sub.meta['id'] for sub in part] == ['2', '4']
+    assert len(parsed) == 2
+
+    # >> Records not yet cached show changes to the epdobase:
+
+    ep.umat[5] = '++ p\nchanged\n++'
+    assert epdices[5].dcty == {'p' : ['changed']}
+
+# ------------------------------------------------------------------------------
+# -- Columns held once, viewed as dcty and ndct (cl_epdocolumns) ---------------
+# ------------------------------------------------------------------------------
+
+def test_columns_item_and_slice_assignment(tmp_path) :
+
+    import numpy as np
+
+    ep = load_epdex(tmp_path)
+    ep.numerize()
+
+    # >> Assigning a column replaces the field's records in both views:
+
+    ep.dcty['a'] = ['7', '8', '9', '10']
+    assert list(ep.ndct['a']) == [7, 8, 9, 10]
+
+    ep.ndct['b'] = np.array([0.25, 0.5, 0.75, 1.0])
+    assert ep.dcty['b'] == ['0.25', '0.5', '0.75', '1.0']
+
+    # >> Changing records in place shows in the other view once numerized:
+
+    ep.dcty['a'][0] = '70'
+    ep.dcty['a'][1:3] = ['80', '90']
+    ep.numerize()
+
+    assert list(ep.ndct['a']) == [70, 80, 90, 10]
+
+def test_columns_append_sort_and_del(tmp_path) :
+
+    ep = load_epdex(tmp_path)
+    ep.numerize()
+
+    for field in ep.flds : ep.dcty[field].append(ep.dcty[field][0])
+    ep.numerize()
+
+    assert ep.len() == 5
+    assert list(ep.ndct['a']) == [1, 2, 3, 4, 1]
+
+    ep.dcty['a'].sort(reverse = True)
+    ep.numerize()
+
+    assert list(ep.ndct['a']) == [4, 3, 2, 1, 1]
+
+    del ep.dcty['a'][0]
+    ep.numerize()
+
+    assert list(ep.ndct['a']) == [3, 2, 1, 1]
+
+    # >> Deleting a field drops it from both views:
+
+    del ep.dcty['b']
+
+    assert 'b' not in ep.dcty and 'b' not in ep.ndct
+    assert sorted(ep.ndct.keys()) == ['a', 'c']
+
+def test_columns_copies_are_plain_dicts(tmp_path) :
+
+    import copy
+
+    ep = load_epdex(tmp_path)
+
+    for dcty in [copy.copy(ep.dcty), copy.deepcopy(ep.dcty), ep.dcty.copy()] :
+        assert type(dcty) is dict
+        assert dcty == {'a' : ['1', '2', '3', '4'],
+                        'b' : ['1.5', '2.5', '3.5', '4.5'],
+                        'c' : ['t0', 't1', 't2', 't3']}
+
+    # >> A deep copy doesn't share the columns:
+
+    dcty = copy.deepcopy(ep.dcty)
+    dcty['a'][0] = '100'
+    assert ep.dcty['a'][0] == '1'
+
+    ndct = copy.deepcopy(ep.ndct)
+    ndct['a'][0] = 100
+    assert ep.ndct['a'][0] == 1
+
+# ------------------------------------------------------------------------------
+# -- Writing files a block at a time (save, as_string) -------------------------
+# ------------------------------------------------------------------------------
+
+WRITER_TEXT = '++ a # b # c # umat\n** A # B # C # U\n' + \
+    '1 # 1.5 # x|NL|y # u0\n2 # 2.5 # y # [t] 1\n3 # null # z # \n' + \
+    '4 # 4.5 # p|NL||NL|q # u3|NL|\n++\n'
+
+def load_writer_epdobase(tmp_path) :
+
+    ep = epdobase.cl_epdobase()
+    ep.load(write_text(tmp_path, 'w.dex', WRITER_TEXT), format = 'dex')
+    ep.pres = {'b' : 2}
+
+    return ep
+
+@pytest.mark.parametrize('format', ['dex', 'dat', 'csv', 'tex', 'dob'])
+def test_save_writes_what_as_string_returns(tmp_path, format) :
+
+    ep = load_writer_epdobase(tmp_path)
+
+    # >> (Epdobin only holds the numeric fields:)
+
+    if format == 'dob' : 
+        ep.flds = ['a', 'b']
+        ep.defs = {'a' : 'A', 'b' : 'B'}
+
+    filepath = str(tmp_path / ('out.' + format))
+    ep.save(format, filepath)
+
+    strn = ep.as_string(format)
+
+    with open(filepath, 'rb') as fili : data = fili.read()
+
+    if format == 'dob' : assert data == strn
+    else : assert data.decode('utf-8') == strn
+
+@pytest.mark.parametrize('writer', [epdobase.write_epdex, epdobase.write_epdata,
+                                    epdobase.write_csv, epdobase.write_latex])
+def test_writers_give_the_same_text_in_any_blocks(tmp_path, writer) :
+
+    import io
+
+    ep = load_writer_epdobase(tmp_path)
+    args = (ep.dcty, ep.flds, ep.defs, ep.umat)
+
+    strn = writer(*args)
+
+    for block_rows in [1, 2, 3, 4, 5] : 
+
+        filo = io.StringIO()
+        assert writer(*args, filo = filo, block_rows = block_rows) is None
+        assert filo.getvalue() == strn
+
+def test_writers_read_back(tmp_path) :
+
+    ep = load_writer_epdobase(tmp_path)
+
+    for format in ['dex', 'csv'] : 
+
+        back = epdobase.cl_epdobase()
+        back.load(write_text(tmp_path, 'back.' + format, 
+                             ep.as_string(format)), format = format)
+
+        assert back.flds == ep.flds and back.umat == ep.umat
+        assert back.dcty['c'] == ep.dcty['c']
+
+# >> Unassigned matter is written as the writers wrote it when they added it
+# >> to the dictionary, fields and definitions they were given, which they
+# >> no longer change:
+
+@pytest.mark.parametrize('writer, name, definition', [
+        (epdobase.write_epdex, 'umat', 'Unassigned matter'),
+        (epdobase.write_csv, 'umat', 'umat'),
+        (epdobase.write_latex, 'notes', 'notes')])
+def test_writers_add_umat_as_a_column(tmp_path, writer, name, definition) :
+
+    ep = load_writer_epdobase(tmp_path)
+
+    dcty = dict((field, list(ep.dcty[field])) for field in ep.flds)
+    flds = list(ep.flds)
+    defs = dict(ep.defs)
+    umat = list(ep.umat)
+
+    strn = writer(dcty, flds, defs, umat)
+
+    assert dcty == dict((field, list(ep.dcty[field])) for field in ep.flds)
+    assert (flds, defs, umat) == (ep.flds, ep.defs, ep.umat)
+
+    dcty[name] = umat
+    defs[name] = definition
+
+    assert writer(dcty, flds + [name], defs, []) == strn
+
+def test_save_does_not_copy_or_change_the_epdobase(tmp_path, monkeypatch) :
+
+    import copy
+
+    ep = load_writer_epdobase(tmp_path)
+
+    dcty = dict((field, list(ep.dcty[field])) for field in ep.flds)
+    state = (list(ep.flds), dict(ep.defs), list(ep.umat))
+    umat = ep.umat
+
+    def no_deepcopy(*args, **kwargs) : raise AssertionError('deepcopy')
+
+    monkeypatch.setattr(copy, 'deepcopy', no_deepcopy)
+
+    for format in ['dex', 'dat', 'csv', 'tex'] : 
+        ep.save(format, str(tmp_path / ('out.' + format)))
+        ep.save_part(format, ['a', 'c'], str(tmp_path / ('part.' + format)))
+        ep.as_string(format)
+
+    assert dcty == dict((field, list(ep.dcty[field])) for field in ep.flds)
+    assert (ep.flds, ep.defs, ep.umat) == state and ep.umat is umat
+    assert sorted(ep.strs) == ['a', 'b', 'c']
+
+# ------------------------------------------------------------------------------
+# -- Holding columns as numbers alone (load, drop_strings, save) ---------------
+# ------------------------------------------------------------------------------
+
+XYZ_TEXT = 'x,y,z\n1.250,-0.500,3\n-0.000,10.125,4\n2.000,0.010,-5\n'
+
+def test_float_columns_are_held_as_numbers_alone(tmp_path) :
+
+    ep = epdobase.cl_epdobase()
+    ep.load(write_text(tmp_path, 'xyz.csv', XYZ_TEXT))
+
+    assert ep.strs == {}
+    assert ep.pres == {'x' : 3, 'y' : 3}
+
+    # >> The text written is the text read, and writing it brings back no
+    # >> strings: 
+
+    ep.save('csv', str(tmp_path / 'out.csv'))
+
+    assert ep.strs == {}
+
+    rows = (tmp_path / 'out.csv').read_text().replace('"', '')
+    assert rows == XYZ_TEXT
+
+    # >> ... but reading dcty does, as before:
+
+    assert ep.dcty['y'] == ['-0.500', '10.125', '0.010']
+    assert sorted(ep.strs) == ['y']
+
+@pytest.mark.parametrize('text', ['x\n1.5\n2.25\n',      # >> places differ
+                                  'x\n01.5\n2.0\n',      # >> leading zero
+                                  'x\n+1.5\n2.0\n',      # >> plus sign
+                                  'x\n1.5e3\n2.0\n',     # >> exponent
+                                  'x\n1.5\nnan\n',       # >> not a number
+                                  'x\n1234567890.1234567\n1.0\n'])
+def test_float_columns_keep_other_text(tmp_path, text) :
+
+    ep = epdobase.cl_epdobase()
+    ep.load(write_text(tmp_path, 'x.csv', text))
+
+    assert sorted(ep.strs) == ['x']
+    assert 'x' not in ep.pres
+
+def test_float_columns_keep_text_of_other_precision(tmp_path) :
+
+    ep = epdobase.cl_epdobase()
+    ep.pres = {'x' : 2}
+    ep.load(write_text(tmp_path, 'xyz.csv', XYZ_TEXT))
+
+    assert sorted(ep.strs) == ['x']
+    assert ep.pres == {'x' : 2, 'y' : 3}
+
+def test_saving_numbers_brings_back_no_strings(tmp_path) :
+
+    import numpy as np
+
+    ep = load_epdex(tmp_path)
+    ep.numerize()
+    ep.drop_strings(['a', 'b'])
+
+    assert sorted(ep.strs) == ['c']
+
+    for format in ['dex', 'dat', 'csv', 'tex'] : 
+        ep.save(format, str(tmp_path / ('out.' + format)))
+        ep.as_string(format)
+
+    assert sorted(ep.strs) == ['c']
+    assert ep.pres == {'b' : 1}
+    assert list(ep.ndct['a']) == [1, 2, 3, 4]
+    assert np.allclose(ep.ndct['b'], [1.5, 2.5, 3.5, 4.5])
+
+# >> The CSV written from the numbers of ndct is the CSV written from the
+# >> strings alone, nulls, text and rounding included:
+
+def test_csv_from_numbers_matches_csv_from_strings(tmp_path) :
+
+    import numpy as np
+
+    ep = epdobase.cl_epdobase()
+    ep.load(write_text(tmp_path, 'p.csv', 'f,g,i,t,u\n' + 
+                       '2.50,1.25,7,a,1\nnull,-0.004,-3,b,2\n' +
+                       'nan,1e3,12,3.5,3\n0.125,2.5,0,c,4\n'))
+    ep.ndct['u'] = np.array([0.5, np.nan, -1.75, 2.0])
+    ep.pres = {'f' : 1, 'g' : 2, 'i' : 0, 't' : 1, 'u' : 1}
+
+    dcty = dict((field, list(ep.dcty[field])) for field in ep.flds)
+    expected = epdobase.write_csv(dcty, ep.flds, ep.defs, [], pres = ep.pres)
+
+    assert ep.as_string('csv') == expected
+
+    ep.save('csv', str(tmp_path / 'out.csv'))
+    assert (tmp_path / 'out.csv').read_text() == expected
+
+    # >> ... as is the CSV of fields held only as numbers, whose nulls are
+    # >> written as dcty gives them:
+
+    ep.drop_strings(['f', 'g', 'i'])
+
+    assert sorted(ep.strs) == ['t', 'u']
+    assert ep.as_string('csv') == expected.replace('"nan"', '"null"')
+    assert sorted(ep.strs) == ['t', 'u']
+
+# ------------------------------------------------------------------------------
+# -- Selecting records (shrink, select, compact) -------------------------------
+# ------------------------------------------------------------------------------
+
+def test_shrink_selects_umat_of_one_entry_per_record(tmp_path) :
+
+    ep = load_epdex(tmp_path, umat = ['u0', 'u1', 'u2', 'u3'])
+    ep.shrink([3, 1])
+
+    assert ep.dcty['a'] == ['4', '2']
+    assert ep.umat == ['u3', 'u1']
+
+def test_shrink_keeps_umat_of_whole_epdobase(tmp_path) :
+
+    ep = load_epdex(tmp_path)
+    ep.umat = ['about the', 'whole scan']
+    ep.shrink([3, 1, 0])
+
+    assert ep.dcty['a'] == ['4', '2', '1']
+    assert ep.umat == ['about the', 'whole scan']
+
+def test_compact_view_does_not_share_umat(tmp_path) :
+
+    ep = load_epdex(tmp_path)
+    ep.umat = ['about the scan']
+
+    part = ep.select([0, 2]).compact()
+    part.umat.append('more')
+    part.dcty['a'][0] = '100'
+
+    assert ep.umat == ['about the scan']
+    assert ep.dcty['a'] == ['1', '2', '3', '4']
+    assert part.dcty['a'] == ['100', '3']
+
+    ep = load_epdex(tmp_path, umat = ['u0', 'u1', 'u2', 'u3'])
+
+    part = ep.filter({'a' : ('>', 2)}).compact()
+
+    assert part.umat == ['u2', 'u3']
+    assert part.dcty['c'] == ['t2', 't3']
+
+# >> Returns an epdobase of "num" random records, with unassigned matter of
+# >> one entry per record, and the fields "a" (integers), "b" (floats, held
+# >> as numbers alone), "c" (text) and "d" (integers, some null, masked by
+# >> the schema):
+
+def nested_epdobase(rng, num) :
+
+    ep = epdobase.cl_epdobase()
+    ep.flds = ['a', 'b', 'c', 'd']
+
+    ep.dcty['a'] = [str(rng.randint(-50, 50)) for _ in range(num)]
+    ep.dcty['b'] = [str(rng.randint(-999, 999) / 100.0) for _ in range(num)]
+    ep.dcty['c'] = ['t' + str(i) for i in range(num)]
+    ep.dcty['d'] = ['null' if rng.random() < 0.3 else str(i) 
+                    for i in range(num)]
+    ep.umat = ['u' + str(i) for i in range(num)]
+
+    ep.numerize(schema = {'d' : {'dtype' : 'int32'}})
+    ep.drop_strings(['b'])
+
+    return ep
+
+# >> Checks that the records of "ep" (or of a view of it) are the records of
+# >> "orig" at the indices "rows":
+
+def check_selected(ep, orig, rows) :
+
+    import numpy as np
+
+    for field in ['a', 'b', 'c', 'd'] : 
+
+        if isinstance(ep, epdobase.cl_epdoview) : column = ep[field]
+        else : column = ep.ndct[field]
+
+        expected = orig.ndct[field][rows]
+
+        np.testing.assert_array_equal(np.ma.getdata(column), 
+                                      np.ma.getdata(expected))
+        np.testing.assert_array_equal(np.ma.getmaskarray(column), 
+                                      np.ma.getmaskarray(expected))
+
+    if isinstance(ep, epdobase.cl_epdoview) : return
+
+    assert ep.len() == len(rows)
+    assert ep.umat == [orig.umat[i] for i in rows]
+
+    for field in ['a', 'c', 'd'] : 
+        assert list(ep.dcty[field]) == [orig.dcty[field][i] for i in rows]
+
+    assert 'b' not in ep.strs
+
+def test_nested_shrink_and_select_match_eager_indexing() :
+
+    import numpy as np
+    import random
+
+    rng = random.Random(23)
+
+    for trial in range(0,60,1) : 
+
+        num = rng.randint(1, 40)
+        orig = nested_epdobase(rng, num)
+
+        ep = orig.select(range(num)).compact()
+        rows = np.arange(num)
+
+        for step in range(0,rng.randint(1, 5),1) : 
+
+            # >> Indices (repeated, out of order, or none) or flags:
+
+            if rng.random() < 0.3 : 
+                inds = [rng.random() < 0.6 for _ in range(len(rows))]
+                picked = np.flatnonzero(inds)
+            else : 
+                inds = [rng.randrange(len(rows)) for _ in 
+                        range(rng.randint(0, len(rows) + 2))] \
+                    if len(rows) else []
+                picked = np.array(inds, dtype = np.intp)
+
+            kind = rng.choice(['shrink', 'compact', 'view'])
+
+            if kind == 'shrink' : ep.shrink(inds)
+            elif kind == 'compact' : ep = ep.select(inds).compact()
+            else : 
+
+                # >> A view of a view, then compacted:
+
+                view = ep.select(inds)
+                sub = [rng.randrange(len(picked)) for _ in 
+                       range(rng.randint(0, len(picked) + 2))] \
+                    if len(picked) else []
+                picked = picked[np.array(sub, dtype = np.intp)]
+
+                view = view.select(sub)
+                check_selected(view, orig, rows[picked])
+                ep = view.compact()
+
+            rows = rows[picked]
+
+            # >> Some columns are read (and so copied) between selections:
+
+            for field in rng.sample(['a', 'b', 'c', 'd'], rng.randint(0, 4)) :
+                if rng.random() < 0.5 : ep.ndct[field]
+                elif field != 'b' : ep.dcty[field]
+
+        check_selected(ep, orig, rows.tolist())
+
+        # >> The original is left as it was:
+
+        check_selected(orig, orig, list(range(num)))
+
+def test_nested_shrink_shares_indices_and_follows_changes() :
+
+    import random
+
+    ep = nested_epdobase(random.Random(230), 10)
+    for field in ep.flds : ep.ndct[field]
+
+    ep.shrink([9, 7, 5, 3, 1])
+    ep.shrink([4, 0, 2])
+
+    # >> Columns selected together still share one array of indices, of the
+    # >> records of the original columns:
+
+    assert all(isinstance(column, epdobase.cl_epdoselection) 
+               for column in list(ep.strs.values()) + list(ep.nums.values()))
+    assert len(set(id(column.rows) for column in ep.nums.values())) == 1
+    assert list(ep.nums['a'].rows) == [1, 9, 5]
+
+    # >> Changing strings of a shrunk epdobase is numerized as before:
+
+    ep.dcty['a'][1] = '1000'
+    ep.numerize()
+
+    assert list(ep.ndct['a'])[1] == 1000
+    assert list(ep.select([1, 1]).compact().dcty['a']) == ['1000', '1000']
+    assert ep.dcty['c'] == ['t1', 't9', 't5']
+    assert ep.umat == ['u1', 'u9', 'u5']
+
+# ------------------------------------------------------------------------------
+# -- Filtering records (where, filter, predicate_mask) -------------------------
+# ------------------------------------------------------------------------------
+
+# >> Returns an epdobase of "num" random records, with the fields "x" (floats,
+# >> some null, so NaN), "i" (integers, some null, masked by the schema) and 
+# >> "n" (integers):
+
+def filter_epdobase(rng, num) :
+
+    ep = epdobase.cl_epdobase()
+    ep.flds = ['x', 'i', 'n']
+
+    ep.dcty['x'] = ['null' if rng.random() < 0.1 else 
+                    str(round(rng.uniform(-5, 5), 2)) for _ in range(num)]
+    ep.dcty['i'] = ['null' if rng.random() < 0.1 else 
+                    str(rng.randint(-5, 5)) for _ in range(num)]
+    ep.dcty['n'] = [str(rng.randint(0, 9)) for _ in range(num)]
+
+    ep.numerize(schema = {'i' : {'dtype' : 'int32'}})
+
+    return ep
+
+# >> Returns a random predicate (as where() takes them) on a field:
+
+def random_predicate(rng) :
+
+    def bound() : return None if rng.random() < 0.2 else rng.randint(-5, 5)
+
+    def one() : 
+        if rng.random() < 0.4 : return (bound(), bound())
+        return (rng.choice(['<', '<=', '>', '>=', '==', '!=']), 
+                rng.randint(-5, 5) + rng.choice([0, 0.5]))
+
+    if rng.random() < 0.3 : return [one() for _ in range(rng.randint(0, 3))]
+
+    return one()
+
+# >> The mask of the records (of the numbers "ndct") satisfying "preds", one
+# >> whole-column expression at a time; nulls satisfy no predicate:
+
+def reference_mask(ndct, preds) : 
+
+    import numpy as np
+    import operator
+
+    ops = {'<' : operator.lt, '<=' : operator.le, '>' : operator.gt,
+           '>=' : operator.ge, '==' : operator.eq, '!=' : operator.ne}
+
+    nrecs = len(ndct[list(ndct.keys())[0]])
+    mask = np.ones(nrecs, dtype = bool)
+
+    for field in preds : 
+
+        column = ndct[field]
+        values = np.ma.getdata(column).astype(float)
+        nulls = np.ma.getmaskarray(column) | np.isnan(values)
+
+        preds_field = preds[field]
+        if not isinstance(preds_field, list) : preds_field = [preds_field]
+
+        for pred in preds_field : 
+
+            if isinstance(pred[0], str) : 
+                mask &= ops[pred[0]](values, pred[1]) & ~nulls
+                continue
+
+            if pred[0] is not None : mask &= (values >= pred[0]) & ~nulls
+            if pred[1] is not None : mask &= (values <= pred[1]) & ~nulls
+
+    return mask
+
+def test_where_matches_reference_mask() :
+
+    import numpy as np
+    import random
+
+    rng = random.Random(17)
+    ep = filter_epdobase(rng, 200)
+
+    assert np.ma.isMaskedArray(ep.ndct['i'])
+    assert np.isnan(ep.ndct['x']).any()
+
+    for trial in range(0,300,1) : 
+
+        fields = rng.sample(['x', 'i', 'n'], rng.randint(1, 3))
+        preds = dict((field, random_predicate(rng)) for field in fields)
+
+        expected = np.flatnonzero(reference_mask(ep.ndct, preds))
+
+        assert list(ep.where(preds)) == list(expected), preds
+        assert list(ep.filter(preds).rows) == list(expected), preds
+
+        # >> The same, a few records at a time:
+
+        for block_rows in [1, 7] :
+            mask = epdobase.predicate_mask(ep.ndct, preds, 
+                                           block_rows = block_rows)
+            assert list(np.flatnonzero(mask)) == list(expected), preds
+
+def test_where_and_filter_of_views_match_reference_mask() :
+
+    import numpy as np
+    import random
+
+    rng = random.Random(170)
+    ep = filter_epdobase(rng, 150)
+
+    for trial in range(0,100,1) : 
+
+        rows = np.array(sorted(rng.sample(range(150), rng.randint(0, 150))))
+        view = ep.select(rows)
+
+        preds = {'x' : random_predicate(rng), 'i' : random_predicate(rng)}
+        mask = reference_mask(ep.ndct, preds)
+
+        # >> where() gives positions in the view, filter() a view of "ep":
+
+        assert list(view.where(preds)) == list(np.flatnonzero(mask[rows]))
+        assert list(view.filter(preds).rows) == list(rows[mask[rows]])
+
+        # >> Filtering a filtered view is filtering by both:
+
+        more = {'n' : random_predicate(rng)}
+        both = mask & reference_mask(ep.ndct, more)
+
+        assert list(view.filter(preds).filter(more).rows) == \
+            list(rows[both[rows]])
+
+def test_filter_examples() :
+
+    ep = sort_epdobase(['1', 'null', '3', '2', '5'])
+
+    assert list(ep.where({'z' : ('<', 3)})) == [0, 3]
+    assert list(ep.where({'z' : ('!=', 3)})) == [0, 3, 4]
+    assert list(ep.where({'z' : (2, None)})) == [2, 3, 4]
+    assert list(ep.where({'z' : [(None, 4), ('!=', 1)]})) == [2, 3]
+    assert list(ep.where({'z' : []})) == [0, 1, 2, 3, 4]
+
+    view = ep.filter({'z' : (2, 5)})
+    assert list(view['i']) == [2, 3, 4]
+    assert list(view.filter({'z' : ('>', 2)})['z']) == [3, 5]
+    assert view.compact().dcty['i'] == ['2', '3', '4']
+
+    for preds in [{'z' : ('<', 1, 2)}, {'z' : ('=', 2)}, {'z' : [(1,)]}] :
+        with pytest.raises(ValueError) : ep.where(preds)
+
+    with pytest.raises(KeyError) : ep.where({'nothing' : ('<', 2)})
+
+# ------------------------------------------------------------------------------
+# -- Merging epdobases (merge_epdobase) ----------------------------------------
+# ------------------------------------------------------------------------------
+
+# >> Returns an epdobase of "num" random records of the fields "flds", whose 
+# >> values are often empty or null, with unassigned matter of one entry per
+# >> record if "umat":
+
+def random_merge_epdobase(rng, flds, num, umat) :
+
+    vals = ['a', 'b', 'c', 'd', '', ' ', 'null']
+
+    ep = epdobase.cl_epdobase()
+    ep.flds = list(flds)
+
+    for field in flds : 
+        ep.dcty[field] = [rng.choice(vals) for _ in range(num)]
+        ep.defs[field] = 'Field ' + field + ' of ' + str(num)
+
+    if umat : ep.umat = [rng.choice(vals) for _ in range(num)]
+
+    return ep
+
+# >> Merges "ep2" into "ep1" as the original merge_epdobase() did, comparing
+# >> each record of ep2 with every record of ep1, and returns the fields, the
+# >> records (as a list of dictionaries) and the unassigned matter:
+
+def reference_merge(ep1, ep2, match_fields, how) : 
+
+    def null(val) : return 'null' if val.strip() == '' else val
+
+    flds = ep1.flds + [field for field in ep2.flds if field not in ep1.flds]
+
+    len_ep1 = ep1.len()
+
+    recs = [dict((field, null(ep1.dcty[field][j]) if field in ep1.flds 
+                  else 'null') for field in flds) for j in range(len_ep1)]
+    keys = [tuple(rec[field] for field in match_fields) for rec in recs]
+
+    umat = [null(val) for val in ep1.umat]
+    if ep2.umat and not umat : umat = ['null'] * len_ep1
+
+    matched = []
+    added, added_umat = [], []
+
+    for i in range(0,ep2.len(),1) : 
+
+        rec2 = dict((field, null(ep2.dcty[field][i])) for field in ep2.flds)
+        key = tuple(rec2[field] for field in match_fields)
+
+        js = [j for j in range(0,len_ep1,1) if keys[j] == key]
+
+        if len(js) > 1 : raise ValueError(js)
+
+        if len(js) == 1 : 
+
+            j = js[0]
+            if j not in matched : matched.append(j)
+
+            for field in ep2.flds : 
+                if rec2[field] != 'null' : recs[j][field] = rec2[field]
+
+            if ep2.umat and null(ep2.umat[i]) != 'null' : 
+                umat[j] = null(ep2.umat[i])
+
+        elif how == 'outer' : 
+
+            added.append(dict((field, rec2.get(field, 'null')) 
+                              for field in flds))
+
+            if ep2.umat : added_umat.append(null(ep2.umat[i]))
+            elif umat : added_umat.append('null')
+
+    if how == 'inner' : 
+        keep = sorted(matched)
+        recs = [recs[j] for j in keep]
+        if umat : umat = [umat[j] for j in keep]
+
+    return flds, recs + added, umat + added_umat
+
+@pytest.mark.parametrize('how', ['inner', 'left', 'outer'])
+def test_merge_matches_reference(how) :
+
+    import copy
+    import random
+
+    rng = random.Random(20)
+
+    merged = raised = 0
+
+    for trial in range(0,200,1) : 
+
+        match_fields = rng.choice([['k'], ['k', 'm']])
+        umat1, umat2 = rng.random() < 0.5, rng.random() < 0.5
+
+        ep1 = random_merge_epdobase(rng, ['k', 'm', 'x'], 
+                                    rng.randint(0, 6), umat1)
+        ep2 = random_merge_epdobase(rng, ['m', 'y', 'k', 'x'], 
+                                    rng.randint(0, 12), umat2)
+
+        before = copy.deepcopy((ep1.dcty, ep1.umat, ep2.dcty, ep2.umat))
+
+        try : expected = reference_merge(ep1, ep2, match_fields, how)
+        except ValueError : 
+            with pytest.raises(ValueError) : 
+                epdobase.merge_epdobase(ep1, ep2, match_fields, how = how)
+            raised += 1
+            continue
+
+        ep3 = epdobase.merge_epdobase(ep1, ep2, match_fields, how = how)
+        merged += 1
+
+        flds, recs, umat = expected
+
+        assert ep3.flds == flds
+        assert ep3.len() == len(recs)
+        assert [dict((field, ep3.dcty[field][j]) for field in flds) 
+                for j in range(0,ep3.len(),1)] == recs
+        assert ep3.umat == umat
+
+        assert ep3.defs == {'k' : ep2.defs['k'], 'm' : ep2.defs['m'], 
+                            'x' : ep2.defs['x'], 'y' : ep2.defs['y']}
+
+        # >> The inputs are left as they were (not nullified):
+
+        assert (ep1.dcty, ep1.umat, ep2.dcty, ep2.umat) == before
+
+    assert merged > 50 and raised > 10
+
+def test_merge_with_duplicate_keys() :
+
+    ep1 = epdobase.cl_epdobase()
+    ep1.flds = ['k', 'x']
+    ep1.dcty['k'] = ['a', 'b', 'b']
+    ep1.dcty['x'] = ['1', '2', '3']
+
+    ep2 = epdobase.cl_epdobase()
+    ep2.flds = ['k', 'y']
+    ep2.dcty['k'] = ['a', 'c', 'a', 'c']
+    ep2.dcty['y'] = ['p', 'q', 'null', 'r']
+
+    # >> Records of ep2 with the same key are each merged into the record of
+    # >> ep1 they match (the last non-null value winning), or each added:
+
+    for how, ks, xs, ys in [('inner', ['a'], ['1'], ['p']),
+                            ('left', ['a', 'b', 'b'], ['1', '2', '3'], 
+                             ['p', 'null', 'null']),
+                            ('outer', ['a', 'b', 'b', 'c', 'c'], 
+                             ['1', '2', '3', 'null', 'null'],
+                             ['p', 'null', 'null', 'q', 'r'])] : 
+
+        ep3 = epdobase.merge_epdobase(ep1, ep2, ['k'], how = how)
+
+        assert (ep3.dcty['k'], ep3.dcty['x'], ep3.dcty['y']) == (ks, xs, ys)
+
+    # >> Records of ep1 with the same key are an error only once matched:
+
+    ep2.dcty['k'][1] = 'b'
+
+    with pytest.raises(ValueError) : 
+        epdobase.merge_epdobase(ep1, ep2, ['k'])
+
+    # >> add_nonmatching_records is how = 'outer' or 'left', and is 
+    # >> overridden by "how":
+
+    ep2.dcty['k'][1] = 'c'
+
+    assert epdobase.merge_epdobase(ep1, ep2, ['k']).len() == 5
+    assert epdobase.merge_epdobase(ep1, ep2, ['k'], False).len() == 3
+    assert epdobase.merge_epdobase(ep1, ep2, ['k'], False, 'inner').len() == 1
+
+    with pytest.raises(ValueError) : 
+        epdobase.merge_epdobase(ep1, ep2, ['k'], how = 'right')
+
+# ------------------------------------------------------------------------------
+# -- Aggregating groups of records (group_by, agg) -----------------------------
+# ------------------------------------------------------------------------------
+
+AGGREGATES = ['count', 'sum', 'min', 'max', 'mean', 'std', 'median']
+
+# >> Returns an epdobase of "num" random records, grouped by the fields "g"
+# >> (integers) and "s" (text), with the values "x" (floats, some null, so
+# >> NaN, and all null in group g = 4) and "i" (integers, some null, masked
+# >> by the schema):
+
+def group_epdobase(rng, num) :
+
+    ep = epdobase.cl_epdobase()
+    ep.flds = ['g', 's', 'x', 'i']
+
+    ep.dcty['g'] = [str(rng.randint(0, 4)) for _ in range(num)]
+    ep.dcty['s'] = [rng.choice(['p', 'q', 'r']) for _ in range(num)]
+    ep.dcty['x'] = ['null' if g == '4' or rng.random() < 0.2 else 
+                    str(round(rng.uniform(-10, 10), 3)) for g in ep.dcty['g']]
+    ep.dcty['i'] = ['null' if rng.random() < 0.3 else 
+                    str(rng.randint(-100, 100)) for _ in range(num)]
+
+    ep.numerize(schema = {'i' : {'dtype' : 'int32'}})
+
+    return ep
+
+# >> The aggregates of the values "column" of the records "recs" (a group),
+# >> computed for the group alone:
+
+def reference_aggregate(column, recs, agg_name) : 
+
+    import numpy as np
+
+    vals = np.ma.getdata(column)[recs].astype(float)
+    vals = vals[~np.ma.getmaskarray(column)[recs] & ~np.isnan(vals)]
+
+    if agg_name == 'count' : return len(vals)
+    if agg_name == 'sum' : return vals.sum()
+    if len(vals) == 0 : return np.nan
+
+    return {'min' : np.min, 'max' : np.max, 'mean' : np.mean, 'std' : np.std,
+            'median' : np.median}[agg_name](vals)
+
+@pytest.mark.parametrize('fields', ['g', 's', ['s', 'g']])
+def test_agg_matches_a_loop_over_groups(fields) :
+
+    import numpy as np
+    import random
+
+    rng = random.Random(21)
+
+    for num in [1, 2, 7, 300] : 
+
+        ep = group_epdobase(rng, num)
+        groups = ep.group_by(fields)
+        out = groups.agg({'x' : AGGREGATES, 'i' : AGGREGATES})
+
+        # >> The groups, in sorted order:
+
+        names = fields if isinstance(fields, list) else [fields]
+        keys = sorted(set(zip(*[ep.dcty[name] for name in names])),
+                      key = lambda key : [int(val) if name == 'g' else val
+                                          for name, val in zip(names, key)])
+
+        assert len(groups) == out.len() == len(keys)
+        assert out.flds == names + [fld + '_' + agg_name for fld in ['x', 'i']
+                                    for agg_name in AGGREGATES]
+
+        for name in names : 
+            assert [str(val) for val in out.ndct[name]] == \
+                [key[names.index(name)] for key in keys]
+
+        for k, key in enumerate(keys) : 
+
+            recs = [j for j in range(0,num,1) 
+                    if tuple(ep.dcty[name][j] for name in names) == key]
+
+            for fld in ['x', 'i'] : 
+                for agg_name in AGGREGATES : 
+                    np.testing.assert_allclose(
+                        out.ndct[fld + '_' + agg_name][k], 
+                        reference_aggregate(ep.ndct[fld], recs, agg_name),
+                        rtol = 1e-12, atol = 1e-12)
+
+        assert out.ndct['x_count'].dtype == np.int64
+
+def test_agg_of_groups_without_values() :
+
+    import numpy as np
+    import random
+
+    ep = group_epdobase(random.Random(210), 40)
+
+    out = ep.group_by('g').agg({'x' : AGGREGATES})
+    last = list(out.ndct['g']).index(4)
+
+    assert out.ndct['x_count'][last] == 0
+    assert out.ndct['x_sum'][last] == 0.0
+
+    for agg_name in ['min', 'max', 'mean', 'std', 'median'] : 
+        assert np.isnan(out.ndct['x_' + agg_name][last])
+        assert not np.isnan(np.delete(out.ndct['x_' + agg_name], last)).any()
+
+    # >> An epdobase without records has no groups:
+
+    empty = ep.select([]).compact()
+    out = empty.group_by('g').agg({'x' : AGGREGATES})
+
+    assert len(empty.group_by('g')) == 0
+    for name in out.flds : assert len(out.ndct[name]) == 0
+
+    with pytest.raises(ValueError) : ep.group_by('g').agg({'s' : 'sum'})
+    with pytest.raises(ValueError) : ep.group_by('g').agg({'x' : 'mode'})
+
+# ------------------------------------------------------------------------------
+# -- Declaring column types (numerize_column_schema, schema) -------------------
+# ------------------------------------------------------------------------------
+
+def test_schema_integers_with_nulls_are_masked() :
+
+    import numpy as np
+
+    column = epdobase.numerize_column_schema(['1', 'null', '', '-9999', '70'],
+                                             {'dtype' : 'int32', 
+                                              'null' : -9999})
+
+    assert column.dtype == np.int32
+    assert list(np.ma.getmaskarray(column)) == [False, True, True, True, False]
+    assert list(column.compressed()) == [1, 70]
+
+    # >> Numbers are flagged as nulls as strings are (NaNs too), and a column
+    # >> without nulls is a plain array:
+
+    column = epdobase.numerize_column_schema(np.array([1.0, np.nan, -9999.0]),
+                                             {'dtype' : 'int64', 
+                                              'null' : [-9999]})
+
+    assert list(np.ma.getmaskarray(column)) == [False, True, True]
+
+    column = epdobase.numerize_column_schema(['1', '2'], {'dtype' : 'int16'})
+
+    assert not np.ma.isMaskedArray(column) and column.dtype == np.int16
+
+def test_schema_floats_and_scales() :
+
+    import numpy as np
+
+    # >> Float nulls are NaNs; scaled integers are rounded:
+
+    column = epdobase.numerize_column_schema(['123', '-250', 'null'],
+                                             {'dtype' : 'float32', 
+                                              'scale' : 0.01})
+
+    assert column.dtype == np.float32 and not np.ma.isMaskedArray(column)
+    np.testing.assert_allclose(column, [1.23, -2.5, np.nan])
+
+    column = epdobase.numerize_column_schema(['1.26', '-2.5', '0.04'],
+                                             {'dtype' : 'int16', 'scale' : 10})
+
+    assert column.dtype == np.int16 and list(column) == [13, -25, 0]
+
+    # >> Undeclared options give what numerize_column() gives:
+
+    strs = ['1.5', '-2', '3e2', 'nan']
+
+    np.testing.assert_array_equal(
+        epdobase.numerize_column_schema(strs, {}), 
+        epdobase.numerize_column(strs))
+
+    assert list(epdobase.numerize_column_schema(['a', '1'], {'dtype' : 'str'}))\
+        == ['a', '1']
+
+@pytest.mark.parametrize('column, spec', [
+        (['70000'], {'dtype' : 'int16'}),       # >> out of range
+        (['1.5'], {'dtype' : 'int32'}),         # >> decimals
+        (['a'], {'dtype' : 'int32'}),           # >> not a number
+        (['1'], {'dtype' : 'bool'})])           # >> not a supported type
+def test_schema_rejects_values_that_do_not_fit(column, spec) :
+
+    with pytest.raises(ValueError) : 
+        epdobase.numerize_column_schema(column, spec)
+
+def test_load_and_numerize_with_schema(tmp_path) :
+
+    import numpy as np
+
+    schema = {'i' : {'dtype' : 'int16'}, 'x' : {'dtype' : 'float32'}}
+
+    ep = epdobase.cl_epdobase()
+    ep.load(write_text(tmp_path, 's.csv', 'i,x,t\n1,1.5,a\nnull,2.5,b\n' + 
+                       '3,null,c\n'), schema = schema)
+
+    assert ep.schm == schema
+    assert ep.ndct['i'].dtype == np.int16 and ep.ndct['x'].dtype == np.float32
+    assert list(np.ma.getmaskarray(ep.ndct['i'])) == [False, True, False]
+    assert list(ep.ndct['t']) == ['a', 'b', 'c']
+
+    # >> The declared fields keep their strings, and masked nulls are written
+    # >> as "null":
+
+    assert ep.dcty['i'] == ['1', 'null', '3']
+    assert '"null","2.5"' in ep.as_string('csv')
+
+    # >> Declaring another type converts the field again, from its strings:
+
+    ep.numerize(schema = {'i' : {'dtype' : 'float64'}})
+
+    assert ep.ndct['i'].dtype == np.float64 and np.isnan(ep.ndct['i'][1])
+    assert ep.ndct['x'].dtype == np.float64
+
+def test_load_epdex_with_schema(tmp_path) :
+
+    import numpy as np
+
+    ep = epdobase.cl_epdobase()
+    ep.load(write_text(tmp_path, 's.dex', '++ a # b\n1 # 2.5\nnull # 3\n++\n'),
+            schema = {'a' : {'dtype' : 'int32'}, 'b' : {'dtype' : 'float32'}})
+
+    assert ep.ndct['a'].dtype == np.int32 and ep.ndct['b'].dtype == np.float32
+    assert list(np.ma.getmaskarray(ep.ndct['a'])) == [False, True]
+    assert list(ep.ndct['b']) == [2.5, 3.0]
+
+# ------------------------------------------------------------------------------
+# -- Characterizing records (characterize, characterize_column) ----------------
+# ------------------------------------------------------------------------------
+
+# >> Returns "num" random floats of many magnitudes, including ones halfway
+# >> between two values of the last of "places" decimal places, negative ones
+# >> that round to zero, and ones too large to be scaled to integers:
+
+def random_floats(rng, num, places) : 
+
+    def one() : 
+        kind = rng.randint(0, 5)
+        if kind == 0 : return rng.uniform(-1, 1) * 10 ** rng.randint(-3, 12)
+        if kind == 1 : return (rng.randint(-10**6, 10**6) + 0.5) / 10**places
+        if kind == 2 : return -rng.random() * 10 ** -(places + 1)
+        if kind == 3 : return rng.choice([0.0, -0.0, 1e300, -2.0**63, 
+                                          float('inf'), float('-inf')])
+        return round(rng.uniform(-1000, 1000), rng.randint(0, places + 2))
+
+    return [one() for _ in range(num)]
+
+def test_characterize_column_matches_format() :
+
+    import numpy as np
+    import random
+
+    rng = random.Random(25)
+
+    for places in [None, 0, 1, 2, 3, 6] : 
+
+        vals = random_floats(rng, 2000, places or 0)
+        nulls = [rng.random() < 0.1 for _ in vals]
+
+        column = np.array([np.nan if null else val 
+                           for val, null in zip(vals, nulls)])
+
+        strs = epdobase.characterize_column(column, places)
+
+        assert isinstance(strs, epdobase.cl_epdolist) and not strs.dirt
+
+        for val, null, strn in zip(vals, nulls, strs) : 
+            if null : expected = 'null'
+            elif places is None : expected = str(val)
+            else : expected = '%.*f' % (places, val)
+
+            # >> Integers (no places) have no negative zero:
+
+            if expected == '-0' : expected = '0'
+
+            assert strn == expected, (val, places)
+
+def test_characterize_column_of_integers() :
+
+    import numpy as np
+    import random
+
+    rng = random.Random(250)
+
+    ints = [rng.randint(-2**40, 2**40) for _ in range(500)]
+    ints += [0, -1, 2**63 - 1, -2**63]
+
+    column = np.ma.masked_array(np.array(ints, dtype = np.int64), 
+                                mask = [i % 7 == 0 for i in range(len(ints))])
+
+    for places in [None, 0, 2] : 
+
+        strs = epdobase.characterize_column(column, places)
+
+        for i, val in enumerate(ints) : 
+            if i % 7 == 0 : expected = 'null'
+            elif places in [None, 0] : expected = str(val)
+            else : expected = '%.*f' % (places, val)
+            assert strs[i] == expected, (val, places)
+
+    for dtype in [np.int8, np.uint16, np.uint64, np.float32] : 
+
+        column = np.array([0, 1, 7, 100], dtype = dtype)
+        assert list(epdobase.characterize_column(column, 1)) == \
+            ['0.0', '1.0', '7.0', '100.0']
+
+def test_characterize_uses_precision_and_fields(tmp_path) :
+
+    import numpy as np
+
+    ep = load_epdex(tmp_path)
+    ep.numerize()
+
+    ep.pres['b'] = 3
+    ep.ndct['a'] = np.ma.masked_array([10, 20, 30, 40], 
+                                      mask = [False, True, False, False])
+    ep.ndct['b'] = np.array([0.1235, np.nan, -0.0004, 2.0])
+
+    # >> Only the fields asked for are converted:
+
+    ep.characterize(fields = ['b'])
+
+    assert ep.dcty['b'] == ['0.123', 'null', '-0.000', '2.000']
+    assert ep.dcty['c'] == ['t0', 't1', 't2', 't3']
+
+    ep.characterize()
+
+    assert ep.dcty['a'] == ['10', 'null', '30', '40']
+    assert ep.dcty['c'] == ['t0', 't1', 't2', 't3']
+
+# ------------------------------------------------------------------------------
+# -- Numerizing only changed fields (numerize, cl_epdolist) --------------------
+# ------------------------------------------------------------------------------
+
+# >> Makes numerize_column() record the first string of each column that it
+# >> converts, in the returned list:
+
+def count_conversions(monkeypatch) :
+
+    converted = []
+    numerize_column = epdobase.numerize_column
+
+    def counting(column, precision = None) :
+        converted.append(column[0])
+        return numerize_column(column, precision)
+
+    monkeypatch.setattr(epdobase, 'numerize_column', counting)
+
+    return converted
+
+def test_ndct_converts_each_field_once_when_read(tmp_path, monkeypatch) :
+
+    ep = load_epdex(tmp_path)
+    converted = count_conversions(monkeypatch)
+
+    ep.numerize()
+    assert converted == []
+
+    assert list(ep.ndct['b']) == [1.5, 2.5, 3.5, 4.5]
+    assert list(ep.ndct['b']) == [1.5, 2.5, 3.5, 4.5]
+    assert converted == ['1.5']
+
+    ep.numerize()
+    ep.ndct['b']
+    assert converted == ['1.5']
+
+MUTATIONS = {
+    'setitem' : (lambda column : column.__setitem__(0, '9'), [9, 2, 3, 4]),
+    'slice'   : (lambda column : column.__setitem__(slice(1, 3), ['7', '8']),
+                 [1, 7, 8, 4]),
+    'append'  : (lambda column : column.append('5'), [1, 2, 3, 4, 5]),
+    'extend'  : (lambda column : column.extend(['5', '6']),
+                 [1, 2, 3, 4, 5, 6]),
+    'sort'    : (lambda column : column.sort(reverse = True), [4, 3, 2, 1]),
+    'del'     : (lambda column : column.__delitem__(0), [2, 3, 4]),
+}
+
+@pytest.mark.parametrize('name', sorted(MUTATIONS))
+def test_numerize_reconverts_only_changed_fields(tmp_path, monkeypatch, name) :
+
+    mutate, expected = MUTATIONS[name]
+
+    ep = load_epdex(tmp_path)
+    converted = count_conversions(monkeypatch)
+
+    before = dict((field, ep.ndct[field]) for field in ep.flds)
+    del converted[:]
+
+    mutate(ep.dcty['a'])
+
+    # >> ndct follows the strings only once numerize() is called:
+
+    assert ep.ndct['a'] is before['a']
+    assert list(ep.ndct['a']) == [1, 2, 3, 4]
+
+    ep.numerize()
+    assert converted == []
+
+    assert list(ep.ndct['a']) == expected
+    assert converted == [ep.dcty['a'][0]]
+
+    # >> The unchanged fields keep the same numbers:
+
+    for field in ['b', 'c'] : assert ep.ndct[field] is before[field]
+
+    assert len(converted) == 1
+
+def test_numerize_reconverts_fields_assigned_to_dcty(tmp_path, monkeypatch) :
+
+    ep = load_epdex(tmp_path)
+    converted = count_conversions(monkeypatch)
+
+    before = dict((field, ep.ndct[field]) for field in ep.flds)
+    del converted[:]
+
+    # >> A plain list assigned to dcty replaces the numbers at once, and is
+    # >> converted again whenever numerize() is called (it can't be tracked):
+
+    ep.dcty['c'] = ['u', 'v', 'w', 'x']
+
+    assert list(ep.ndct['c']) == ['u', 'v', 'w', 'x']
+    assert ep.ndct['a'] is before['a'] and ep.ndct['b'] is before['b']
+    assert converted == ['u']
+
+    ep.numerize()
+    ep.ndct['a'], ep.ndct['b'], ep.ndct['c']
+
+    assert converted == ['u', 'u']
+
+# ------------------------------------------------------------------------------
+# -- Indexing records (create_index, matching_records, search_records) ---------
+# ------------------------------------------------------------------------------
+
+def test_hash_index_is_dropped_when_records_change_in_place(tmp_path) :
+
+    ep = epdobase.cl_epdobase()
+    ep.load(write_text(tmp_path, 'abc.dex',
+                       '++ a # b\n1 # x\n2 # y\n3 # x\n++\n'))
+
+    ep.create_index('b')
+    assert list(ep.matching_records({'b' : ['x']})) == [0, 2]
+
+    ep.dcty['b'][0] = 'q'
+
+    assert list(ep.matching_records({'b' : ['q']})) == [0]
+    assert list(ep.matching_records({'b' : ['x']})) == [2]
+    assert 'b' not in ep.indx
+
+    # >> Appending, sorting and deleting records drop the index, too:
+
+    for change in [lambda column : column.append('x'),
+                   lambda column : column.sort(),
+                   lambda column : column.__delitem__(0)] :
+
+        ep.create_index('b')
+        change(ep.dcty['b'])
+
+        expected = [i for i, val in enumerate(ep.dcty['b']) if val == 'x']
+        assert list(ep.matching_records({'b' : ['x']})) == expected
+
+def test_index_of_assigned_list_is_dropped_when_changed() :
+
+    ep = epdobase.cl_epdobase()
+    ep.flds = ['b']
+    ep.dcty['b'] = ['x', 'y', 'x']
+
+    ep.create_index('b')
+    ep.create_index('b', kind = 'trigram')
+
+    ep.dcty['b'][1] = 'x'
+
+    assert list(ep.matching_records({'b' : ['x']})) == [0, 1, 2]
+    assert list(ep.search_records({'b' : ['x']})) == [0, 1, 2]
+
+# >> Returns "num" random strings of up to "max_len" characters, from a few
+# >> letters (so that values searched for are often found), and characters
+# >> beyond ASCII and beyond the Basic Multilingual Plane:
+
+def random_strings(rng, num, max_len) : 
+
+    chars = 'abcab é中\U0001f600'
+
+    return [''.join(rng.choice(chars) for _ in range(rng.randint(0, max_len)))
+            for _ in range(num)]
+
+def test_trigram_search_matches_brute_force() :
+
+    import random
+
+    rng = random.Random(18)
+
+    for trial in range(0,40,1) : 
+
+        column = random_strings(rng, rng.randint(0, 60), 8)
+        vals = random_strings(rng, 20, 5)
+        vals += [rec[1:4] for rec in column[:10]]
+
+        for block_rows in [1, 3, 100000] : 
+
+            index = epdobase.make_trigram_index(column, block_rows)
+
+            for val in vals : 
+                expected = [i for i, rec in enumerate(column) if val in rec]
+                assert epdobase.find_indexed_partial_matches(column, val, 
+                                                             index) == \
+                    expected, (column, val)
+
+def test_trigrams_do_not_span_records() :
+
+    column = ['ab', 'c', 'abc', 'xab', 'cab']
+    index = epdobase.make_trigram_index(column, block_rows = 2)
+
+    assert epdobase.find_indexed_partial_matches(column, 'abc', index) == [2]
+    assert epdobase.find_indexed_partial_matches(column, 'bca', index) == []
+    assert epdobase.find_indexed_partial_matches(column, 'ab', index) == \
+        [0, 2, 3, 4]
+
+def test_search_records_with_trigram_index_matches_without() :
+
+    import random
+
+    rng = random.Random(180)
+
+    ep = epdobase.cl_epdobase()
+    ep.flds = ['s', 't']
+    ep.dcty['s'] = random_strings(rng, 300, 10)
+    ep.dcty['t'] = random_strings(rng, 300, 4)
+
+    for trial in range(0,50,1) : 
+
+        valdict = {'s' : random_strings(rng, rng.randint(1, 3), 4)}
+        if rng.random() < 0.5 : valdict['t'] = random_strings(rng, 1, 3)[0]
+
+        ep.drop_indices()
+        expected = list(ep.search_records(valdict))
+
+        ep.create_index('s', kind = 'trigram')
+        ep.create_index('t', kind = 'trigram')
+
+        assert list(ep.search_records(valdict)) == expected, valdict
+        assert sorted(ep.sndx.keys()) == ['s', 't']
+
+# ------------------------------------------------------------------------------
+# -- Sorting records (sort_records) --------------------------------------------
+# ------------------------------------------------------------------------------
+
+# >> Returns an epdobase with the field "z", as the strings "zs", numerized,
+# >> and the field "i" numbering the records:
+
+def sort_epdobase(zs, schema = None) :
+
+    ep = epdobase.cl_epdobase()
+    ep.flds = ['z', 'i']
+    ep.dcty['z'] = list(zs)
+    ep.dcty['i'] = [str(i) for i in range(0,len(zs),1)]
+    ep.numerize(schema = schema)
+
+    return ep
+
+@pytest.mark.parametrize('reverse', [False, True])
+def test_sort_puts_nan_last(reverse) :
+
+    ep = sort_epdobase(['1', 'null', '3', '2', 'null', '2'])
+    ep.sort_records('z', reverse)
+
+    if reverse : assert ep.dcty['z'] == ['3', '2', '2', '1', 'null', 'null']
+    else : assert ep.dcty['z'] == ['1', '2', '2', '3', 'null', 'null']
+
+    # >> (The sort is stable, nulls included:)
+
+    if reverse : assert ep.dcty['i'] == ['2', '3', '5', '0', '1', '4']
+    else : assert ep.dcty['i'] == ['0', '3', '5', '2', '1', '4']
+
+@pytest.mark.parametrize('reverse', [False, True])
+def test_sort_puts_masked_nulls_last(reverse) :
+
+    import numpy as np
+
+    ep = sort_epdobase(['1', 'null', '3', '2'],
+                       schema = {'z' : {'dtype' : 'int32'}})
+
+    assert np.ma.isMaskedArray(ep.ndct['z'])
+
+    ep.sort_records('z', reverse)
+
+    if reverse : assert ep.dcty['i'] == ['2', '3', '0', '1']
+    else : assert ep.dcty['i'] == ['0', '3', '2', '1']
+
+def test_sort_by_several_fields_in_their_own_orders() :
+
+    ep = sort_epdobase(['2', '1', 'null', '2', '1'])
+    ep.dcty['w'] = ['a', 'b', 'c', 'd', 'e']
+    ep.flds.append('w')
+
+    ep.sort_records(['z', 'w'], [True, True])
+
+    assert ep.dcty['w'] == ['d', 'a', 'e', 'b', 'c']